@@ -0,0 +1,121 @@
+import re
+import time
+import random
+import threading
+
+from metrics import metrics
+
+
+MAX_RETRIES = 3          # başarısız öğe için ek deneme sayısı
+BACKOFF_BASE = 2.0       # saniye; her denemede iki katına çıkar
+BACKOFF_CAP = 60.0
+RATE_LIMIT_FACTOR = 4    # 429 sonrası bekleme daha uzun tutulur
+DECREASE_FACTOR = 0.5    # AIMD çarpımsal azaltma
+DECREASE_COOLDOWN = 10.0  # aynı tıkanıklık için art arda azaltma yapılmaz (saniye)
+THROTTLED_BPS = 256 * 1024  # bundan yavaş biten büyük öğe kısılmış sayılır
+THROTTLE_MIN_BYTES = 8 * 1024 * 1024
+
+# Hata türleri
+RATE_LIMITED = 'rate_limited'  # HTTP 429
+FORBIDDEN = 'forbidden'        # HTTP 403 (çoğunlukla süresi dolmuş/kısılmış akış URL'si)
+PERMANENT = 'permanent'        # tekrar denemenin anlamı yok
+TRANSIENT = 'transient'
+
+_STATUS_RE = re.compile(r'HTTP Error (\d{3})')
+_PERMANENT_RE = re.compile(
+    r'(Private video|Video unavailable|has been removed|copyright|members[- ]only|'
+    r'Sign in to confirm your age|not available in your country|Unsupported URL)', re.I)
+
+
+def classify(exc):
+    """İstisnayı (ve sebep zincirini) tekrar deneme kararı için sınıflandırır."""
+    seen = exc
+    while seen is not None:
+        status = getattr(seen, 'status', None) or getattr(getattr(seen, 'response', None), 'status', None)
+        match = _STATUS_RE.search(str(seen))
+        status = status or (int(match.group(1)) if match else None)
+        if status == 429:
+            return RATE_LIMITED
+        if status == 403:
+            return FORBIDDEN
+        if _PERMANENT_RE.search(str(seen)):
+            return PERMANENT
+        exc_info = getattr(seen, 'exc_info', None)
+        seen = seen.__cause__ or seen.__context__ or (exc_info[1] if exc_info else None)
+    return TRANSIENT
+
+
+def backoff(attempt, kind=TRANSIENT, rand=None):
+    """Tam jitter'lı üstel bekleme: [0, min(cap, base * 2^attempt)] arası rastgele."""
+    rand = rand or random.uniform
+    base = BACKOFF_BASE * (RATE_LIMIT_FACTOR if kind == RATE_LIMITED else 1)
+    return rand(0, min(BACKOFF_CAP, base * 2 ** attempt))
+
+
+class ConcurrencyController:
+    """
+    Bir işin aynı anda indirdiği öğe sayısını ve dosya başına bağlantı sayısını
+    AIMD ile ayarlar: her başarılı öğede pencere toplamsal büyür, 429/403 veya
+    kısılmış hız görülünce yarıya iner. Tavanlar kullanıcının seçimidir.
+    """
+
+    def __init__(self, max_items, max_connections=1, initial_items=None, clock=time.monotonic):
+        self.max_items = max(1, max_items)
+        self.max_connections = max(1, max_connections)
+        self.items = float(initial_items or self.max_items)
+        self.fragments = float(self.max_connections)
+        self.clock = clock
+        self.last_decrease = None
+        self.active = 0
+        self.cond = threading.Condition()
+
+    @property
+    def limit(self):
+        return max(1, int(self.items))
+
+    def connections(self):
+        return max(1, int(self.fragments))
+
+    def acquire(self):
+        """Pencerede yer açılana kadar bekler (yalnızca hub üzerindeki işçilerden çağrılır)."""
+        with self.cond:
+            while self.active >= self.limit:
+                self.cond.wait()
+            self.active += 1
+
+    def release(self):
+        with self.cond:
+            self.active -= 1
+            self.cond.notify_all()
+
+    def on_success(self, nbytes=0, seconds=0, rate_limited=False):
+        """
+        Biten öğenin aktarım bilgisi. Hız sınırlayıcı devredeyse (rate_limited)
+        yavaşlık bizim seçimimizdir, kısılma sayılmaz.
+        """
+        throughput = nbytes / seconds if seconds > 0 else 0
+        if (not rate_limited and nbytes >= THROTTLE_MIN_BYTES and throughput
+                and throughput < THROTTLED_BPS):
+            self._decrease('throttled')
+            return
+        with self.cond:
+            previous = self.limit
+            self.items = min(self.items + 1 / self.items, self.max_items)
+            self.fragments = min(self.fragments + 1, self.max_connections)
+            if self.limit > previous:
+                metrics.inc('ytd_concurrency_changes_total', direction='up')
+                self.cond.notify_all()
+
+    def on_error(self, kind):
+        if kind in (RATE_LIMITED, FORBIDDEN):
+            self._decrease(kind)
+
+    def _decrease(self, reason):
+        with self.cond:
+            now = self.clock()
+            if self.last_decrease is not None and now - self.last_decrease < DECREASE_COOLDOWN:
+                return
+            self.last_decrease = now
+            self.items = max(1.0, self.items * DECREASE_FACTOR)
+            self.fragments = max(1.0, self.fragments * DECREASE_FACTOR)
+        metrics.inc('ytd_concurrency_changes_total', direction='down', reason=reason)
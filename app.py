@@ -1,39 +1,252 @@
+import os
+import time
+_START = time.perf_counter()
+
 import eventlet
 eventlet.monkey_patch()
 
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO
+from flask import Flask, Response, render_template, request, jsonify, send_file
+from flask_socketio import SocketIO, join_room, emit
 
 # Yeni modüllerimizi çağırıyoruz
 from utils import get_default_path, open_folder_dialog
-from downloader import run_downloader, fetch_metadata
+from scheduler import Job, JobScheduler
+from journal import journal
+from metrics import metrics
+from cache import metadata_cache
+from executor import offload
+from bandwidth import limiter, parse_rate
+from thumbnails import thumbnail_cache, THUMB_MAX_AGE
 
 app = Flask(__name__)
 socketio = SocketIO(app, async_mode="eventlet", cors_allowed_origins="*", ping_timeout=60, ping_interval=25)
 
+
+def run_job(channel, job):
+    """Zamanlayıcının başlattığı işi çalıştırır; olaylar işin odasına gider."""
+    p = job.params
+    if p.get('urls'):
+        from batch import run_batch
+        run_batch(channel, p['urls'], p['path'], p['resolution'], job.room, p['workers'],
+                  job_id=job.id, rate_limit=p.get('rate_limit'), connections=p.get('connections'),
+                  mode=p.get('mode'), section=p.get('section'))
+        return
+    from downloader import run_downloader
+    run_downloader(channel, p['url'], p['path'], p['resolution'], job.room, p['indices'], p['workers'],
+                   job_id=job.id, rate_limit=p.get('rate_limit'), connections=p.get('connections'),
+                   mode=p.get('mode'), section=p.get('section'))
+
+
+scheduler = JobScheduler(socketio, run_job, journal=journal)
+
+metrics.set_gauge('ytd_jobs_active', scheduler.active_count)
+metrics.set_gauge('ytd_jobs_queued', scheduler.queued_count)
+metrics.set_gauge('ytd_metadata_cache_hits', lambda: metadata_cache.stats()['hits'])
+metrics.set_gauge('ytd_metadata_cache_misses', lambda: metadata_cache.stats()['misses'])
+metrics.set_gauge('ytd_rate_limit_bytes_per_second', lambda: limiter.rate)
+metrics.set_gauge('ytd_thumbnail_cache_bytes', lambda: thumbnail_cache.stats()['bytes'])
+
+
+def rate_from(data):
+    """İstemciden gelen hız sınırı (bayt/sn veya '5M' gibi); geçersizse sınırsız."""
+    try:
+        return parse_rate(data.get('rate_limit'))
+    except (TypeError, ValueError):
+        return 0
+
+def section_from(data):
+    """İstemciden gelen zaman aralığı {'start', 'end'} (saniye) olarak; yoksa None, geçersizse ValueError."""
+    from modes import parse_section
+    section = parse_section(data.get('section'))
+    return {'start': section[0], 'end': section[1]} if section else None
+
 @app.route('/')
 def index():
     return render_template('index.html', default_path=get_default_path())
 
+@app.route('/metrics')
+def metrics_route():
+    """Prometheus uyumlu ölçümler (faz süreleri, bayt, hata sayıları, iş durumu)."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/thumb/<thumb_id>')
+def thumbnail_route(thumb_id):
+    """
+    Kapak vekili: ilerleme mesajlarındaki thumb_id ile istenir. Kapak ilk istekte
+    bir kez çekilip küçültülür, sonra diskten sunulur (ETag ile 304 desteklenir).
+    """
+    try:
+        # Ağ işi get içinde offload edilir; ortak indirmeyi bekleme hub'da kalmalı
+        path = thumbnail_cache.get(thumb_id)
+    except Exception:
+        return Response(status=502)
+    if path is None:
+        return Response(status=404)
+    response = send_file(path, max_age=THUMB_MAX_AGE, conditional=True, etag=thumb_id)
+    # Kimlik kapak URL'sinden türediği için içerik hiç değişmez
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
 @app.route('/select-folder', methods=['POST'])
 def select_folder_route():
     return jsonify({'path': open_folder_dialog()})
 
 @socketio.on('fetch_metadata')
 def handle_fetch_metadata(data):
+    from downloader import fetch_metadata, stream_metadata
+
     def background_fetch(url, sid):
         result = fetch_metadata(url)
         socketio.emit('metadata_result', result, to=sid)
-    
-    socketio.start_background_task(background_fetch, data['url'], request.sid)
+
+    def background_stream(url, sid):
+        # Büyük playlist'ler: öğeler sayfa sayfa 'metadata_page' ile gelir,
+        # tarama bitince 'done': True taşıyan son sayfa gönderilir
+        result = stream_metadata(url, lambda page: socketio.emit('metadata_page', page, to=sid))
+        socketio.emit('metadata_page' if result.get('done') else 'metadata_result', result, to=sid)
+
+    task = background_stream if data.get('stream') else background_fetch
+    socketio.start_background_task(task, data['url'], request.sid)
 
 @socketio.on('start_download')
 def start_download(data):
-    # run_downloader fonksiyonuna socketio nesnesini de gönderiyoruz
-    resolution = data.get('resolution', '1080')
-    indices = data.get('indices', []) # Seçilen index listesi (boşsa hepsi)
-    socketio.start_background_task(run_downloader, socketio, data['url'], data['path'], resolution, request.sid, indices)
+    try:
+        section = section_from(data)
+    except ValueError as e:
+        emit('error', {'msg': str(e)})
+        return
+    params = {
+        'url': data['url'],
+        'path': data['path'],
+        'resolution': data.get('resolution', '1080'),
+        'indices': data.get('indices', []), # Seçilen index listesi (boşsa hepsi)
+        'workers': data.get('workers'), # Eşzamanlı indirme sayısı (boşsa varsayılan)
+        'rate_limit': rate_from(data), # İşe özel hız sınırı (bayt/sn, 0 = yalnızca genel sınır)
+        'connections': data.get('connections'), # Dosya başına bağlantı sayısı (boşsa varsayılan)
+        'mode': data.get('mode'), # 'video' (varsayılan) veya 'audio' (yalnız ses)
+        'section': section # Yalnızca indirilecek zaman aralığı (boşsa tüm video)
+    }
+    # Kullanıcı kimliği: tarayıcıda saklanan client_id (yoksa socket oturumu)
+    owner = data.get('client_id') or request.sid
+    job = Job(owner, params, data.get('priority', 0))
+
+    # İş başlamadan odaya katıl ki ilk olaylar kaçmasın
+    join_room(job.room)
+    scheduler.submit(job)
+    emit('job_created', {'job_id': job.id, 'status': job.status, 'position': scheduler.position(job)})
+
+def batch_params(data, urls):
+    """Toplu iş parametreleri; 'url' iş listesinde gösterilecek özet olarak kalır."""
+    section = section_from(data)
+    return {
+        'url': f"{len(urls)} URL",
+        'urls': urls,
+        'path': data['path'],
+        'resolution': data.get('resolution', '1080'),
+        'indices': [],
+        'workers': data.get('workers'),
+        'rate_limit': rate_from(data),
+        'connections': data.get('connections'),
+        'mode': data.get('mode'),
+        'section': section
+    }
+
+@socketio.on('start_batch')
+def start_batch(data):
+    """
+    Birden çok URL'yi (liste ya da metin) tek işte indirir. Playlist'ler açılır,
+    tekrar eden videolar bir kez indirilir; iş sonunda 'batch_report' gelir.
+    """
+    from batch import parse_urls
+    try:
+        urls = parse_urls(data.get('urls') or data.get('text'))
+        params = batch_params(data, urls)
+    except ValueError as e:
+        emit('error', {'msg': str(e)})
+        return
+    if not urls:
+        emit('error', {'msg': "Geçerli URL bulunamadı."})
+        return
+    job = Job(data.get('client_id') or request.sid, params, data.get('priority', 0))
+    join_room(job.room)
+    scheduler.submit(job)
+    emit('job_created', {'job_id': job.id, 'status': job.status, 'position': scheduler.position(job)})
+
+@app.route('/batch', methods=['POST'])
+def batch_route():
+    """
+    REST ile toplu iş: JSON ({"urls": [...], "path": ...}) ya da form + 'file' (satır başına URL).
+    İlerleme, dönen job_id ile socket üzerinden 'attach_job' ile izlenir.
+    """
+    from batch import parse_urls
+    data = request.get_json(silent=True) or request.form.to_dict()
+    upload = request.files.get('file')
+    if not data.get('path'):
+        return jsonify({'error': "urls ve path gerekli."}), 400
+    try:
+        urls = parse_urls(upload.read().decode('utf-8', 'replace') if upload else
+                          data.get('urls') or data.get('text'))
+        params = batch_params(data, urls)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not urls:
+        return jsonify({'error': "urls ve path gerekli."}), 400
+    job = Job(data.get('client_id') or request.remote_addr, params, data.get('priority', 0))
+    scheduler.submit(job)
+    return jsonify({'job_id': job.id, 'status': job.status, 'position': scheduler.position(job),
+                    'urls': len(urls)}), 202
+
+@socketio.on('attach_job')
+def attach_job(data):
+    """Yeniden bağlanan istemciyi işin ilerleme akışına tekrar bağlar."""
+    job = scheduler.get(data.get('job_id'))
+    if job is None:
+        emit('job_state', {'job_id': data.get('job_id'), 'status': 'unknown', 'events': {}})
+        return
+    join_room(job.room)
+    emit('job_state', dict(job.snapshot(), position=scheduler.position(job)))
+
+@socketio.on('set_rate_limit')
+def set_rate_limit(data):
+    """
+    Hız sınırını çalışan işleri yeniden başlatmadan değiştirir.
+    job_id verilirse yalnızca o işin sınırı, verilmezse genel sınır değişir.
+    """
+    rate = rate_from(data)
+    job = scheduler.get(data.get('job_id')) if data.get('job_id') else None
+    if job is not None:
+        job.params['rate_limit'] = rate
+        limiter.set_job_rate(job.room, rate)
+    elif not data.get('job_id'):
+        limiter.set_rate(rate)
+    emit('rate_limit', {'job_id': data.get('job_id'), 'rate_limit': rate, 'global': limiter.rate})
+
+def warm_up():
+    """
+    yt-dlp ve indirme modülleri port açıldıktan sonra arka planda yüklenir;
+    sunucu bu ağır importları beklemeden bağlantı kabul etmeye başlar.
+    """
+    with metrics.timed('warmup'):
+        offload(__import__, 'downloader')
+
+
+def serving_process(debug):
+    """
+    Debug modunda Werkzeug yeniden yükleyicisi __main__ bloğunu hem izleyici (ebeveyn)
+    hem de sunucu (çocuk) süreçte çalıştırır. İşler yalnızca sunucu süreçte devam
+    ettirilmeli; yoksa her iş iki kez, aynı .part dosyasına indirilir.
+    """
+    return not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+
 
 if __name__ == "__main__":
-    print("Server is running at: http://127.0.0.1:8999")
-    socketio.run(app, host="127.0.0.1", port=8999, debug=True)
\ No newline at end of file
+    DEBUG = True
+    if serving_process(DEBUG):
+        metrics.observe('ytd_phase_seconds', time.perf_counter() - _START, phase='startup')
+        socketio.start_background_task(warm_up)
+        resumed = scheduler.resume()
+        if resumed:
+            print(f"Resuming {len(resumed)} unfinished job(s) from the journal")
+        print("Server is running at: http://127.0.0.1:8999")
+    socketio.run(app, host="127.0.0.1", port=8999, debug=DEBUG)
\ No newline at end of file
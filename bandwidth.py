@@ -0,0 +1,172 @@
+import os
+import time
+
+from metrics import metrics
+from executor import real_lock, pause
+
+
+BURST_SECONDS = 1.0   # kova kapasitesi: bu kadar saniyelik hız (kısa patlamalara izin)
+ACTIVE_WINDOW = 2.0   # bu süre boyunca bayt çekmeyen iş, pay hesabından düşer
+
+
+def parse_rate(value):
+    """'5M', '800K', '1048576' veya sayı -> bayt/sn; boş/0 sınırsız (0)."""
+    if value in (None, ''):
+        return 0
+    if isinstance(value, (int, float)):
+        return max(int(value), 0)
+    text = str(value).strip().upper().replace('/S', '').rstrip('B')
+    scale = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}.get(text[-1:], 1)
+    if scale != 1:
+        text = text[:-1]
+    return max(int(float(text) * scale), 0)
+
+
+# Tüm indirmeler için toplam hız sınırı (bayt/sn, 'K'/'M' son ekleri kabul edilir; boşsa sınırsız)
+GLOBAL_RATE = parse_rate(os.environ.get('YTD_RATE_LIMIT', ''))
+
+
+def fair_shares(total, caps):
+    """
+    Su doldurma (max-min adil) paylaşımı: kendi sınırı eşit paydan düşük olan işler
+    sınırını alır, artan kapasite kalan işler arasında eşit bölünür.
+    caps: {iş: sınır veya 0}. total 0 ise (sınırsız) her iş kendi sınırını alır.
+    """
+    if not total:
+        return dict(caps)
+    shares = {}
+    remaining = total
+    pending = dict(caps)
+    while pending:
+        equal = remaining / len(pending)
+        limited = {job: cap for job, cap in pending.items() if cap and cap <= equal}
+        if not limited:
+            shares.update((job, equal) for job in pending)
+            break
+        for job, cap in limited.items():
+            shares[job] = cap
+            remaining -= cap
+            del pending[job]
+    return shares
+
+
+class TokenBucket:
+    """Rezervasyonlu token kovası: token borca girebilir, borç kadar beklenir."""
+
+    def __init__(self, rate, clock=time.monotonic):
+        self.clock = clock
+        self.rate = 0
+        self.tokens = 0.0
+        self.last = clock()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        self._refill(self.clock())
+        self.rate = rate
+        self.tokens = min(self.tokens, self.capacity) if rate else 0.0
+
+    @property
+    def capacity(self):
+        return self.rate * BURST_SECONDS
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self.tokens + (now - self.last) * self.rate, self.capacity)
+        self.last = now
+
+    def reserve(self, nbytes):
+        """nbytes kadar token alır; beklenmesi gereken süreyi (saniye) döner."""
+        if not self.rate:
+            return 0.0
+        self._refill(self.clock())
+        self.tokens -= nbytes
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class BandwidthLimiter:
+    """
+    Süreç genelinde paylaşılan hız sınırlayıcı. Her iş kendi kovasından,
+    kovanın hızı ise genel sınırın aktif işler arasındaki adil payından
+    (varsa işin kendi sınırıyla kırpılarak) gelir. Sınırlar çalışırken değiştirilebilir.
+    İndirme thread'leri progress hook'unda throttle() çağırır; gerekirse orada bekler.
+    """
+
+    def __init__(self, rate=GLOBAL_RATE, clock=time.monotonic, sleep=None):
+        self.clock = clock
+        self.sleep = sleep or pause
+        self.lock = real_lock()
+        self.rate = rate
+        self.caps = {}      # iş -> kendi sınırı (0 = yalnızca genel sınır)
+        self.buckets = {}   # iş -> TokenBucket
+        self.last_seen = {}  # iş -> son bayt çektiği an
+        self.active = set()
+
+    def register(self, job, cap=0):
+        with self.lock:
+            self.caps[job] = cap
+            self.buckets[job] = TokenBucket(cap, self.clock)
+
+    def unregister(self, job):
+        with self.lock:
+            self.caps.pop(job, None)
+            self.buckets.pop(job, None)
+            self.last_seen.pop(job, None)
+            if job in self.active:
+                self.active.discard(job)
+                self._rebalance()
+
+    def set_rate(self, rate):
+        """Genel sınırı değiştirir (0 = sınırsız)."""
+        with self.lock:
+            self.rate = rate
+            self._rebalance()
+
+    def set_job_rate(self, job, cap):
+        """Tek bir işin sınırını değiştirir; iş kayıtlı değilse False."""
+        with self.lock:
+            if job not in self.caps:
+                return False
+            self.caps[job] = cap
+            self._rebalance()
+            return True
+
+    def _rebalance(self):
+        """Kilit altında çağrılır. Aktif işlerin kova hızlarını yeniden dağıtır."""
+        shares = fair_shares(self.rate, {job: self.caps[job] for job in self.active})
+        for job, bucket in self.buckets.items():
+            bucket.set_rate(shares.get(job, self.caps[job]))
+
+    def throttle(self, job, nbytes):
+        """İşin nbytes indirdiğini bildirir; sınır aşıldıysa gereken süre kadar bekler."""
+        if nbytes <= 0:
+            return 0.0
+        with self.lock:
+            bucket = self.buckets.get(job)
+            if bucket is None:
+                return 0.0
+            now = self.clock()
+            self.last_seen[job] = now
+            idle = {j for j in self.active if now - self.last_seen.get(j, 0) > ACTIVE_WINDOW}
+            if job not in self.active or idle:
+                self.active = (self.active - idle) | {job}
+                self._rebalance()
+            wait = bucket.reserve(nbytes)
+
+        if wait > 0:
+            metrics.inc('ytd_throttled_seconds_total', wait)
+            self.sleep(wait)
+        return wait
+
+    def limited(self, job):
+        """İş genel ya da kendi sınırıyla kısılıyor mu (yavaşlık bizim seçimimiz mi)?"""
+        with self.lock:
+            return bool(self.rate or self.caps.get(job))
+
+    def limits(self):
+        with self.lock:
+            return {'global': self.rate, 'jobs': dict(self.caps),
+                    'shares': {job: self.buckets[job].rate for job in self.buckets}}
+
+
+# Süreç genelinde paylaşılan sınırlayıcı
+limiter = BandwidthLimiter()
@@ -0,0 +1,139 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import normalize_url
+from journal import journal
+from metrics import metrics
+from downloader import extract_flat, download_entries, finish_message
+
+
+# Tek toplu işte kabul edilen en fazla URL
+BATCH_MAX_URLS = int(os.environ.get('YTD_BATCH_MAX_URLS', '500'))
+# Aynı anda yapılan düz (extract_flat) çıkarım sayısı
+BATCH_EXTRACT_WORKERS = int(os.environ.get('YTD_BATCH_EXTRACT_WORKERS', '4'))
+
+_SEPARATORS = re.compile(r'[\s,]+')
+
+
+def parse_urls(text):
+    """
+    Metin veya dosya içeriğinden URL listesi çıkarır: satır, boşluk ya da virgülle
+    ayrılmış; '#' ile başlayan satırlar yorumdur. Aynı URL (normalize edilmiş hali) bir kez alınır.
+    """
+    if isinstance(text, (list, tuple)):
+        text = '\n'.join(str(u) for u in text if u)
+    urls, seen = [], set()
+    for line in (text or '').splitlines():
+        line = line.strip()
+        if line.startswith('#'):
+            continue
+        for url in _SEPARATORS.split(line):
+            if not url:
+                continue
+            key = normalize_url(url)
+            if key not in seen:
+                seen.add(key)
+                urls.append(url)
+    if len(urls) > BATCH_MAX_URLS:
+        raise ValueError(f"En fazla {BATCH_MAX_URLS} URL gönderilebilir ({len(urls)} geldi).")
+    return urls
+
+
+def entry_key(entry):
+    """Aynı videoyu gösteren öğeler (farklı playlist'lerden gelse de) aynı anahtarı alır."""
+    if entry.get('id'):
+        return entry['id']
+    return normalize_url(entry.get('webpage_url') or entry.get('url') or '')
+
+
+def expand(urls, workers=BATCH_EXTRACT_WORKERS):
+    """
+    URL'leri paralel extract_flat ile öğelere açar, tekrar eden öğeleri ayıklar.
+    (öğeler, URL başına rapor) döner; hatalı URL diğerlerini etkilemez.
+    """
+    def load(url):
+        try:
+            return extract_flat(url), None
+        except Exception as e:
+            metrics.error(e)
+            return None, str(e)
+
+    with metrics.timed('batch_expand'):
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            listings = list(pool.map(load, urls))
+
+    entries, report, seen = [], [], set()
+    for url, (info, error) in zip(urls, listings):
+        row = {'url': url, 'title': (info or {}).get('title'), 'entries': 0, 'duplicates': 0}
+        if error or not info:
+            report.append(dict(row, status='error', error=error or 'Bilgi alınamadı'))
+            continue
+        found = info['entries'] if 'entries' in info else [info]
+        for entry in found:
+            if not entry:
+                continue
+            key = entry_key(entry)
+            if key in seen:
+                row['duplicates'] += 1
+                continue
+            seen.add(key)
+            row['entries'] += 1
+            # Farklı playlist'lerin sıra numaraları karışmasın; dosyalar iş sırasıyla numaralanır
+            entries.append(dict({k: v for k, v in entry.items() if k != 'playlist_index'}, batch_source=url))
+        report.append(dict(row, status='ok'))
+    metrics.inc('ytd_batch_entries_total', len(entries))
+    return entries, report
+
+
+def summarize(report, entries, results):
+    """Öğe sonuçlarını kaynak URL'lere dağıtır (indirilen/başarısız sayıları)."""
+    by_url = {row['url']: dict(row, downloaded=0, failed=0) for row in report}
+    for entry, ok in zip(entries, results):
+        row = by_url.setdefault(entry.get('batch_source'), {
+            'url': entry.get('batch_source'), 'status': 'ok', 'entries': 0, 'duplicates': 0,
+            'downloaded': 0, 'failed': 0})
+        row['downloaded' if ok else 'failed'] += 1
+    return list(by_url.values())
+
+
+def run_batch(socketio, urls, folder, resolution, sid, workers=None, job_id=None, rate_limit=None,
+              connections=None, mode=None, section=None):
+    """
+    URL listesini tek bir iş olarak indirir: ortak ilerleme, sonunda URL başına rapor
+    ('batch_report') ve normal bitiş mesajı. Yarım kalan toplu iş günlükten devam eder.
+    """
+    entry_states = {}
+    try:
+        resumed = journal.load_entries(job_id) if journal is not None and job_id else None
+        if resumed:
+            title, entries, entry_states = resumed
+            # Çıkarım raporu saklanmaz; öğeler kaynak URL'lerine göre yeniden sayılır
+            rows = {url: {'url': url, 'status': 'ok', 'entries': 0, 'duplicates': 0} for url in urls}
+            for entry in entries:
+                if entry.get('batch_source') in rows:
+                    rows[entry['batch_source']]['entries'] += 1
+            report = list(rows.values())
+        else:
+            title = f"Toplu İndirme ({len(urls)} URL)"
+            entries, report = expand(urls)
+            if journal is not None and job_id:
+                journal.register_entries(job_id, title, entries)
+
+        socketio.emit('metadata', {
+            'title': title,
+            'thumb_id': None,
+            'is_playlist': len(entries) > 1,
+            'playlist_total': len(entries)
+        }, to=sid)
+        socketio.sleep(0)
+
+    except Exception as e:
+        socketio.emit('error', {'msg': f"Bağlantı Hatası: {str(e)}"}, to=sid)
+        return
+
+    results, total, saved = download_entries(socketio, sid, entries, entry_states, len(entries), folder,
+                                             resolution, workers, job_id, rate_limit, connections,
+                                             mode=mode, section=section)
+    socketio.emit('batch_report', {'urls': summarize(report, entries, results)}, to=sid)
+    finish_message(socketio, sid, sum(1 for ok in results if ok), total, saved)
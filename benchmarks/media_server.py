@@ -0,0 +1,108 @@
+"""
+Benchmark'lar için yerel medya sunucusu.
+
+/media/<video>/<format>?size=N yolunda N baytlık sentetik (deterministik) bir akış
+sunar. Range istekleri, ilk bayta kadar gecikme (latency) ve bağlantı başına hız
+sınırı (throttling) ayarlanabilir; böylece indirme yolu ağa çıkmadan ölçülür.
+"""
+import re
+import time
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+CHUNK = 64 * 1024
+_PATTERN = bytes(range(256)) * (CHUNK // 256)
+
+
+def payload(start, end):
+    """[start, end] (dahil) aralığının içeriği; her bayt konumunun mod 256'sıdır."""
+    offset = start % 256
+    length = end - start + 1
+    data = (_PATTERN[offset:] + _PATTERN) * (length // CHUNK + 1)
+    return data[:length]
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        if not parts.path.startswith('/media/'):
+            self.send_error(404)
+            return
+        size = int(parse_qs(parts.query).get('size', ['0'])[0])
+        if server.latency:
+            time.sleep(server.latency)
+
+        start, end, status = 0, size - 1, 200
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range') or '')
+        if match and server.range_support:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            status = 206
+
+        with server.lock:
+            server.requests += 1
+        self.send_response(status)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes' if server.range_support else 'none')
+        self.send_header('Content-Length', str(end - start + 1))
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+
+        began = time.monotonic()
+        sent = 0
+        position = start
+        try:
+            while position <= end:
+                block = payload(position, min(position + CHUNK, end + 1) - 1)
+                self.wfile.write(block)
+                position += len(block)
+                sent += len(block)
+                if server.rate:
+                    # Bağlantı başına hız sınırı: gönderilen bayt, geçen süreyi aşmasın
+                    ahead = sent / server.rate - (time.monotonic() - began)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        with server.lock:
+            server.bytes_sent += sent
+
+    def log_message(self, *args):
+        pass
+
+
+class MediaServer(ThreadingHTTPServer):
+    """Arka planda çalışan sunucu; ayarlar senaryolar arasında configure ile değişir."""
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, rate=0, range_support=True):
+        super().__init__(('127.0.0.1', 0), MediaHandler)
+        self.lock = threading.Lock()
+        self.configure(latency, rate, range_support)
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def configure(self, latency=0.0, rate=0, range_support=True):
+        self.latency = latency
+        self.rate = rate
+        self.range_support = range_support
+        self.requests = 0
+        self.bytes_sent = 0
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,119 @@
+"""
+Birleştirme (merge) fazı karşılaştırması.
+
+Eski seçim mantığının sık ürettiği VP9/Opus (webm) -> mp4 birleştirmesi ile
+yeni seçicinin tercih ettiği avc1/m4a -> mp4 birleştirmesi ve hiç
+post-processing gerektirmeyen tek dosya (progressive) durumu ölçülür.
+Girdiler ffmpeg'in lavfi kaynaklarıyla üretilir; ağ gerekmez.
+
+Kullanım:
+    python benchmarks/merge_bench.py [--seconds 60] [--height 720] [--runs 5] [--out sonuc.json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import statistics
+import subprocess
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from formats import selector  # noqa: E402
+
+
+# Eski seçicinin (yalnızca yükseklik) ve yenisinin karşılaştırıldığı örnek liste
+SAMPLE_FORMATS = [
+    {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 129},
+    {'format_id': '251', 'ext': 'webm', 'vcodec': 'none', 'acodec': 'opus', 'abr': 135},
+    {'format_id': '22', 'ext': 'mp4', 'vcodec': 'avc1.64001F', 'acodec': 'mp4a.40.2', 'height': 720, 'fps': 30, 'tbr': 1200},
+    {'format_id': '136', 'ext': 'mp4', 'vcodec': 'avc1.4d401f', 'acodec': 'none', 'height': 720, 'fps': 30, 'tbr': 1500},
+    {'format_id': '247', 'ext': 'webm', 'vcodec': 'vp9', 'acodec': 'none', 'height': 720, 'fps': 30, 'tbr': 1400},
+]
+
+
+def ffmpeg(*args):
+    subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', *args], check=True)
+
+
+def make_inputs(folder, seconds, height):
+    """Test akışlarını üretir (kodlama süresi ölçüme dahil değildir)."""
+    width = height * 16 // 9
+    video = ['-f', 'lavfi', '-i', f'testsrc2=size={width}x{height}:rate=30:duration={seconds}']
+    audio = ['-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds}']
+    paths = {name: os.path.join(folder, name) for name in
+             ('video.webm', 'audio.webm', 'video.mp4', 'audio.m4a', 'progressive.mp4')}
+    ffmpeg(*video, '-an', '-c:v', 'libvpx-vp9', '-deadline', 'realtime', '-cpu-used', '8', '-b:v', '1M',
+           paths['video.webm'])
+    ffmpeg(*audio, '-vn', '-c:a', 'libopus', '-b:a', '128k', paths['audio.webm'])
+    ffmpeg(*video, '-an', '-c:v', 'libx264', '-preset', 'ultrafast', '-b:v', '1M', paths['video.mp4'])
+    ffmpeg(*audio, '-vn', '-c:a', 'aac', '-b:a', '128k', paths['audio.m4a'])
+    ffmpeg('-i', paths['video.mp4'], '-i', paths['audio.m4a'], '-c', 'copy', paths['progressive.mp4'])
+    return paths
+
+
+def merge(video, audio, out):
+    """yt-dlp'nin FFmpegMergerPP'sinin çalıştırdığı komutun eşdeğeri."""
+    ffmpeg('-i', video, '-i', audio, '-c', 'copy', '-map', '0:v:0', '-map', '1:a:0',
+           '-movflags', '+faststart', out)
+
+
+def measure(func, runs):
+    walls, cpus = [], []
+    for _ in range(runs):
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        start = time.perf_counter()
+        func()
+        walls.append(time.perf_counter() - start)
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpus.append((after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime))
+    return {'wall_seconds': round(statistics.median(walls), 4), 'cpu_seconds': round(statistics.median(cpus), 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=int, default=60, help='test videosunun süresi')
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--out', help='sonuçların yazılacağı JSON dosyası')
+    args = parser.parse_args()
+
+    if shutil.which('ffmpeg') is None:
+        sys.exit('ffmpeg bulunamadı; bu benchmark ffmpeg gerektirir.')
+
+    plan = selector.plan(SAMPLE_FORMATS, args.height)
+    with tempfile.TemporaryDirectory() as folder:
+        paths = make_inputs(folder, args.seconds, args.height)
+        out = os.path.join(folder, 'out.mp4')
+        results = {
+            'legacy_vp9_opus_to_mp4': measure(lambda: merge(paths['video.webm'], paths['audio.webm'], out), args.runs),
+            'native_avc1_m4a_to_mp4': measure(lambda: merge(paths['video.mp4'], paths['audio.m4a'], out), args.runs),
+            # Tek dosya: post-processing yok, maliyet sıfır
+            'progressive': {'wall_seconds': 0.0, 'cpu_seconds': 0.0},
+        }
+
+    legacy = results['legacy_vp9_opus_to_mp4']
+    chosen = results['progressive' if plan['postprocess'] == 'none' else 'native_avc1_m4a_to_mp4']
+    report = {
+        'seconds': args.seconds,
+        'height': args.height,
+        'runs': args.runs,
+        'sample_plan': plan,
+        'results': results,
+        'saved': {
+            'wall_seconds': round(legacy['wall_seconds'] - chosen['wall_seconds'], 4),
+            'cpu_seconds': round(legacy['cpu_seconds'] - chosen['cpu_seconds'], 4),
+        },
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+"""
+Ağsız (offline) uçtan uca benchmark paketi.
+
+Yerel medya sunucusu (media_server.py) ve ona yönelen sahte extractor
+(fake_extractor.py) ile uygulamanın gerçek kod yolu ölçülür:
+
+  e2e             run_downloader: tek büyük video (1/4 bağlantı, hız sınırlı sunucu dahil)
+                  ve gecikmeli sunucuda küçük videolu playlist (1/4 işçi)
+  select_format   10 - 10.000 formatlı listelerde format seçimi
+  hook            DownloadHandler.hook çağrı maliyeti ve gönderilen mesaj sayısı
+  playlist_sizes  1 - 10.000 öğeli playlist: düz çıkarım, ilk sayfa gecikmesi ve indirme
+
+Sonuçlar JSON olarak yazılır; sürümler arasındaki gerilemeler karşılaştırılabilir.
+
+Kullanım:
+    python benchmarks/run_bench.py [--scenario e2e ...] [--runs 3] [--full] [--out sonuc.json]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+from contextlib import contextmanager
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+sys.path.append(BENCH_DIR)
+
+import fake_extractor  # noqa: E402
+from media_server import MediaServer  # noqa: E402
+import ydl_pool  # noqa: E402
+import downloader  # noqa: E402
+from formats import selector  # noqa: E402
+from progress import ProgressBroadcaster  # noqa: E402
+from bandwidth import BandwidthLimiter  # noqa: E402
+
+MB = 1024 * 1024
+PLAYLIST_SIZES = (1, 10, 100, 1000, 10000)
+# --full verilmezse daha büyük playlist'ler yalnızca listelenir, indirilmez
+QUICK_DOWNLOAD_LIMIT = 1000
+
+
+class BenchSocketIO:
+    """run_downloader'a verilen socketio yerine geçen, olay sayan nesne."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = {}
+
+    def emit(self, event, data=None, to=None):
+        with self.lock:
+            self.events[event] = self.events.get(event, 0) + 1
+
+    def sleep(self, seconds=0):
+        time.sleep(seconds)
+
+    def start_background_task(self, target, *args, **kwargs):
+        thread = threading.Thread(target=target, args=args, kwargs=kwargs, daemon=True)
+        thread.start()
+        return thread
+
+
+def install_extractor():
+    """Havuzun oluşturduğu her YoutubeDL örneğine BenchIE eklenir."""
+    create = ydl_pool.YDLPool._create
+
+    def _create(self, static):
+        ydl, hooks = create(self, static)
+        fake_extractor.install(ydl)
+        return ydl, hooks
+
+    ydl_pool.YDLPool._create = _create
+
+
+@contextmanager
+def silenced():
+    """yt-dlp'nin stdout'a yazdığı ilerleme çubuğu JSON çıktısına karışmasın."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(devnull)
+        os.close(saved)
+
+
+def nonce():
+    # Önbellek ve ortak indirme (single-flight) ölçümü bozmasın diye her koşu yeni kimlik kullanır
+    return uuid.uuid4().hex[:8]
+
+
+def median(values):
+    return round(statistics.median(values), 6)
+
+
+def run_download(server, url, **kwargs):
+    socket = BenchSocketIO()
+    served = server.bytes_sent
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        downloader.run_downloader(socket, url, folder, '360', 'bench', **kwargs)
+        wall = time.perf_counter() - start
+        files = len(os.listdir(folder))
+    nbytes = server.bytes_sent - served
+    return {'wall_seconds': wall, 'bytes': nbytes, 'files': files, 'events': socket.events}
+
+
+def summarize(samples):
+    walls = [s['wall_seconds'] for s in samples]
+    last = samples[-1]
+    return {
+        'wall_seconds': median(walls),
+        'throughput_mb_s': round(last['bytes'] / MB / statistics.median(walls), 2) if walls else 0,
+        'bytes': last['bytes'],
+        'files': last['files'],
+        'events': last['events'],
+    }
+
+
+def scenario_e2e(server, runs, full):
+    cases = {
+        'single_32mb_1conn': dict(size=32 * MB, connections=1),
+        'single_32mb_4conn': dict(size=32 * MB, connections=4),
+        'single_32mb_throttled_1conn': dict(size=32 * MB, connections=1, rate=8 * MB),
+        'single_32mb_throttled_4conn': dict(size=32 * MB, connections=4, rate=8 * MB),
+        'playlist_16x1mb_latency_1worker': dict(size=MB, count=16, workers=1, latency=0.05),
+        'playlist_16x1mb_latency_4workers': dict(size=MB, count=16, workers=4, latency=0.05),
+    }
+    results = {}
+    for name, case in cases.items():
+        samples = []
+        for _ in range(runs):
+            server.configure(latency=case.get('latency', 0.0), rate=case.get('rate', 0))
+            if 'count' in case:
+                url = f"{server.base_url}/playlist?list={nonce()}&count={case['count']}&size={case['size']}"
+            else:
+                url = f"{server.base_url}/watch?v={nonce()}&size={case['size']}"
+            samples.append(run_download(server, url, workers=case.get('workers'),
+                                        connections=case.get('connections')))
+        results[name] = summarize(samples)
+    server.configure()
+    return results
+
+
+def synthetic_formats(count, rng):
+    heights = (144, 240, 360, 480, 720, 1080, 1440, 2160)
+    codecs = (('mp4', 'avc1.640028'), ('webm', 'vp9'), ('mp4', 'av01.0.08M.08'))
+    formats = []
+    for i in range(count):
+        kind = i % 5
+        if kind == 0:
+            formats.append({'format_id': f'a{i}', 'ext': rng.choice(('m4a', 'webm')), 'vcodec': 'none',
+                            'acodec': rng.choice(('mp4a.40.2', 'opus')), 'abr': rng.randint(48, 256)})
+            continue
+        ext, vcodec = rng.choice(codecs)
+        formats.append({
+            'format_id': f'v{i}', 'ext': ext, 'vcodec': vcodec,
+            'acodec': 'mp4a.40.2' if kind == 1 and ext == 'mp4' else 'none',
+            'height': rng.choice(heights), 'fps': rng.choice((24, 30, 60)),
+            'tbr': rng.randint(100, 20000), 'filesize': rng.randint(MB, 500 * MB)})
+    return formats
+
+
+def scenario_select_format(server, runs, full):
+    rng = random.Random(42)
+    results = {}
+    for count in (10, 100, 1000, 10000):
+        formats = synthetic_formats(count, rng)
+        repeat = max(1, 20000 // count)
+        walls = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                downloader.select_format(formats, '1080')
+            walls.append((time.perf_counter() - start) / repeat)
+        results[f'{count}_formats'] = {
+            'seconds_per_call': median(walls),
+            'plan': selector.plan(formats, '1080')['postprocess'],
+        }
+    return results
+
+
+def scenario_hook(server, runs, full):
+    calls = 20000
+    results = {}
+    for label, playlist_total in (('single', 1), ('playlist', 50)):
+        walls, emitted = [], []
+        for _ in range(runs):
+            socket = BenchSocketIO()
+            broadcaster = ProgressBroadcaster()
+            # Bağımsız sınırlayıcı: genel sınırın ölçüme karışmaması için sınırsız
+            handler = downloader.DownloadHandler(socket, 'bench', playlist_total, broadcaster=broadcaster,
+                                                 limiter=BandwidthLimiter(rate=0))
+            info = {'title': 'Bench', 'format_id': '18', 'filesize': calls * 1024}
+            start = time.perf_counter()
+            for i in range(calls):
+                handler.hook({'status': 'downloading', 'downloaded_bytes': (i + 1) * 1024,
+                              'total_bytes': calls * 1024, 'speed': 10 * MB, 'info_dict': info},
+                             i % playlist_total + 1)
+            walls.append((time.perf_counter() - start) / calls)
+            handler.close()
+            emitted.append(socket.events.get('progress_batch', 0))
+        results[label] = {'seconds_per_hook': median(walls), 'hooks': calls,
+                          'progress_batch_emits': int(statistics.median(emitted))}
+    return results
+
+
+def scenario_playlist_sizes(server, runs, full):
+    results = {}
+    for count in PLAYLIST_SIZES:
+        row = {}
+        url = f'{server.base_url}/playlist?list={nonce()}&count={count}&size=4096'
+        start = time.perf_counter()
+        listing = downloader.fetch_metadata(url)
+        row['flat_extract_seconds'] = round(time.perf_counter() - start, 6)
+        row['entries'] = len(listing.get('entries', []))
+
+        first_page = []
+        url = f'{server.base_url}/playlist?list={nonce()}&count={count}&size=4096'
+        start = time.perf_counter()
+        downloader.stream_metadata(url, lambda page: first_page.append(time.perf_counter() - start))
+        row['stream_first_page_seconds'] = round(first_page[0], 6) if first_page else None
+        row['stream_total_seconds'] = round(time.perf_counter() - start, 6)
+
+        if full or count <= QUICK_DOWNLOAD_LIMIT:
+            sample = run_download(server, url, workers=4)
+            row['download'] = {'wall_seconds': round(sample['wall_seconds'], 6), 'files': sample['files'],
+                               'items_per_second': round(sample['files'] / sample['wall_seconds'], 2),
+                               'events': sample['events']}
+        else:
+            row['download'] = 'skipped (--full ile ölçülür)'
+        results[str(count)] = row
+    return results
+
+
+SCENARIOS = {
+    'e2e': scenario_e2e,
+    'select_format': scenario_select_format,
+    'hook': scenario_hook,
+    'playlist_sizes': scenario_playlist_sizes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='yalnızca verilen senaryolar (tekrarlanabilir; varsayılan hepsi)')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--full', action='store_true', help='10.000 öğeli playlist indirmesini de ölç')
+    parser.add_argument('--out', help='sonuçların yazılacağı JSON dosyası')
+    args = parser.parse_args()
+
+    install_extractor()
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': args.runs,
+        'full': args.full,
+        'results': {},
+    }
+    with MediaServer() as server:
+        for name in args.scenario or SCENARIOS:
+            start = time.perf_counter()
+            with silenced():
+                report['results'][name] = SCENARIOS[name](server, args.runs, args.full)
+            print(f'{name}: {time.perf_counter() - start:.1f} sn', file=sys.stderr)
+    ydl_pool.ydl_pool.clear()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+import time
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+# fetch_metadata ile run_downloader arasında paylaşılan önbellek ayarları
+METADATA_TTL = 600          # saniye
+METADATA_MAX_ENTRIES = 64   # LRU sınırı
+
+# Aynı içeriği gösteren URL'lerde farklılık yaratan, içeriği etkilemeyen parametreler
+_TRACKING_PARAMS = {'si', 'feature', 'pp', 'ab_channel', 'utm_source', 'utm_medium', 'utm_campaign'}
+
+
+def normalize_url(url):
+    """URL'yi önbellek anahtarı olarak kullanılabilecek standart biçime getirir."""
+    url = (url or '').strip()
+    parts = urlsplit(url)
+    scheme = (parts.scheme or 'https').lower()
+    host = parts.netloc.lower()
+    path = parts.path
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in _TRACKING_PARAMS]
+
+    # youtu.be/ID ve mobil/music alt alan adları aynı videoyu gösterir
+    if host in ('youtu.be', 'www.youtu.be') and path.strip('/'):
+        query.insert(0, ('v', path.strip('/')))
+        host, path = 'www.youtube.com', '/watch'
+    elif host in ('youtube.com', 'm.youtube.com', 'music.youtube.com'):
+        host = 'www.youtube.com'
+
+    query.sort()
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+class _Inflight:
+    """Devam eden tek bir yükleme; bekleyenler sonucu buradan alır."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MetadataCache:
+    """TTL süreli, boyutu sınırlı (LRU) ve tekil yüklemeli (single-flight) metadata önbelleği."""
+
+    def __init__(self, ttl=METADATA_TTL, max_entries=METADATA_MAX_ENTRIES, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # anahtar -> (kayıt zamanı, değer)
+        self.inflight = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key):
+        """Kilit altında çağrılır. Süresi dolmamış kaydı döner, yoksa None."""
+        item = self.entries.get(key)
+        if item is None:
+            return None
+        stored_at, value = item
+        if self.clock() - stored_at > self.ttl:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def get(self, url):
+        key = normalize_url(url)
+        with self.lock:
+            value = self._lookup(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, url, value):
+        key = normalize_url(url)
+        with self.lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        self.entries[key] = (self.clock(), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, url):
+        with self.lock:
+            self.entries.pop(normalize_url(url), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def get_or_load(self, url, loader):
+        """
+        Önbellekte varsa döner; yoksa loader() ile yükler.
+        Aynı URL için eşzamanlı istekler tek bir yüklemeyi paylaşır.
+        None dönen veya hata veren yüklemeler önbelleğe yazılmaz.
+        """
+        key = normalize_url(url)
+        with self.lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            self.misses += 1
+            flight = self.inflight.get(key)
+            owner = flight is None
+            if owner:
+                flight = self.inflight[key] = _Inflight()
+
+        if not owner:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = loader()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                if flight.error is None and flight.result is not None:
+                    self._store(key, flight.result)
+                del self.inflight[key]
+            flight.event.set()
+        return flight.result
+
+    def stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'inflight': len(self.inflight)
+            }
+
+
+# Süreç genelinde paylaşılan önbellek
+metadata_cache = MetadataCache()
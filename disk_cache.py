@@ -0,0 +1,166 @@
+import os
+import re
+import json
+import time
+import sqlite3
+
+from cache import normalize_url
+from executor import real_lock
+
+
+# Kalıcı önbellek dosyası; boş bırakılırsa disk önbelleği kapalıdır
+DISK_CACHE_PATH = os.environ.get('YTD_CACHE_DB', '')
+
+LISTING_TTL = 6 * 3600   # playlist listelerinin taze sayıldığı süre (saniye)
+VIDEO_TTL = 3600         # akış URL'lerinde son kullanma bilgisi yoksa
+EXPIRY_MARGIN = 300      # akış URL'si dolmadan bu kadar önce bayat say
+
+# googlevideo URL'leri: ...&expire=1700000000&...  veya  .../expire/1700000000/...
+_EXPIRE_RE = re.compile(r'[?&/]expire[=/](\d+)')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    key TEXT PRIMARY KEY,
+    meta TEXT NOT NULL,
+    is_playlist INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS listing_entries (
+    key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    video_id TEXT,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (key, position)
+);
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    info TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def stream_expiry(info):
+    """Bilgideki akış URL'lerinin en erken son kullanma zamanını (epoch) döner, yoksa None."""
+    urls = [info.get('url')] + [f.get('url') for f in info.get('formats') or []]
+    stamps = [int(m.group(1)) for u in urls if u for m in [_EXPIRE_RE.search(u)] if m]
+    return min(stamps) if stamps else None
+
+
+def _dumps(obj):
+    """JSON'a çevrilemeyen (fonksiyon, generator vb.) bilgiler önbelleğe alınmaz."""
+    try:
+        return json.dumps(obj)
+    except (TypeError, ValueError):
+        return None
+
+
+class DiskCache:
+    """
+    SQLite tabanlı kalıcı çıkarım önbelleği.
+    Düz playlist listelerini ve video bazlı format listelerini saklar; sunucu
+    yeniden başlasa da büyük playlist'lerin tekrar taranmasını önler.
+    """
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self.lock = real_lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.executescript(_SCHEMA)
+        self.purge_expired()
+
+    def _expires_at(self, info, ttl):
+        now = self.clock()
+        expiry = stream_expiry(info)
+        if expiry is None:
+            return now + ttl
+        return min(now + ttl, expiry - EXPIRY_MARGIN)
+
+    # --- Playlist / düz listeler ---
+
+    def get_listing(self, url, allow_stale=False):
+        """
+        (info, taze_mi) döner; kayıt yoksa (None, False).
+        allow_stale=False iken bayat kayıtlar da (None, False) döner.
+        """
+        key = normalize_url(url)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT meta, is_playlist, expires_at FROM listings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None, False
+            meta, is_playlist, expires_at = row
+            fresh = self.clock() < expires_at
+            if not fresh and not allow_stale:
+                return None, False
+            info = json.loads(meta)
+            if is_playlist:
+                rows = self.conn.execute(
+                    "SELECT entry FROM listing_entries WHERE key = ? ORDER BY position", (key,)).fetchall()
+                info['entries'] = [json.loads(r[0]) for r in rows]
+        return info, fresh
+
+    def put_listing(self, url, info):
+        key = normalize_url(url)
+        is_playlist = 'entries' in info
+        meta = _dumps({k: v for k, v in info.items() if k != 'entries'})
+        entries = [_dumps(e) for e in info['entries']] if is_playlist else []
+        if meta is None or None in entries:
+            return False
+        # Tek video sonucu akış URL'leri içerir; onların ömrüyle sınırlanır
+        expires_at = self.clock() + LISTING_TTL if is_playlist else self._expires_at(info, VIDEO_TTL)
+
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO listings (key, meta, is_playlist, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)", (key, meta, int(is_playlist), self.clock(), expires_at))
+            self.conn.execute("DELETE FROM listing_entries WHERE key = ?", (key,))
+            self.conn.executemany(
+                "INSERT INTO listing_entries (key, position, video_id, entry) VALUES (?, ?, ?, ?)",
+                [(key, i, (e or {}).get('id'), data) for i, (e, data) in
+                 enumerate(zip(info.get('entries') or [], entries))])
+        return True
+
+    # --- Video format listeleri ---
+
+    def get_video(self, video_id):
+        """Akış URL'leri hâlâ geçerli olan ham video bilgisini döner, yoksa None."""
+        if not video_id:
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT info, expires_at FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        if row is None or self.clock() >= row[1]:
+            return None
+        return json.loads(row[0])
+
+    def put_video(self, video_id, info):
+        # Sonradan çalışan yardımcı fonksiyonlar (ör. yorum çekici) saklanamaz ve gerekmez
+        info = {k: v for k, v in info.items() if not callable(v)}
+        data = _dumps(info) if video_id else None
+        if data is None:
+            return False
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO videos (video_id, info, fetched_at, expires_at) VALUES (?, ?, ?, ?)",
+                (video_id, data, self.clock(), self._expires_at(info, VIDEO_TTL)))
+        return True
+
+    def purge_expired(self):
+        """Süresi dolmuş video kayıtlarını siler (playlist listeleri artımlı yenileme için kalır)."""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM videos WHERE expires_at <= ?", (self.clock(),))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# Süreç genelinde paylaşılan disk önbelleği (kapalıysa None)
+disk_cache = DiskCache(DISK_CACHE_PATH) if DISK_CACHE_PATH else None
@@ -1,176 +1,717 @@
-import time
+import copy
+import itertools
+import re
 import os
-import yt_dlp
+from concurrent.futures import ThreadPoolExecutor
 from utils import format_seconds  # utils'den fonksiyon çektik
-
+from cache import metadata_cache
+from disk_cache import disk_cache
+from journal import journal, memory_archive, DOWNLOADING, MERGING, DONE, FAILED
+from progress import broadcaster as progress_broadcaster
+from meter import TransferStats, expected_size
+from metrics import metrics, TransferTimer
+from executor import offload, real_lock
+from bandwidth import limiter as bandwidth_limiter, parse_rate
+from ydl_pool import ydl_pool
+from formats import selector as format_selector, OUTPUT_FORMAT
+from stream import PAGE_SIZE, open_stream, close_stream, live_stream, page_payload
+from singleflight import flights, materialize
+from thumbnails import thumbnail_cache
+from modes import (VIDEO, AUDIO, parse_mode, parse_section, section_label, download_ranges,
+                   full_size)
+from adaptive import (ConcurrencyController, MAX_RETRIES, PERMANENT, FORBIDDEN,
+                      classify, backoff)
+
+
+# Playlist öğelerini aynı anda indiren işçi sayısı (1 = sıralı indirme).
+# Seçilen sayı tavandır; 429/403 ya da kısılmış hız görülünce eşzamanlılık azaltılır.
+# AUTO_WORKERS ile iki öğeden başlanıp MAX_WORKERS'a kadar büyünür.
+DEFAULT_WORKERS = 1
+AUTO_WORKERS = 0
+AUTO_INITIAL_WORKERS = 2
+MAX_WORKERS = 8
+
+# Tek dosya başına HTTP bağlantısı: progressive akışlar Range ile bölünür,
+# DASH/HLS parçaları eşzamanlı çekilir (1 = tek bağlantı)
+DEFAULT_CONNECTIONS = int(os.environ.get('YTD_CONNECTIONS', '1'))
+MAX_CONNECTIONS = 16
 
 
 class DownloadHandler:
-    """İndirme sürecini takip eden sınıf."""
+    """İndirme sürecini takip eden sınıf.
+
+    Eşzamanlı indirmede her playlist öğesi kendi index'i ile ayrı takip edilir;
+    playlist yüzdesi tüm öğelerin yüzdelerinin toplamından hesaplanır.
+    Hız ve kalan süre, akış bazlı (video/ses) kayan ortalama ile hesaplanır.
+    Güncellemeler doğrudan emit edilmez, ortak yayıncıya (ProgressBroadcaster) bırakılır.
+    İndirilen her blok ortak hız sınırlayıcıya bildirilir; sınır aşılırsa hook bekler.
+    """
 
-    def __init__(self, socketio, sid, playlist_total=0):
+    def __init__(self, socketio, sid, playlist_total=0, broadcaster=None, rate_limit=0, limiter=None):
         self.socketio = socketio
         self.sid = sid
         self.playlist_total = playlist_total
-        self.start_time = None
-        self.last_emit = 0
         self.cached_index = 1 if playlist_total > 1 else 0
+        # Hook'lar yt-dlp'nin çalıştığı OS thread'inden çağrılabilir
+        self.lock = real_lock()
+        # index -> öğe yüzdesi (playlist yüzdesi geri gitmesin diye en yüksek değer)
+        self.items = {}
+        self.stats = TransferStats(playlist_total)
+        self.broadcaster = broadcaster or progress_broadcaster
+        self.broadcaster.register(socketio, sid)
+        self.limiter = limiter or bandwidth_limiter
+        self.limiter.register(sid, rate_limit)
+        # Yalnız ses / aralık indirmelerinin tam indirmeye göre kazandığı bayt
+        self.saved_bytes = 0
+        # index -> kapak kimliği (her hook'ta kapak listesi yeniden taranmasın)
+        self.thumbs = {}
+
+    def close(self):
+        """İş bittiğinde bekleyen güncellemeleri gönderir ve yayıncıdan ayrılır."""
+        self.broadcaster.unregister(self.sid)
+        self.limiter.unregister(self.sid)
+
+    def flush(self):
+        self.broadcaster.flush(self.sid)
+
+    def add_saved(self, nbytes):
+        with self.lock:
+            self.saved_bytes += nbytes
+
+    def set_total(self, total):
+        """Playlist toplamını günceller (sayfalı taramada öğeler geldikçe büyür)."""
+        with self.lock:
+            self.playlist_total = total
+            self.stats.item_total = max(total, 1)
 
     def set_index(self, index):
-        """Döngüden gelen index bilgisini günceller."""
+        """Döngüden gelen index bilgisini günceller (sıralı mod için)."""
         self.cached_index = index
 
-    def hook(self, d):
-        # NOT: playlist_index'i artık d'den okumuyoruz çünkü manuel döngüdeyiz.
-        # self.cached_index dışarıdan yönetiliyor.
+    def make_hook(self, index, throttle=True):
+        """Belirli bir playlist öğesine bağlı progress hook döner."""
+        return lambda d: self.hook(d, index, throttle)
+
+    def playlist_percent(self):
+        """Uçuştaki ve biten tüm öğelerden genel playlist yüzdesini hesaplar."""
+        if self.playlist_total <= 1:
+            return 100
+        total = sum(self.items.values())
+        return round(min(total / self.playlist_total, 100), 1)
+
+    def complete(self, index):
+        """Öğe tamamen bittiğinde (birleştirme dahil) yüzdesini sabitler."""
+        with self.lock:
+            self.items[index] = 100
+            self.stats.complete(index)
+
+    def _playlist_fields(self, data):
+        if self.playlist_total > 1:
+            data['playlist_percent'] = self.playlist_percent()
+            job_speed = self.stats.job_speed()
+            data['playlist_speed'] = f"{job_speed / 1024 / 1024:.1f} MB/s" if job_speed else "-- MB/s"
+            data['playlist_eta'] = format_seconds(self.stats.job_eta())
+        return data
+
+    def hook(self, d, index=None, throttle=True):
+        if index is None:
+            index = self.cached_index
 
         info = d.get('info_dict', {})
         title = info.get('title', 'Bilinmeyen Video')
-        thumbnail = info.get('thumbnail', '')
+        if index not in self.thumbs:
+            self.thumbs[index] = thumbnail_cache.register(info)
+        thumb = self.thumbs[index]
+        # Birleştirilen indirmelerde video ve ses ayrı akışlardır
+        stream = info.get('format_id') or 'main'
 
         if d['status'] == 'downloading':
-            if self.start_time is None:
-                self.start_time = time.time()
-
-            total = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
-            downloaded = d.get("downloaded_bytes", 0)
-            percent = (downloaded / total * 100) if total else 0
-
-            elapsed = time.time() - self.start_time
-            speed = downloaded / elapsed if elapsed > 1 else 0
-            speed_str = f"{speed / 1024 / 1024:.1f} MB/s" if speed else "-- MB/s"
-            eta_str = format_seconds((total - downloaded) / speed) if speed else "--:--"
-
-            data = {
-                'status': 'downloading',
-                'title': title,
-                'thumbnail': thumbnail,
-                'percent': round(percent, 1),
-                'speed': speed_str,
-                'eta': eta_str,
-                'is_playlist': self.playlist_total > 1,
-                'playlist_index': self.cached_index,
-                'playlist_total': self.playlist_total
-            }
-
-            if self.playlist_total > 1:
-                current_calc_index = self.cached_index if self.cached_index > 0 else 1
-                global_percent = ((current_calc_index - 1) * 100 + percent) / self.playlist_total
-                data['playlist_percent'] = round(global_percent, 1)
-
-            now = time.time()
-            if now - self.last_emit > 0.2:
-                self.socketio.emit('progress', data, to=self.sid)
-                self.last_emit = now
-                self.socketio.sleep(0)
+            with self.lock:
+                total = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
+                downloaded = d.get("downloaded_bytes", 0)
+                # Akışın ilk bildirimi kaldığı yerden devam eden (.part) baytları da içerebilir
+                seen = self.stats.items.get(index, {}).get('streams', {})
+                delta = downloaded - seen[stream][0] if stream in seen else 0
+                percent, speed, eta = self.stats.update(
+                    index, stream, downloaded, total, expected_size(info), d.get('speed'))
+                self.items[index] = max(self.items.get(index, 0), percent)
+
+                speed_str = f"{speed / 1024 / 1024:.1f} MB/s" if speed else "-- MB/s"
+                eta_str = format_seconds(eta) if eta is not None else "--:--"
+
+                data = self._playlist_fields({
+                    'status': 'downloading',
+                    'title': title,
+                    'thumb_id': thumb,
+                    'percent': round(self.items[index], 1),
+                    'speed': speed_str,
+                    'eta': eta_str,
+                    'is_playlist': self.playlist_total > 1,
+                    'playlist_index': index,
+                    'playlist_total': self.playlist_total
+                })
+
+            self.broadcaster.publish(self.socketio, self.sid, index, data)
+            # Kilit dışında: bekleme diğer öğelerin hook'larını durdurmasın
+            if throttle:
+                self.limiter.throttle(self.sid, delta)
 
         elif d['status'] == 'finished':
-            data = {
-                'status': 'processing',
-                'title': title,
-                'thumbnail': thumbnail,
-                'percent': 100,
-                'is_playlist': self.playlist_total > 1,
-                'playlist_index': self.cached_index,
-                'playlist_total': self.playlist_total,
-                'playlist_percent': round((self.cached_index * 100) / self.playlist_total,
-                                          1) if self.playlist_total > 1 else 100
-            }
-            self.socketio.emit('progress', data, to=self.sid)
-            self.socketio.sleep(0)
-            self.start_time = None
+            with self.lock:
+                self.stats.finish_stream(index, stream)
+                # Ses akışı hâlâ bekliyor olabilir; öğe yüzdesi akış toplamından gelir
+                size = self.stats.item_size(index)
+                percent = self.stats.item_bytes(index) / size * 100 if size else 100
+                self.items[index] = max(self.items.get(index, 0), min(percent, 100))
+                data = self._playlist_fields({
+                    'status': 'processing',
+                    'title': title,
+                    'thumb_id': thumb,
+                    'percent': 100,
+                    'is_playlist': self.playlist_total > 1,
+                    'playlist_index': index,
+                    'playlist_total': self.playlist_total
+                })
+                if self.playlist_total <= 1:
+                    data['playlist_percent'] = 100
+            self.broadcaster.publish(self.socketio, self.sid, index, data)
 
 
 def select_format(formats, target_res):
     """
     Belirtilen çözünürlük mantığına göre format seçer.
     Öncelik: Tam Eşleşme -> En Yakın Üst -> En İyi Alt
+    Aynı yükseklikte birleştirme/dönüştürme gerektirmeyen format tercih edilir (bkz. formats.py).
     """
-    try:
-        target = int(target_res)
-    except ValueError:
-        target = 1080
+    plan = format_selector.plan(formats, target_res)
+    return plan['video'] if plan else None
 
-    # Sadece video içeren formatları al
-    videos = [f for f in formats if f.get('vcodec') != 'none' and f.get('height')]
-    # Yüksekliğe göre artan sıralama (240, 360, 480, 720, 1080...)
-    videos.sort(key=lambda x: x['height'])
 
-    if not videos:
-        return None
+FLAT_OPTS = {'quiet': True, 'extract_flat': True, 'ignoreerrors': True}
+
+# Yeni yüklemelerin başa eklendiği (en yeni önce) kanal listeleri
+_CHANNEL_RE = re.compile(r'youtube\.com/(@|channel/|c/|user/)')
+
+
+def ydl_extract(opts, url, **kwargs):
+    """Tek bir extract_info çağrısı; offload ile hub dışında çalıştırılmak üzere ayrıldı."""
+    with ydl_pool.lease(opts) as ydl:
+        info = ydl.extract_info(url, download=False, **kwargs)
+        if info and 'entries' in info and kwargs.get('process', True):
+            # Generator tekrar tüketilemez (ve tüketmek ağ işidir), listeye çevir
+            info['entries'] = list(info['entries'])
+    return info
+
+
+def ydl_process(opts, info):
+    """Hazır bilgiyle format seçimi + indirme + birleştirme (hub dışında çalışır)."""
+    with ydl_pool.lease(opts) as ydl:
+        return ydl.process_ie_result(info, download=True)
+
+
+def refresh_listing(url, stale):
+    """
+    Bayat bir playlist listesini artımlı olarak yeniler.
+    yt-dlp'nin tembel (lazy) entry generator'ı kullanılır, bilinen öğelerin
+    önbellekteki kayıtları aynen korunur. Kanal listelerinde bilinen ilk videoya
+    gelince durulur; böylece yalnızca yeni yüklemelerin sayfaları çekilir.
+    """
+    # Sayfalar generator tüketildikçe çekilir; örnek o sırada açık kalmalı
+    with ydl_pool.lease(FLAT_OPTS) as ydl:
+        head = ydl.extract_info(url, download=False, process=False)
+        if not head or 'entries' not in head:
+            return None
+
+        cached = {e.get('id'): e for e in stale['entries'] if e and e.get('id')}
+        stop_at_known = bool(_CHANNEL_RE.search(url))
+        entries = []
+        for entry in head['entries']:
+            if not entry:
+                continue
+            known = cached.get(entry.get('id'))
+            if known is not None and stop_at_known:
+                # Buradan sonrası önbellekte olduğu gibi duruyor
+                position = stale['entries'].index(known)
+                entries.extend(e for e in stale['entries'][position:] if e)
+                break
+            entries.append(known if known is not None else entry)
+
+    for i, entry in enumerate(entries):
+        entry['playlist_index'] = i + 1
+
+    info = {k: v for k, v in head.items() if k != 'entries'}
+    info['entries'] = entries
+    return info
+
+
+def extract_flat(url):
+    """
+    extract_flat ile playlist/video bilgisini çeker.
+    Sonuç süreç genelindeki önbellekte tutulur; önizleme (fetch_metadata) ile
+    hemen ardından gelen indirme (run_downloader) aynı çıkarımı kullanır.
+    Disk önbelleği açıksa sunucu yeniden başlasa da liste diskten gelir.
+    """
+    def load():
+        info = None
+        if disk_cache is not None:
+            info, fresh = disk_cache.get_listing(url, allow_stale=True)
+            if info is not None and fresh:
+                return info
+            if info is not None and 'entries' in info:
+                with metrics.timed('flat_refresh', trace={'url': url}):
+                    info = offload(refresh_listing, url, info)
+            else:
+                info = None
+
+        if info is None:
+            with metrics.timed('flat_extract', trace={'url': url}):
+                info = offload(ydl_extract, FLAT_OPTS, url)
 
-    # 1. Tam Eşleşme (Exact Match)
-    exact = [f for f in videos if f['height'] == target]
-    if exact:
-        # Genelde sonuncusu en yüksek bitrate/kalite olandır
-        return exact[-1]['format_id']
+        if info and disk_cache is not None:
+            disk_cache.put_listing(url, info)
+        return info
 
-    # 2. Higher Fallback (Target yoksa, daha yükseğini ve en yakınını bul)
-    # Listem sıralı olduğu için, target'tan büyük olan İLK eleman en yakın üsttür.
-    higher = [f for f in videos if f['height'] > target]
-    if higher:
-        return higher[0]['format_id']
+    return metadata_cache.get_or_load(url, load)
 
-    # 3. Lower Fallback (Hiçbiri yoksa, daha düşüğünü ve en iyisini bul)
-    # Listem sıralı olduğu için, target'tan küçük olan SON eleman en iyi alttır.
-    lower = [f for f in videos if f['height'] < target]
-    if lower:
-        return lower[-1]['format_id']
 
-    # Hiçbiri uymazsa
-    return 'bestvideo'
+def next_page(entries, size):
+    """Tembel entry generator'ından bir sayfa çeker (ağ işi; offload ile çalışır)."""
+    return list(itertools.islice(entries, size))
+
+
+def stream_metadata(url, on_page, page_size=PAGE_SIZE):
+    """
+    Büyük playlist'ler için sayfalı tarama. yt-dlp'nin tembel generator'ı sayfa sayfa
+    ilerletilir ve her sayfa bulunur bulunmaz on_page(payload) ile istemciye gider.
+    Tarama sürerken başlatılan indirme live_stream üzerinden aynı öğeleri bekler.
+    Liste önbellekteyse ya da aynı URL zaten taranıyorsa tek parça sonuç döner.
+    Dönen değer fetch_metadata ile aynı biçimdedir.
+    """
+    cached = metadata_cache.get(url)
+    if cached is None and disk_cache is not None:
+        cached = disk_cache.get_listing(url)[0]
+    stream = open_stream(url) if cached is None else None
+    if stream is None:
+        return fetch_metadata(url)
+
+    try:
+        with ydl_pool.lease(FLAT_OPTS) as ydl, \
+                metrics.timed('flat_extract', trace={'url': url, 'mode': 'stream'}):
+            head = offload(ydl.extract_info, url, download=False, process=False)
+            if not head or 'entries' not in head:
+                # Tek video: sayfalama yok, normal sonuç. process=False ile gelen
+                # 'url'/'url_transparent' yönlendirmesi işlenmemiş bir taslaktır (kimlik,
+                # başlık yok); önbelleğe yazılmaz, fetch_metadata normal çıkarımı yapar
+                stream.finish()
+                if head and head.get('_type', 'video') == 'video':
+                    metadata_cache.put(url, head)
+                return fetch_metadata(url)
+
+            stream.title = head.get('title')
+            iterator = iter(head['entries'])
+            while True:
+                page = offload(next_page, iterator, page_size)
+                if not page:
+                    break
+                offset = len(stream.entries)
+                stream.add(page)
+                on_page(page_payload(stream, page, offset))
+
+        # Tam liste önbelleğe yazılmadan tarama kapatılmaz; arada gelen
+        # indirme isteği listeyi yeniden çekmeye kalkmasın
+        info = {k: v for k, v in head.items() if k != 'entries'}
+        info['entries'] = stream.entries
+        metadata_cache.put(url, info)
+        if disk_cache is not None:
+            disk_cache.put_listing(url, info)
+        stream.finish()
+    except Exception as e:
+        stream.finish(e)
+        return {'error': str(e)}
+    finally:
+        close_stream(stream)
+
+    # Öğeler sayfalarla gitti; son mesaj yalnızca taramanın bittiğini bildirir
+    return dict(page_payload(stream, [], len(stream.entries)), done=True, total=stream.count())
+
+
+def get_video_info(video_url, video_id=None):
+    """
+    Format seçimi için ham video bilgisini (process=False) döner.
+    Disk önbelleğinde akış URL'leri hâlâ geçerli bir kayıt varsa ağa çıkılmaz.
+    """
+    if disk_cache is not None:
+        cached = disk_cache.get_video(video_id)
+        if cached is not None:
+            return cached
+
+    with metrics.timed('video_extract', trace={'url': video_url}):
+        vid_info = offload(ydl_extract, {'quiet': True}, video_url, process=False)
+
+    if disk_cache is not None and vid_info and vid_info.get('_type', 'video') == 'video':
+        disk_cache.put_video(vid_info.get('id'), vid_info)
+    return vid_info
 
 
 def fetch_metadata(url):
     """URL'den metadata çeker (Playlist ise liste, Tek ise tek öğe döner)."""
     try:
-        with yt_dlp.YoutubeDL({'quiet': True, 'extract_flat': True, 'ignoreerrors': True}) as ydl:
-            info = ydl.extract_info(url, download=False)
-            
-            if 'entries' in info:
-                # Playlist
-                return {
-                    'type': 'playlist',
-                    'title': info.get('title', 'Playlist'),
-                    'entries': [
-                        {
-                            'index': i+1,
-                            'title': entry.get('title', f"Video {i+1}"),
-                            'id': entry.get('id', ''),
-                            'url': entry.get('url') or entry.get('webpage_url')
-                        }
-                        for i, entry in enumerate(info['entries']) if entry
-                    ]
-                }
-            else:
-                # Tek Video
-                return {
-                    'type': 'video',
-                    'title': info.get('title', 'Video'),
-                    'entry': {
-                        'index': 1,
-                        'title': info.get('title', 'Video'),
-                        'id': info.get('id', ''),
-                        'url': info.get('webpage_url', url)
+        info = extract_flat(url)
+
+        if 'entries' in info:
+            # Playlist
+            return {
+                'type': 'playlist',
+                'title': info.get('title', 'Playlist'),
+                'entries': [
+                    {
+                        'index': i+1,
+                        'title': entry.get('title', f"Video {i+1}"),
+                        'id': entry.get('id', ''),
+                        'url': entry.get('url') or entry.get('webpage_url'),
+                        'thumb_id': thumbnail_cache.register(entry)
                     }
+                    for i, entry in enumerate(info['entries']) if entry
+                ]
+            }
+        else:
+            # Tek Video
+            return {
+                'type': 'video',
+                'title': info.get('title', 'Video'),
+                'entry': {
+                    'index': 1,
+                    'title': info.get('title', 'Video'),
+                    'id': info.get('id', ''),
+                    'url': info.get('webpage_url', url),
+                    'thumb_id': thumbnail_cache.register(info)
                 }
+            }
     except Exception as e:
         return {'error': str(e)}
 
 
-def run_downloader(socketio, url, folder, resolution, sid, selected_indices=None):
+def archive_format(resolution, mode=VIDEO, section=None):
+    """İndirme arşivinde (ve ortak indirmede) video kimliğiyle birlikte tutulan format anahtarı."""
+    key = "audio" if mode == AUDIO else f"{resolution}p/mp4"
+    return f"{key}@{section_label(section)}" if section else key
+
+
+def downloaded_path(result):
+    """process_ie_result sonucundan diske yazılan son dosyanın yolunu bulur."""
+    if not isinstance(result, dict):
+        return None
+    downloads = result.get('requested_downloads') or [result]
+    return downloads[-1].get('filepath') or downloads[-1].get('_filename')
+
+
+def download_entry(entry, current_proc_index, folder, resolution, playlist_count, handler, job_id=None,
+                   connections=1, controller=None, mode=VIDEO, section=None):
+    """
+    Tek bir playlist öğesini indirir. Başarılıysa True döner, hata diğer öğeleri etkilemez.
+    Geçici hatalarda (429, 403, kopan bağlantı) öğe, jitter'lı üstel beklemeden sonra
+    tekrar denenir; 403'te akış URL'leri süresi dolmuş olabileceği için sayfa yeniden çekilir.
+    Eşzamanlılık denetleyicisi verilmişse sonuçlar ona bildirilir ve bekleme süresince
+    öğenin yuvası başka öğelere bırakılır.
+    mode=AUDIO yalnız sesi, section=(başlangıç, bitiş) yalnızca o zaman aralığını indirir.
+    """
+    if not entry: # ignoreerrors ile erişilemeyen öğeler None gelebilir
+        return False
+
+    def set_state(state, **kwargs):
+        if journal is not None and job_id:
+            journal.set_entry_state(job_id, current_proc_index, state, **kwargs)
+
+    fresh = False
+    for attempt in range(MAX_RETRIES + 1):
+        if controller is not None:
+            connections = controller.connections()
+        ok, error = _download_once(entry, current_proc_index, folder, resolution, playlist_count, handler,
+                                   job_id, connections, controller, set_state, fresh, mode, section)
+        if ok or error is None:
+            return ok
+
+        kind = classify(error)
+        if controller is not None:
+            controller.on_error(kind)
+        if kind == PERMANENT or attempt == MAX_RETRIES:
+            break
+        delay = backoff(attempt, kind)
+        metrics.inc('ytd_retries_total', reason=kind)
+        print(f"Video Hatası ({current_proc_index}): {error} - {delay:.1f} sn sonra tekrar denenecek")
+        fresh = fresh or kind == FORBIDDEN
+        if controller is not None:
+            controller.release()
+        try:
+            handler.socketio.sleep(delay)
+        finally:
+            if controller is not None:
+                controller.acquire()
+
+    set_state(FAILED, error=str(error))
+    metrics.inc('ytd_items_total', result='failed')
+    print(f"Video Hatası ({current_proc_index}): {error}")
+    # Hata olsa bile playlist devam etsin
+    return False
+
+
+def _download_once(entry, current_proc_index, folder, resolution, playlist_count, handler, job_id,
+                   connections, controller, set_state, fresh, mode=VIDEO, section=None):
+    """download_entry'nin tek denemesi: (başarılı mı, tekrar denenebilir hata) döner."""
+    trace = {'job': job_id, 'index': current_proc_index, 'video': entry.get('id')}
+    out_template = output_template(entry, current_proc_index, folder, playlist_count, section)
+
+    # Bu klasöre aynı formatta daha önce indirildiyse ağa hiç çıkmadan atla;
+    # başka bir klasörde duruyorsa indirmek yerine buraya bağla/kopyala
+    # (günlük kapalıysa arşiv yalnızca bu süreç boyunca bellekte tutulur)
+    fmt_key = archive_format(resolution, mode, section)
+    archive = journal if journal is not None else memory_archive
+    path = archive.archived_path(entry.get('id'), fmt_key)
+    if path and os.path.dirname(os.path.abspath(path)) == os.path.abspath(folder):
+        set_state(DONE, filename=path)
+        metrics.inc('ytd_items_total', result='skipped')
+        return True, None
+    if path and entry.get('title'):
+        target = offload(place_file, path, output_path(entry, out_template, path))
+        set_state(DONE, filename=target)
+        metrics.inc('ytd_items_total', result='linked')
+        return True, None
+
+    # Video URL'sini al (entry bazen id, bazen url döner)
+    video_url = entry.get('url') or entry.get('webpage_url')
+    if not video_url: # Bazen id döner, url oluşturmak gerekebilir ama yt-dlp genelde url verir
+         if entry.get('id'):
+             video_url = f"https://www.youtube.com/watch?v={entry['id']}"
+         else:
+             metrics.inc('ytd_items_total', result='failed')
+             return False, None # URL yoksa geç
+
+    # Aynı video + format başka bir işte (veya oturumda) şu an iniyorsa ona katıl
+    flight, leader = flights.begin((entry['id'], fmt_key) if entry.get('id') else None)
+    if not leader:
+        return follow_flight(flight, current_proc_index, out_template, handler, set_state)
+    flight.attach(handler.make_hook(current_proc_index))
+    result = path = error = None
+
+    try:
+        set_state(DOWNLOADING)
+
+        # Format Seçimi için Video Bilgisi Çek (Tekil video analizi)
+        # Tek video akışında run_downloader'ın çektiği bilgi zaten formatları içerir;
+        # playlist öğelerinde ise sayfa bir kez, process=False ile (format seçimi
+        # ve indirme yapılmadan) çekilir ve aynı sözlük indirme adımına aktarılır.
+        # 403 sonrası tekrar denemede eldeki (veya önbellekteki) akış URL'leri kullanılmaz.
+        if entry.get('formats') and not fresh:
+            # Önbellekteki sözlük paylaşılıyor; process_ie_result onu değiştirir
+            vid_info = copy.deepcopy(entry)
+        elif fresh:
+            vid_info = get_video_info(entry.get('webpage_url') or video_url)
+        else:
+            vid_info = get_video_info(video_url, entry.get('id'))
+
+        formats = vid_info.get('formats', [])
+        with metrics.timed('select_format', trace=trace):
+            plan = format_selector.plan_audio(formats) if mode == AUDIO else format_selector.plan(formats, resolution)
+
+        if plan:
+            # Seçilen çift (veya tek dosya) kullanılamazsa eski "video + en iyi ses" davranışına düşer
+            format_spec = plan['format']
+            trace['postprocess'] = plan['postprocess']
+            metrics.inc('ytd_format_plans_total', postprocess=plan['postprocess'])
+        else:
+            format_spec = "bestvideo+bestaudio/best"
+
+        timer = TransferTimer(metrics)
+
+        def on_postprocess(d):
+            timer.postprocessor_hook(d)
+            if d['status'] == 'started' and d.get('postprocessor') == 'Merger':
+                set_state(MERGING)
+
+        opts = {
+            "outtmpl": out_template,
+            # Katılan diğer istekler de aynı ilerlemeyi alır
+            "progress_hooks": [flight.on_progress],
+            "postprocessor_hooks": [on_postprocess],
+            # Yarım kalan .part dosyaları (sunucu çökse bile) kaldığı bayttan devam eder
+            "continuedl": True,
+            # Dosya başına paralel bağlantı (bkz. ranged.py)
+            "concurrent_fragment_downloads": connections,
+            # Seçilen video formatı + uyumlu ses
+            "format": format_spec,
+            "merge_output_format": OUTPUT_FORMAT,
+            "quiet": True,
+            "nocheckcertificate": True,
+            # Hatalar yutulmaz: başarısız indirme başarılı sayılmasın, tekrar denenebilsin
+            "ignoreerrors": False
+        }
+        if section:
+            # Yalnızca aralığı kapsayan kısım çekilir (yt-dlp ffmpeg ile aralığa atlar)
+            opts["download_ranges"] = download_ranges(section)
+
+        # İndirmeyi Başlat: download([url]) sayfayı tekrar çekerdi, bunun yerine
+        # elimizdeki bilgi doğrudan işlenir (format seçimi + indirme + birleştirme).
+        # Hook'lar bu sırada OS thread'inden çağrılır; ilerleme yayıncı üzerinden hub'a aktarılır.
+        result = offload(ydl_process, opts, vid_info)
+
+        path = downloaded_path(result)
+        size = os.path.getsize(path) if path and os.path.exists(path) else 0
+        transfer = timer.finish(size, trace)
+        metrics.inc('ytd_items_total', result='ok')
+        set_state(DONE, filename=path)
+        archive.add_to_archive(entry.get('id') or vid_info.get('id'), fmt_key, path)
+        if controller is not None:
+            # Hız sınırı bizim seçimimizse yavaşlık kısılma sayılmaz
+            controller.on_success(size, transfer, rate_limited=handler.limiter.limited(handler.sid))
+        if size and (mode == AUDIO or section):
+            # Aynı öğenin seçilen çözünürlükte tam indirmesine göre kazanılan bayt
+            full = full_size(formats, format_selector.plan(formats, resolution), vid_info.get('duration'))
+            saved = max(0, int(full - size))
+            metrics.inc('ytd_bytes_saved_total', saved, mode='section' if section else mode)
+            handler.add_saved(saved)
+        return True, None
+
+    except Exception as e:
+        metrics.error(e)
+        error = e
+        return False, e
+
+    finally:
+        flights.finish(flight, error is None and result is not None, result, path, error)
+
+
+def output_template(entry, current_proc_index, folder, playlist_count, section=None):
+    """Öğenin yt-dlp çıktı şablonu (aralık indirmelerinde aralık etiketiyle)."""
+    suffix = f" [{section_label(section)}]" if section else ""
+    if playlist_count > 1:
+        # Playlist ise numaralandır (İşleme sırasına göre veriyoruz şimdilik)
+        # Alternatif: entry['playlist_index'] varsa onu kullan.
+        pl_idx = entry.get('playlist_index') or current_proc_index
+        return os.path.join(folder, f"{pl_idx:02d} - %(title)s{suffix}.%(ext)s")
+    return os.path.join(folder, f"%(title)s{suffix}.%(ext)s")
+
+
+def output_path(info, out_template, source):
+    """Şablonun bu video için üreteceği dosya yolu (uzantı mevcut dosyadan)."""
+    ext = os.path.splitext(source)[1].lstrip('.')
+    with ydl_pool.lease({'quiet': True}) as ydl:
+        return ydl.prepare_filename(dict(info, ext=ext), outtmpl=out_template)
+
+
+def place_file(source, target):
+    """Var olan dosyayı hedefe bağlar/kopyalar (OS thread'inde çalışır); hedef yolu döner."""
+    method = materialize(source, target)
+    metrics.inc('ytd_materialized_total', method=method)
+    return target
+
+
+def follow_flight(flight, current_proc_index, out_template, handler, set_state):
+    """
+    Aynı indirmeyi yürüten liderin bitmesini bekler, ilerlemesini kendi işine yansıtır;
+    sonra dosyayı bu işin hedef yoluna bağlar. Lider başarısızsa hatası döner
+    (download_entry'nin tekrar denemesinde bu istek lider olabilir).
+    """
+    set_state(DOWNLOADING)
+    metrics.inc('ytd_singleflight_total', role='follower')
+    # Baytlar liderin işine sayılır; bu işin hız sınırı ortak indirmeyi yavaşlatmasın
+    hook = handler.make_hook(current_proc_index, throttle=False)
+    flight.attach(hook)
+    try:
+        flight.wait()
+    finally:
+        flight.detach(hook)
+
+    if not flight.ok:
+        return False, flight.error or RuntimeError('Ortak indirme başarısız')
+    if not (flight.path and os.path.exists(flight.path)):
+        return False, RuntimeError('Ortak indirme dosya üretmedi')
+    target = offload(place_file, flight.path, output_path(flight.info, out_template, flight.path))
+    metrics.inc('ytd_items_total', result='shared')
+    set_state(DONE, filename=target)
+    return True, None
+
+
+def streamed_entries(stream, selected_indices, handler, job_id=None):
+    """
+    Taranmakta olan playlist'in seçili öğelerini bulundukça verir.
+    Seçim yoksa (hepsi) playlist toplamı tarama ilerledikçe güncellenir;
+    öğeler günlüğe de geldikçe eklenir.
+    """
+    count = 0
+    try:
+        for i, entry in stream.iter_entries():
+            if not entry or (selected_indices and i not in selected_indices):
+                continue
+            if journal is not None and job_id:
+                journal.register_entries(job_id, stream.title, [entry], start=count)
+            count += 1
+            if not selected_indices:
+                handler.set_total(stream.count())
+            yield entry
+        if journal is not None and job_id:
+            journal.set_scan_complete(job_id, True)
+    except Exception as e:
+        # Tarama yarıda kaldı; hata önizlemeye zaten bildirildi, bulunanlar indirilir
+        metrics.error(e)
+        print(f"Playlist tarama hatası: {e}")
+    handler.set_total(count)
+
+
+def resume_scan(url, entries, selected_indices, job_id):
+    """
+    Önceki çalıştırmada yarıda kalan sayfalı taramayı tamamlar: liste yeniden çekilir,
+    günlükteki öğelerden sonrası (aynı seçim ve sırayla) kuyruğa ve günlüğe eklenir.
+    Liste çekilemezse kayıtlı öğelerle devam edilir.
+    """
+    try:
+        info = extract_flat(url)
+    except Exception as e:
+        metrics.error(e)
+        print(f"Playlist tarama hatası: {e}")
+        return entries
+    # streamed_entries ile aynı süzme: erişilemeyen ve seçilmeyen öğeler sayılmaz
+    found = [e for i, e in enumerate(info.get('entries') or [], 1)
+             if e and (not selected_indices or i in selected_indices)]
+    rest = found[len(entries):]
+    if rest:
+        journal.register_entries(job_id, info.get('title'), rest, start=len(entries))
+    journal.set_scan_complete(job_id, True)
+    return entries + rest
+
+
+def run_downloader(socketio, url, folder, resolution, sid, selected_indices=None, workers=None, job_id=None,
+                   rate_limit=None, connections=None, mode=None, section=None):
     playlist_count = 0
     entries = []
+    entry_states = {}
 
     # 1. Metadata ve Playlist Analizi
     try:
-        # extract_flat ile playlist içeriğini hızlıca çekiyoruz
-        with yt_dlp.YoutubeDL({'quiet': True, 'extract_flat': True, 'ignoreerrors': True}) as ydl:
-            info = ydl.extract_info(url, download=False)
-            
+        # Yarım kalmış bir iş devam ettiriliyorsa kuyruk günlükten gelir (ağa çıkılmaz)
+        resumed = journal.load_entries(job_id) if journal is not None and job_id else None
+        live = None if resumed else live_stream(url)
+
+        if resumed:
+            title, entries, entry_states = resumed
+            info = {'title': title or 'İndirme Devam Ediyor...'}
+            if not journal.scan_complete(job_id):
+                # Önceki çalıştırma playlist taranırken kesildi; günlükteki kuyruk eksik
+                entries = resume_scan(url, entries, selected_indices, job_id)
+            playlist_count = len(entries)
+        elif live is not None:
+            # Önizleme playlist'i hâlâ sayfa sayfa tarıyor; öğeler bulundukça indirilir
+            info = {'title': live.title or 'Playlist'}
+            playlist_count = len(selected_indices) if selected_indices else live.count()
+            if journal is not None and job_id:
+                # Tarama bitene kadar günlükteki kuyruk eksiktir (bkz. resume_scan)
+                journal.set_scan_complete(job_id, False)
+        else:
+            # extract_flat ile playlist içeriğini hızlıca çekiyoruz
+            # (önizlemede çekildiyse önbellekten gelir)
+            info = extract_flat(url)
             if 'entries' in info:
-                raw_entries = list(info['entries'])
-                
+                raw_entries = info['entries']
+            
                 # FİLTRELEME MANTIĞI:
                 # Eğer selected_indices varsa, sadece o indexteki videoları al.
                 # Indexler 1-based geliyor, o yüzden i+1 kontrolü yapıyoruz.
@@ -178,30 +719,53 @@ def run_downloader(socketio, url, folder, resolution, sid, selected_indices=None
                     entries = [e for i, e in enumerate(raw_entries) if (i+1) in selected_indices]
                 else:
                     entries = raw_entries
-                
+            
                 playlist_count = len(entries)
             else:
                 # Tek video
                 entries = [info]
                 playlist_count = 1
 
-            socketio.emit('metadata', {
-                'title': info.get('title', 'İndirme Başlatılıyor...'),
-                'thumbnail': info.get('thumbnail', ''),
-                'is_playlist': playlist_count > 1,
-                'playlist_total': playlist_count
-            }, to=sid)
-            socketio.sleep(0)
+            if journal is not None and job_id:
+                journal.register_entries(job_id, info.get('title'), entries)
+
+        socketio.emit('metadata', {
+            'title': info.get('title', 'İndirme Başlatılıyor...'),
+            'thumb_id': thumbnail_cache.register(info),
+            'is_playlist': playlist_count > 1,
+            'playlist_total': playlist_count
+        }, to=sid)
+        socketio.sleep(0)
 
     except Exception as e:
         socketio.emit('error', {'msg': f"Bağlantı Hatası: {str(e)}"}, to=sid)
         return
 
     # 2. İndirme Döngüsü
-    handler = DownloadHandler(socketio, sid, playlist_count)
+    results, playlist_count, saved = download_entries(
+        socketio, sid, entries, entry_states, playlist_count, folder, resolution, workers, job_id,
+        rate_limit, connections, live, selected_indices, mode, section)
+    finish_message(socketio, sid, sum(1 for ok in results if ok), playlist_count, saved)
+
+
+def download_entries(socketio, sid, entries, entry_states, playlist_count, folder, resolution, workers=None,
+                     job_id=None, rate_limit=None, connections=None, live=None, selected_indices=None,
+                     mode=None, section=None):
+    """
+    Öğe kuyruğunu tek bir iş olarak indirir (ortak ilerleme, hız sınırı ve eşzamanlılık).
+    Öğe başına sonuç listesini (sıra ile True/False), son toplamı ve tam indirmeye
+    göre kazanılan baytı döner.
+    """
+    # Geçersiz aralık run_job'a kadar gelmez (start_download'da doğrulanır); yine de tüm video indirilir
+    mode = parse_mode(mode)
+    try:
+        section = parse_section(section)
+    except ValueError:
+        section = None
+    handler = DownloadHandler(socketio, sid, playlist_count, rate_limit=parse_rate(rate_limit))
+    if live is not None:
+        entries = streamed_entries(live, selected_indices, handler, job_id)
 
-    success_count = 0
-    
     # enumerate'i artık filtrelenmiş liste üzerinde yapıyoruz.
     # Ancak orijinal index korunmalı mı?
     # Kullanıcı "3. videoyu indir" dediyse, kaydedilen dosya adı "03 - Video..." mu olmalı yoksa "01 - Video..." mu?
@@ -215,63 +779,53 @@ def run_downloader(socketio, url, folder, resolution, sid, selected_indices=None
     # Dosya adını manuel veriyoruz. Orijinal sırayı korumak istersek extract sırasında index bilgisini saklamalıydık.
     # Şimdilik kullanıcıya gösterilen (1/5) formatı "Processing 1 of 5 selected" şeklinde olacak.
     
-    for i, entry in enumerate(entries):
+    auto = workers is not None and int(workers) == AUTO_WORKERS
+    workers = MAX_WORKERS if auto else max(1, min(int(workers or DEFAULT_WORKERS), MAX_WORKERS))
+    connections = max(1, min(int(connections or DEFAULT_CONNECTIONS), MAX_CONNECTIONS))
+    controller = ConcurrencyController(workers, connections,
+                                       initial_items=AUTO_INITIAL_WORKERS if auto else None)
+
+    def task(i, entry):
         # İşlenen video sayısı (1-based)
         current_proc_index = i + 1
-        handler.set_index(current_proc_index)
+        if entry_states.get(current_proc_index) == DONE:
+            ok = True  # Önceki çalıştırmada bitti
+        else:
+            # Sayfalı taramada toplam, öğeler bulundukça büyür.
+            # Aynı anda çalışan öğe sayısını denetleyicinin penceresi belirler.
+            controller.acquire()
+            try:
+                ok = download_entry(entry, current_proc_index, folder, resolution, handler.playlist_total, handler,
+                                    job_id, connections, controller, mode, section)
+            finally:
+                controller.release()
+        if ok:
+            handler.complete(current_proc_index)
+        return ok
+
+    if workers == 1:
+        results = []
+        for i, entry in enumerate(entries):
+            handler.set_index(i + 1)
+            results.append(task(i, entry))
+    else:
+        # Her öğe kendi hook'u ile takip edildiği için hata izolasyonu ve
+        # dosya isimlendirmesi sıralı moddakiyle aynı kalır.
+        # Sayfalı taramada öğeler liste bitmeden işçilere dağıtılır.
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(task, itertools.count(), entries))
 
-        # Video URL'sini al (entry bazen id, bazen url döner)
-        video_url = entry.get('url') or entry.get('webpage_url')
-        if not video_url: # Bazen id döner, url oluşturmak gerekebilir ama yt-dlp genelde url verir
-             if entry.get('id'):
-                 video_url = f"https://www.youtube.com/watch?v={entry['id']}"
-             else:
-                 continue # URL yoksa geç
+    # Son ilerleme güncellemeleri bitiş mesajından önce gitsin
+    handler.close()
+    return results, handler.playlist_total, handler.saved_bytes
 
-        try:
-            # Format Seçimi için Video Bilgisi Çek
-            # (Tekil video analizi)
-            with yt_dlp.YoutubeDL({'quiet': True}) as ydl_temp:
-                 vid_info = ydl_temp.extract_info(video_url, download=False)
-            
-            target_fid = select_format(vid_info.get('formats', []), resolution)
-            
-            if not target_fid:
-                target_fid = "bestvideo"
-
-            # İndirme Ayarları
-            if playlist_count > 1:
-                # Playlist ise numaralandır (İşleme sırasına göre veriyoruz şimdilik)
-                # Alternatif: entry['playlist_index'] varsa onu kullan.
-                pl_idx = entry.get('playlist_index') or current_proc_index
-                out_template = os.path.join(folder, f"{pl_idx:02d} - %(title)s.%(ext)s")
-            else:
-                out_template = os.path.join(folder, "%(title)s.%(ext)s")
-
-            opts = {
-                "outtmpl": out_template,
-                "progress_hooks": [handler.hook],
-                # Seçilen video formatı + en iyi ses
-                "format": f"{target_fid}+bestaudio/best",
-                "merge_output_format": "mp4",
-                "quiet": True,
-                "nocheckcertificate": True,
-                "ignoreerrors": True
-            }
 
-            # İndirmeyi Başlat
-            with yt_dlp.YoutubeDL(opts) as ydl_final:
-                ydl_final.download([video_url])
-            
-            success_count += 1
-
-        except Exception as e:
-            print(f"Video Hatası ({current_proc_index}): {e}")
-            # Hata olsa bile playlist devam etsin
-            continue
-    
-    # Bitiş Mesajı
+def finish_message(socketio, sid, success_count, playlist_count, saved=0):
+    """İşin bitiş mesajı: en az bir öğe indiyse done, yoksa error."""
     if success_count > 0:
-        socketio.emit('done', {'msg': f"İşlem tamamlandı. {success_count}/{playlist_count} video indirildi."}, to=sid)
+        msg = f"İşlem tamamlandı. {success_count}/{playlist_count} video indirildi."
+        if saved:
+            msg += f" Tam indirmeye göre {saved / 1024 / 1024:.1f} MB tasarruf edildi."
+        socketio.emit('done', {'msg': msg, 'bytes_saved': saved}, to=sid)
     else:
-        socketio.emit('error', {'msg': "Hiçbir video indirilemedi."}, to=sid)
\ No newline at end of file
+        socketio.emit('error', {'msg': "Hiçbir video indirilemedi."}, to=sid)
@@ -0,0 +1,67 @@
+import os
+import time
+import threading
+
+try:
+    from eventlet import tpool
+    from eventlet.patcher import original, is_monkey_patched
+except ImportError:
+    tpool = None
+
+
+# 'thread': yt-dlp çağrıları gerçek OS thread havuzunda (eventlet.tpool) çalışır
+# 'green': eski davranış, her şey eventlet hub'ı üzerinde green thread olarak çalışır
+EXEC_MODE = os.environ.get('YTD_EXEC_MODE', 'thread')
+
+
+def offloading():
+    """Bloklayan işler hub dışına taşınıyor mu? (eventlet yamalı ve thread modu açık)"""
+    return EXEC_MODE == 'thread' and tpool is not None and is_monkey_patched('thread')
+
+
+def off_hub():
+    """Bloklayan bekleme/join güvenli mi? (iş tpool thread'inde ya da eventlet yamasız ortamda)"""
+    return offloading() or tpool is None or not is_monkey_patched('thread')
+
+
+def offload(func, *args, **kwargs):
+    """
+    CPU yoğun yt-dlp işini (sayfa ayrıştırma, imza/nsig JS yorumlama, JSON çözme)
+    gerçek bir OS thread'inde çalıştırır ve sonucu hub'a döndürür. Bu sırada
+    hub diğer green thread'leri (Socket.IO heartbeat, ilerleme yayını) çalıştırmaya devam eder.
+    """
+    if offloading():
+        return tpool.execute(func, *args, **kwargs)
+    return func(*args, **kwargs)
+
+
+def pause(seconds):
+    """
+    Çağıran thread'i bekletir. tpool thread'lerinde gerçek time.sleep kullanılır;
+    hub üzerinde (green mod) ise yamalı sleep diğer green thread'lere yol verir.
+    """
+    if offloading():
+        original('time').sleep(seconds)
+    else:
+        time.sleep(seconds)
+
+
+def real_thread(target, *args):
+    """
+    Monkey patch'ten etkilenmeyen bir OS thread'i başlatır (tpool thread'i içinden
+    paralel bağlantı açmak için); eventlet yoksa normal thread'dir.
+    """
+    thread_cls = original('threading').Thread if tpool is not None else threading.Thread
+    thread = thread_cls(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def real_lock():
+    """
+    Monkey patch'ten etkilenmeyen kilit. Hem hub'dan hem de tpool thread'lerinden
+    erişilen paylaşılan durum için kullanılır; kilit altında asla yield edilmemelidir.
+    """
+    if tpool is not None:
+        return original('threading').Lock()
+    return threading.Lock()
@@ -0,0 +1,169 @@
+import math
+
+
+OUTPUT_FORMAT = 'mp4'  # merge_output_format ile aynı olmalı
+
+# Yeniden kodlama gerektirmeden çıktı kabına doğrudan kopyalanabilen codec aileleri.
+# Bu listeye uyan akışlar mp4'e sorunsuz birleşir; uymayanlar (webm'deki VP9/Opus gibi)
+# kap değişimi (remux) gerektirir ve bazı oynatıcılarda sorun çıkarır.
+NATIVE_CODECS = {
+    'mp4': {'video': {'avc1', 'h264', 'hev1', 'hvc1', 'av01'}, 'audio': {'mp4a', 'aac', 'mp3', 'ac-3', 'ec-3'}},
+    'webm': {'video': {'vp8', 'vp9', 'vp09', 'av01'}, 'audio': {'opus', 'vorbis'}},
+}
+# Codec bilgisi olmayan formatlarda uzantıdan tahmin
+NATIVE_EXTS = {'mp4': {'mp4', 'm4a', 'm4v'}, 'webm': {'webm'}}
+
+# Post-processing türleri (ucuzdan pahalıya)
+NO_POSTPROCESS = 'none'  # tek dosya (progressive), olduğu gibi yazılır
+MERGE = 'merge'          # ayrı video + ses, aynı kaba kopyalanarak birleşir
+REMUX = 'remux'          # en az bir akış çıktı kabına yabancı
+
+
+def codec_family(codec):
+    """'avc1.64001F' -> 'avc1'; bilinmeyen/eksik codec için None."""
+    if not codec or codec == 'none':
+        return None
+    return codec.split('.')[0].lower()
+
+
+def has_video(f):
+    return f.get('vcodec') != 'none' and bool(f.get('height'))
+
+
+def has_audio(f):
+    acodec = f.get('acodec')
+    return acodec not in (None, 'none') or (acodec is None and f.get('abr') is not None)
+
+
+def is_native(f, kind, output=OUTPUT_FORMAT):
+    """Akış, çıktı kabına yeniden kodlama/kap dönüşümü olmadan girer mi?"""
+    family = codec_family(f.get('vcodec' if kind == 'video' else 'acodec'))
+    if family is not None and output in NATIVE_CODECS:
+        return family in NATIVE_CODECS[output][kind]
+    return f.get('ext') in NATIVE_EXTS.get(output, ())
+
+
+# --- Puanlama kriterleri ---
+# Her kriter (format, çıktı kabı) alır ve 0..1 arası puan döner.
+# Aynı çözünürlük kademesindeki adaylar ağırlıklı toplamla sıralanır.
+
+def score_compat(f, output):
+    return 1.0 if is_native(f, 'video', output) else 0.0
+
+
+def score_progressive(f, output):
+    # Ses içeren video formatı birleştirme gerektirmez
+    return 1.0 if has_audio(f) and is_native(f, 'audio', output) and is_native(f, 'video', output) else 0.0
+
+
+def score_fps(f, output):
+    return min(f.get('fps') or 30, 60) / 60
+
+
+def score_bitrate(f, output):
+    # Logaritmik: 500 kbps -> ~0.6, 8 Mbps -> ~0.9; büyük farklar küçülür
+    tbr = f.get('tbr') or f.get('vbr') or 0
+    return min(math.log2(1 + tbr) / 14, 1.0)
+
+
+def score_size(f, output):
+    # Aynı kalitede küçük dosya tercih edilir (bilinmiyorsa nötr)
+    size = f.get('filesize') or f.get('filesize_approx')
+    if not size:
+        return 0.5
+    return 1 - min(math.log2(1 + size / 2 ** 20) / 14, 1.0)
+
+
+DEFAULT_CRITERIA = (
+    (score_compat, 100),
+    (score_progressive, 60),
+    (score_fps, 10),
+    (score_bitrate, 5),
+    (score_size, 1),
+)
+
+
+def score_audio(f, output):
+    return (100 if is_native(f, 'audio', output) else 0) + min((f.get('abr') or f.get('tbr') or 0) / 320, 1) * 10
+
+
+class FormatSelector:
+    """
+    Tek geçişte format seçimi. Çözünürlük önceliği eskisiyle aynıdır
+    (Tam Eşleşme -> En Yakın Üst -> En İyi Alt); aynı yükseklikteki adaylar
+    kriterlerin ağırlıklı toplamıyla sıralanır. Kriterler değiştirilebilir.
+    """
+
+    def __init__(self, criteria=DEFAULT_CRITERIA, output=OUTPUT_FORMAT):
+        self.criteria = criteria
+        self.output = output
+
+    def score(self, f):
+        return sum(weight * criterion(f, self.output) for criterion, weight in self.criteria)
+
+    def plan(self, formats, target_res):
+        """
+        {'video', 'audio', 'format', 'postprocess'} döner; video formatı yoksa None.
+        'format' yt-dlp format ifadesidir, seçilen çift kullanılamazsa eski davranışa düşer.
+        """
+        try:
+            target = int(target_res)
+        except ValueError:
+            target = 1080
+
+        best_key, video = None, None
+        best_audio, audio = None, None
+        for f in formats:
+            if has_video(f):
+                height = f['height']
+                if height == target:
+                    tier = (2, 0)
+                elif height > target:
+                    tier = (1, -height)  # hedefe en yakın üst
+                else:
+                    tier = (0, height)   # en iyi alt
+                key = tier + (self.score(f),)
+                # Eşitlikte sonraki kazanır (listede genelde daha yüksek bitrate sonda)
+                if best_key is None or key >= best_key:
+                    best_key, video = key, f
+            elif has_audio(f):
+                key = score_audio(f, self.output)
+                if best_audio is None or key >= best_audio:
+                    best_audio, audio = key, f
+
+        if video is None:
+            return None
+
+        fid = video['format_id']
+        if has_audio(video):
+            native = is_native(video, 'video', self.output) and is_native(video, 'audio', self.output)
+            return {'video': fid, 'audio': None, 'format': f"{fid}/best",
+                    'postprocess': NO_POSTPROCESS if native else REMUX}
+
+        if audio is None:
+            return {'video': fid, 'audio': None, 'format': f"{fid}+bestaudio/best", 'postprocess': MERGE}
+
+        native = is_native(video, 'video', self.output) and is_native(audio, 'audio', self.output)
+        return {'video': fid, 'audio': audio['format_id'],
+                'format': f"{fid}+{audio['format_id']}/{fid}+bestaudio/best",
+                'postprocess': MERGE if native else REMUX}
+
+    def plan_audio(self, formats):
+        """
+        Yalnız ses planı: en uygun ses akışı (çıktı kabına uygun olan öncelikli),
+        olduğu gibi yazılır. Video akışı seçilmez; 'best' yedeği yoktur.
+        """
+        best_key, audio = None, None
+        for f in formats:
+            if has_audio(f) and not has_video(f):
+                key = score_audio(f, self.output)
+                if best_key is None or key >= best_key:
+                    best_key, audio = key, f
+        if audio is None:
+            return {'video': None, 'audio': None, 'format': 'bestaudio', 'postprocess': NO_POSTPROCESS}
+        return {'video': None, 'audio': audio['format_id'], 'format': f"{audio['format_id']}/bestaudio",
+                'postprocess': NO_POSTPROCESS}
+
+
+# Varsayılan seçici
+selector = FormatSelector()
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import sqlite3
+from collections import OrderedDict
+
+from executor import real_lock
+
+
+# İş günlüğü dosyası; boş bırakılırsa günlük ve indirme arşivi kapalıdır
+JOURNAL_PATH = os.environ.get('YTD_JOURNAL_DB', '')
+
+# Öğe durumları
+PENDING = 'pending'
+DOWNLOADING = 'downloading'
+MERGING = 'merging'
+DONE = 'done'
+FAILED = 'failed'
+
+UNFINISHED_JOB_STATES = ('queued', 'running')
+
+MEMORY_ARCHIVE_SIZE = 10000  # günlük kapalıyken bellekte hatırlanan indirme sayısı
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    params TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    title TEXT,
+    status TEXT NOT NULL,
+    scan_complete INTEGER NOT NULL DEFAULT 1,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_entries (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    video_id TEXT,
+    entry TEXT NOT NULL,
+    state TEXT NOT NULL,
+    filename TEXT,
+    error TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE TABLE IF NOT EXISTS archive (
+    video_id TEXT NOT NULL,
+    format TEXT NOT NULL,
+    path TEXT NOT NULL,
+    completed REAL NOT NULL,
+    PRIMARY KEY (video_id, format)
+);
+"""
+
+
+def journal_entry(entry):
+    """Devam ettirmek için gereken en küçük öğe bilgisi (ağa çıkmadan indirme kuyruğunu kurar)."""
+    # Tam çıkarılmış tek videolarda 'url' akış adresidir; sayfa adresi tercih edilir
+    small = {'url': entry.get('webpage_url') or entry.get('url')}
+    small.update({k: entry.get(k) for k in ('id', 'title', 'playlist_index', 'batch_source')})
+    return {k: v for k, v in small.items() if v}
+
+
+class Journal:
+    """
+    Çökmeye dayanıklı iş günlüğü ve indirme arşivi (SQLite).
+    Her işin öğe bazlı durumunu (pending/downloading/merging/done/failed) ve
+    tamamlanan video kimliği + format çiftlerini saklar.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = real_lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(_SCHEMA)
+            # Eski sürümün günlüğü: sonradan eklenen sütun
+            columns = {r[1] for r in self.conn.execute("PRAGMA table_info(jobs)")}
+            if 'scan_complete' not in columns:
+                self.conn.execute("ALTER TABLE jobs ADD COLUMN scan_complete INTEGER NOT NULL DEFAULT 1")
+
+    # --- İşler ---
+
+    def create_job(self, job):
+        """İşi kaydeder; devam ettirilen (zaten kayıtlı) işlerde mevcut satır korunur."""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, owner, params, priority, status, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.owner, json.dumps(job.params), job.priority, job.status, now, now))
+
+    def set_job_status(self, job_id, status):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET status = ?, updated = ? WHERE id = ?", (status, time.time(), job_id))
+
+    def set_scan_complete(self, job_id, complete):
+        """Sayfalı taramanın bitip bitmediğini işaretler (yarım taramada kuyruk eksiktir)."""
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET scan_complete = ?, updated = ? WHERE id = ?",
+                              (int(bool(complete)), time.time(), job_id))
+
+    def scan_complete(self, job_id):
+        with self.lock:
+            row = self.conn.execute("SELECT scan_complete FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is None or bool(row[0])
+
+    def unfinished_jobs(self):
+        """Sunucu kapanırken bitmemiş işler (oluşturulma sırasıyla)."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, owner, params, priority FROM jobs WHERE status IN (?, ?) ORDER BY created",
+                UNFINISHED_JOB_STATES).fetchall()
+        return [{'id': r[0], 'owner': r[1], 'params': json.loads(r[2]), 'priority': r[3]} for r in rows]
+
+    # --- İş öğeleri ---
+
+    def register_entries(self, job_id, title, entries, start=0):
+        """
+        İşin indirme kuyruğunu kaydeder; öğeler zaten kayıtlıysa durumlarına dokunmaz.
+        Sayfalı taramada öğeler geldikçe start (önceki öğe sayısı) ile parça parça eklenir.
+        """
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET title = ?, updated = ? WHERE id = ?", (title, now, job_id))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO job_entries (job_id, idx, video_id, entry, state, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(job_id, start + i + 1, (e or {}).get('id'), json.dumps(journal_entry(e or {})), PENDING, now)
+                 for i, e in enumerate(entries)])
+
+    def load_entries(self, job_id):
+        """Kayıtlı kuyruğu (başlık, öğeler, {idx: durum}) olarak döner; kayıt yoksa None."""
+        with self.lock:
+            job = self.conn.execute("SELECT title FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            rows = self.conn.execute(
+                "SELECT idx, entry, state FROM job_entries WHERE job_id = ? ORDER BY idx", (job_id,)).fetchall()
+        if not rows:
+            return None
+        return (job[0] if job else None,
+                [json.loads(r[1]) for r in rows],
+                {r[0]: r[2] for r in rows})
+
+    def set_entry_state(self, job_id, idx, state, filename=None, error=None):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE job_entries SET state = ?, filename = COALESCE(?, filename), error = ?, updated = ? "
+                "WHERE job_id = ? AND idx = ?",
+                (state, filename, error, time.time(), job_id, idx))
+
+    # --- İndirme arşivi ---
+
+    def archived_path(self, video_id, fmt):
+        """Daha önce indirilmiş ve dosyası hâlâ duran videonun yolunu döner, yoksa None."""
+        if not video_id:
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT path FROM archive WHERE video_id = ? AND format = ?", (video_id, fmt)).fetchone()
+        if row and os.path.exists(row[0]):
+            return row[0]
+        return None
+
+    def add_to_archive(self, video_id, fmt, path):
+        if not video_id or not path:
+            return
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO archive (video_id, format, path, completed) VALUES (?, ?, ?, ?)",
+                (video_id, fmt, path, time.time()))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class MemoryArchive:
+    """
+    Günlük kapalıyken kullanılan süreç içi indirme arşivi (Journal ile aynı arayüz).
+    Yeniden başlatmada unutulur; en eski kayıtlar sınır aşılınca düşer.
+    """
+
+    def __init__(self, max_size=MEMORY_ARCHIVE_SIZE):
+        self.max_size = max_size
+        self.lock = real_lock()
+        self.paths = OrderedDict()  # (video kimliği, format) -> dosya yolu
+
+    def archived_path(self, video_id, fmt):
+        if not video_id:
+            return None
+        with self.lock:
+            path = self.paths.get((video_id, fmt))
+        if path and os.path.exists(path):
+            return path
+        return None
+
+    def add_to_archive(self, video_id, fmt, path):
+        if not video_id or not path:
+            return
+        with self.lock:
+            self.paths[(video_id, fmt)] = path
+            self.paths.move_to_end((video_id, fmt))
+            if len(self.paths) > self.max_size:
+                self.paths.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.paths.clear()
+
+
+# Süreç genelinde paylaşılan iş günlüğü (kapalıysa None)
+journal = Journal(JOURNAL_PATH) if JOURNAL_PATH else None
+# Günlük kapalıyken indirme arşivi bellekte tutulur
+memory_archive = MemoryArchive()
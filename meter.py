@@ -0,0 +1,157 @@
+import math
+import time
+
+
+TIME_CONSTANT = 3.0  # EWMA zaman sabiti (saniye); küçüldükçe hız değişimlerine daha hızlı tepki verir
+
+
+class ThroughputMeter:
+    """
+    Kayan (üstel ağırlıklı) ortalama ile anlık indirme hızı ölçer.
+    Ömür boyu ortalamanın aksine yavaşlama/hızlanmaları birkaç saniyede yansıtır.
+    yt-dlp'nin kendi 'speed' değeri varsa örnek olarak o kullanılır.
+    """
+
+    def __init__(self, time_constant=TIME_CONSTANT, clock=time.monotonic):
+        self.time_constant = time_constant
+        self.clock = clock
+        self.rate = 0.0
+        self.last_time = None
+        self.last_bytes = 0
+        self.samples = 0
+
+    def update(self, total_bytes, reported_speed=None):
+        """Toplam indirilen bayt ile ölçeri günceller ve güncel hızı (bayt/sn) döner."""
+        now = self.clock()
+        if self.last_time is None:
+            self.last_time, self.last_bytes = now, total_bytes
+            if reported_speed:
+                self._add(reported_speed, self.time_constant)
+            return self.rate
+
+        dt = now - self.last_time
+        delta = total_bytes - self.last_bytes
+        if dt <= 0:
+            return self.rate
+        self.last_time, self.last_bytes = now, total_bytes
+
+        sample = reported_speed if reported_speed else max(delta, 0) / dt
+        self._add(sample, dt)
+        return self.rate
+
+    def _add(self, sample, dt):
+        if self.samples == 0:
+            self.rate = float(sample)
+        else:
+            alpha = 1 - math.exp(-dt / self.time_constant)
+            self.rate += alpha * (sample - self.rate)
+        self.samples += 1
+
+    def eta(self, remaining_bytes):
+        """Kalan bayt için tahmini süre (saniye); hız bilinmiyorsa None."""
+        if self.rate <= 0 or remaining_bytes is None:
+            return None
+        return max(remaining_bytes, 0) / self.rate
+
+
+def expected_size(info):
+    """Birleştirilecek tüm akışların (video + ses) bilinen veya tahmini toplam boyutu."""
+    formats = info.get('requested_formats') or [info]
+    sizes = [f.get('filesize') or f.get('filesize_approx') for f in formats]
+    if not all(sizes):
+        return 0
+    return sum(sizes)
+
+
+class TransferStats:
+    """
+    Bir indirme işinin akış bazlı bayt muhasebesi.
+    Her öğenin video ve ses akışları ayrı tutulur; işin toplam hızı ve
+    (bilinen veya tahmin edilen) kalan baytı üzerinden tüm playlist için ETA hesaplanır.
+    İş toplamları her güncellemede yalnızca değişen öğenin farkıyla güncellenir;
+    hook başına maliyet playlist uzunluğundan bağımsızdır.
+    """
+
+    def __init__(self, item_total=1, clock=time.monotonic):
+        self.item_total = max(item_total, 1)
+        self.clock = clock
+        self.items = {}
+        self.job_meter = ThroughputMeter(clock=clock)
+        # Çalışan toplamlar: indirilen bayt, boyutu bilinen öğelerin toplamı/sayısı, bitmemiş öğelerin kalanı
+        self.job_bytes = 0
+        self.known_size = 0
+        self.known_count = 0
+        self.pending = 0
+
+    def _item(self, index):
+        return self.items.setdefault(index, {
+            'streams': {}, 'bytes': 0, 'seen': 0, 'expected': 0, 'done': False,
+            'meter': ThroughputMeter(clock=self.clock)})
+
+    def _account(self, item, sign):
+        """Öğenin iş toplamlarına katkısını ekler (sign=1) ya da çıkarır (sign=-1)."""
+        size = max(item['expected'], item['seen'])
+        self.job_bytes += sign * item['bytes']
+        if size:
+            self.known_size += sign * size
+            self.known_count += sign
+        if not item['done']:
+            self.pending += sign * max(size - item['bytes'], 0)
+
+    def _set_stream(self, item, stream, downloaded, total):
+        old_downloaded, old_total = item['streams'].get(stream, (0, 0))
+        item['streams'][stream] = (downloaded, total)
+        item['bytes'] += downloaded - old_downloaded
+        item['seen'] += total - old_total
+
+    def update(self, index, stream, downloaded, total, expected=0, reported_speed=None):
+        """Bir akışın ilerlemesini işler; (öğe yüzdesi, öğe hızı, öğe ETA) döner."""
+        item = self._item(index)
+        self._account(item, -1)
+        self._set_stream(item, stream, downloaded, total)
+        item['expected'] = max(item['expected'], expected)
+        self._account(item, 1)
+
+        done_bytes = item['bytes']
+        total_bytes = self.item_size(index)
+        # Öğede tek akış varken yt-dlp'nin hız değeri doğrudan öğe hızıdır
+        hint = reported_speed if len(item['streams']) == 1 else None
+        speed = item['meter'].update(done_bytes, hint)
+        self.job_meter.update(self.job_bytes)
+
+        percent = done_bytes / total_bytes * 100 if total_bytes else 0
+        return min(percent, 100), speed, item['meter'].eta(total_bytes - done_bytes if total_bytes else None)
+
+    def finish_stream(self, index, stream):
+        item = self._item(index)
+        downloaded, total = item['streams'].get(stream, (0, 0))
+        size = max(downloaded, total)
+        self._account(item, -1)
+        self._set_stream(item, stream, size, size)
+        self._account(item, 1)
+
+    def complete(self, index):
+        item = self._item(index)
+        self._account(item, -1)
+        item['done'] = True
+        self._account(item, 1)
+
+    def item_bytes(self, index):
+        return self.items[index]['bytes']
+
+    def item_size(self, index):
+        """Öğenin toplam boyutu: ön bilgi varsa o, yoksa şimdiye kadar görülen akışların toplamı."""
+        item = self.items[index]
+        return max(item['expected'], item['seen'])
+
+    def remaining_bytes(self):
+        """Tüm iş için kalan bayt. Başlamamış öğeler bilinen öğelerin ortalama boyutuyla tahmin edilir."""
+        average = self.known_size / self.known_count if self.known_count else 0
+        unseen = max(self.item_total - len(self.items), 0)
+        return self.pending + unseen * average
+
+    def job_speed(self):
+        return self.job_meter.rate
+
+    def job_eta(self):
+        return self.job_meter.eta(self.remaining_bytes())
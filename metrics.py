@@ -0,0 +1,198 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+
+from executor import real_lock
+
+
+# JSON satırları halinde faz izleri; '-' stdout, boşsa kapalı
+TRACE_LOG = os.environ.get('YTD_TRACE_LOG', '')
+
+# Süre histogramı kovaları (saniye)
+DURATION_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+# Ortalama aktarım hızı histogramı kovaları (bayt/sn): 64 KB/s .. 128 MB/s
+THROUGHPUT_BUCKETS = tuple(2 ** i * 64 * 1024 for i in range(12))
+
+_HELP = {
+    'ytd_phase_seconds': 'Wall-clock time spent per pipeline phase.',
+    'ytd_job_seconds': 'Wall-clock time of whole download jobs.',
+    'ytd_jobs_total': 'Finished download jobs by final status.',
+    'ytd_items_total': 'Processed playlist items by result.',
+    'ytd_errors_total': 'Errors by exception class.',
+    'ytd_downloaded_bytes_total': 'Bytes written by finished transfers.',
+    'ytd_item_throughput_bytes_per_second': 'Average throughput of finished item transfers.',
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class Metrics:
+    """Prometheus metin formatında dışa aktarılan basit sayaç/gauge/histogram kaydı."""
+
+    def __init__(self, trace_log=TRACE_LOG):
+        self.lock = real_lock()
+        self.counters = {}    # isim -> {etiketler: değer}
+        self.gauges = {}      # isim -> {etiketler: fonksiyon veya değer}
+        self.histograms = {}  # isim -> {etiketler: [kova sayıları, toplam, adet]}
+        self.trace_log = trace_log
+
+    def inc(self, name, value=1, **labels):
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """value sabit bir sayı veya her okumada çağrılan bir fonksiyon olabilir."""
+        with self.lock:
+            self.gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name, value, buckets=DURATION_BUCKETS, **labels):
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            key = _label_key(labels)
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = [[0] * len(buckets), 0.0, 0, buckets]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist[0][i] += 1
+            hist[1] += value
+            hist[2] += 1
+
+    def error(self, exc):
+        """
+        Hatayı sınıfına göre bir kez sayar. timed içinde sayılıp yeniden yükseltilen
+        hata, üst katmanda (ör. _download_once) tekrar yakalandığında iki kez sayılmaz.
+        """
+        if getattr(exc, '_ytd_counted', False):
+            return
+        try:
+            exc._ytd_counted = True
+        except AttributeError:
+            pass
+        self.inc('ytd_errors_total', type=type(exc).__name__)
+
+    def trace(self, phase, seconds, **fields):
+        """Faz süresini JSON satırı olarak yazar (YTD_TRACE_LOG açıksa)."""
+        if not self.trace_log:
+            return
+        line = json.dumps(dict(ts=round(time.time(), 3), phase=phase, seconds=round(seconds, 4), **fields),
+                          default=str)
+        if self.trace_log == '-':
+            print(line, flush=True)
+        else:
+            with self.lock, open(self.trace_log, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    @contextmanager
+    def timed(self, phase, trace=None, **labels):
+        """
+        Bir fazın süresini ölçer: ytd_phase_seconds{phase=...} histogramına yazar,
+        hata olursa sınıfına göre sayar. trace sözlüğü yalnızca JSON izine eklenir
+        (iş/video kimliği gibi yüksek kardinaliteli alanlar etiket yapılmaz).
+        """
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            self.error(e)
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe('ytd_phase_seconds', seconds, phase=phase, **labels)
+            fields = dict(trace or {}, **labels)
+            if error is not None:
+                fields['error'] = type(error).__name__
+            self.trace(phase, seconds, **fields)
+
+    def render(self):
+        """Tüm ölçümleri Prometheus metin formatında döner."""
+        lines = []
+        with self.lock:
+            counters = {n: dict(s) for n, s in self.counters.items()}
+            gauges = {n: dict(s) for n, s in self.gauges.items()}
+            histograms = {n: {k: (list(h[0]), h[1], h[2], h[3]) for k, h in s.items()}
+                          for n, s in self.histograms.items()}
+
+        for name, series in sorted(counters.items()):
+            self._header(lines, name, 'counter')
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+
+        for name, series in sorted(gauges.items()):
+            self._header(lines, name, 'gauge')
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value() if callable(value) else value}")
+
+        for name, series in sorted(histograms.items()):
+            self._header(lines, name, 'histogram')
+            for key, (counts, total, count, buckets) in series.items():
+                for bound, bucket_count in zip(buckets, counts):
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', str(bound))])} {bucket_count}")
+                lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _header(lines, name, kind):
+        if name in _HELP:
+            lines.append(f"# HELP {name} {_HELP[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+class TransferTimer:
+    """
+    process_ie_result süresini aktarım ve ffmpeg birleştirme fazlarına ayırır.
+    Birleştirme başlangıç/bitişi yt-dlp'nin postprocessor hook'larından okunur.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.start = time.perf_counter()
+        self.merge_start = None
+        self.merge_end = None
+
+    def postprocessor_hook(self, d):
+        if d.get('postprocessor') != 'Merger':
+            return
+        if d['status'] == 'started':
+            self.merge_start = time.perf_counter()
+        elif d['status'] == 'finished':
+            self.merge_end = time.perf_counter()
+
+    def finish(self, nbytes=0, trace=None):
+        """Fazları kaydeder; aktarım süresini (saniye) döner."""
+        end = time.perf_counter()
+        transfer = (self.merge_start or end) - self.start
+        self.registry.observe('ytd_phase_seconds', transfer, phase='transfer')
+        self.registry.trace('transfer', transfer, bytes=nbytes, **(trace or {}))
+        if self.merge_start is not None:
+            merge = (self.merge_end or end) - self.merge_start
+            self.registry.observe('ytd_phase_seconds', merge, phase='merge')
+            self.registry.trace('merge', merge, **(trace or {}))
+        if nbytes:
+            self.registry.inc('ytd_downloaded_bytes_total', nbytes)
+            if transfer > 0:
+                self.registry.observe('ytd_item_throughput_bytes_per_second', nbytes / transfer,
+                                      buckets=THROUGHPUT_BUCKETS)
+        return transfer
+
+
+# Süreç genelinde paylaşılan ölçüm kaydı
+metrics = Metrics()
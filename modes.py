@@ -0,0 +1,75 @@
+# İndirme modları
+VIDEO = 'video'   # seçilen çözünürlükte video + ses (varsayılan)
+AUDIO = 'audio'   # yalnız ses; hiçbir video akışı indirilmez
+MODES = (VIDEO, AUDIO)
+
+
+def parse_mode(value):
+    return value if value in MODES else VIDEO
+
+
+def parse_time(value):
+    """'90', '1:30', '01:02:03.5' biçimlerini saniyeye çevirir."""
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        parts = str(value).strip().split(':')
+        if not parts[-1] or len(parts) > 3:
+            raise ValueError(f"Geçersiz zaman: {value!r}")
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + float(part)
+    if seconds < 0:
+        raise ValueError(f"Geçersiz zaman: {value!r}")
+    return seconds
+
+
+def parse_section(value):
+    """
+    Zaman aralığı: {'start': ..., 'end': ...} ya da '1:30-2:45'. Boşsa None (tüm video).
+    Bitiş boş bırakılırsa videonun sonuna kadar alınır. Geçersizse ValueError.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+    if not value:
+        return None
+    if isinstance(value, dict):
+        start, end = value.get('start'), value.get('end')
+    else:
+        start, _, end = str(value).partition('-')
+    start = parse_time(start) if start not in (None, '') else 0.0
+    end = parse_time(end) if end not in (None, '') else None
+    if end is not None and end <= start:
+        raise ValueError("Bitiş zamanı başlangıçtan sonra olmalı.")
+    if start == 0 and end is None:
+        return None
+    return (start, end)
+
+
+def section_label(section):
+    """Dosya adı ve arşiv anahtarı için aralık etiketi (ör. '90-165s')."""
+    start, end = section
+    return f"{start:g}-{end:g}s" if end is not None else f"{start:g}-end"
+
+
+def download_ranges(section):
+    """yt-dlp'nin download_ranges ayarı: yalnızca aralığı kapsayan kısım indirilir."""
+    from yt_dlp.utils import download_range_func
+    start, end = section
+    return download_range_func(None, [(start, end if end is not None else float('inf'))])
+
+
+def format_size(f, duration=None):
+    """Formatın bilinen, yaklaşık ya da bitrate ile tahmin edilen boyutu (bayt)."""
+    size = f.get('filesize') or f.get('filesize_approx')
+    if not size and f.get('tbr') and duration:
+        size = f['tbr'] * 1000 / 8 * duration
+    return size or 0
+
+
+def full_size(formats, plan, duration=None):
+    """Tam (video + ses, bütün süre) indirmenin tahmini boyutu; plan yoksa 0."""
+    if not plan:
+        return 0
+    by_id = {f.get('format_id'): f for f in formats}
+    return sum(format_size(by_id[fid], duration) for fid in (plan['video'], plan['audio']) if fid in by_id)
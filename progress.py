@@ -0,0 +1,121 @@
+import time
+
+from metrics import metrics
+from executor import real_lock
+
+
+BASE_INTERVAL = 0.2   # tek iş varken tick aralığı (saniye)
+MAX_INTERVAL = 1.0    # çok sayıda iş varken ulaşılabilecek en uzun aralık
+JOBS_PER_STEP = 4     # her bu kadar aktif işte aralık bir BASE_INTERVAL uzar
+
+
+class ProgressBroadcaster:
+    """
+    Tüm DownloadHandler'lardan gelen ilerleme güncellemelerini toplar ve
+    ortak bir tick'te hedef (oda) başına tek bir 'progress_batch' mesajı yollar.
+    Mesajlar fark (delta) kodludur: sabit alanlar öğe başına bir kez, sayısal
+    alanlar yalnızca değiştiklerinde gönderilir.
+    """
+
+    def __init__(self, base_interval=BASE_INTERVAL, max_interval=MAX_INTERVAL):
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.lock = real_lock()
+        self.emitters = {}   # hedef -> emit eden nesne (socketio veya JobChannel)
+        self.pending = {}    # hedef -> {öğe anahtarı: son tam durum}
+        self.sent = {}       # hedef -> {öğe anahtarı: en son gönderilen tam durum}
+        self.active = {}     # hedef -> kayıtlı handler sayısı
+        self.running = False
+
+    def interval(self):
+        """Aktif iş sayısına göre tick aralığı; iş arttıkça mesaj sıklığı azalır."""
+        with self.lock:
+            jobs = len(self.active)
+        steps = max(0, jobs - 1) // JOBS_PER_STEP
+        return min(self.base_interval * (1 + steps), self.max_interval)
+
+    def register(self, emitter, target):
+        """
+        Handler oluşturulurken (hub üzerinde) çağrılır ve gerekirse tick döngüsünü başlatır.
+        publish ise yt-dlp'nin OS thread'lerinden de çağrılabildiği için döngü başlatmaz.
+        """
+        with self.lock:
+            self.emitters[target] = emitter
+            self.active[target] = self.active.get(target, 0) + 1
+            start = not self.running
+            self.running = True
+        if start:
+            emitter.start_background_task(self._loop, emitter)
+
+    def unregister(self, target):
+        """Handler işini bitirdiğinde çağrılır; bekleyen güncellemeler önce gönderilir."""
+        self.flush(target)
+        with self.lock:
+            self.active[target] -= 1
+            if not self.active[target]:
+                del self.active[target]
+                self.sent.pop(target, None)
+                self.emitters.pop(target, None)
+
+    def publish(self, emitter, target, key, data):
+        """Bir öğenin güncel tam durumunu kaydeder; gönderim bir sonraki tick'te olur."""
+        with self.lock:
+            self.emitters.setdefault(target, emitter)
+            self.pending.setdefault(target, {})[key] = data
+
+    def _delta(self, target, key, data):
+        """Kilit altında çağrılır. Öğenin son gönderimden beri değişen alanlarını döner."""
+        sent = self.sent.setdefault(target, {})
+        previous = sent.get(key)
+        sent[key] = data
+        if previous is None:
+            return dict(data, key=key)
+        delta = {k: v for k, v in data.items() if previous.get(k) != v}
+        if not delta:
+            return None
+        delta['key'] = key
+        return delta
+
+    def flush(self, target=None):
+        """Bekleyen güncellemeleri (tek hedef veya hepsi) hemen gönderir."""
+        batches = []
+        with self.lock:
+            targets = [target] if target is not None else list(self.pending)
+            for t in targets:
+                items = self.pending.pop(t, None)
+                if not items:
+                    continue
+                deltas = [d for d in (self._delta(t, k, v) for k, v in items.items()) if d]
+                if deltas:
+                    batches.append((self.emitters.get(t), t, deltas))
+
+        if not batches:
+            return
+        start = time.perf_counter()
+        for emitter, t, deltas in batches:
+            if emitter is not None:
+                emitter.emit('progress_batch', {'items': deltas}, to=t)
+        metrics.observe('ytd_phase_seconds', time.perf_counter() - start, phase='emit')
+
+    def _loop(self, emitter):
+        while True:
+            emitter.sleep(self.interval())
+            self.flush()
+            with self.lock:
+                if not self.pending and not self.active:
+                    self.running = False
+                    return
+
+
+def merge_batch(state, batch):
+    """İstemcideki birleştirme mantığının aynısı: delta'ları öğe bazlı tam duruma ekler."""
+    last = None
+    for item in batch['items']:
+        merged = state.setdefault(item['key'], {})
+        merged.update(item)
+        last = merged
+    return last
+
+
+# Süreç genelinde paylaşılan yayıncı
+broadcaster = ProgressBroadcaster()
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+
+from yt_dlp.downloader.common import FileDownloader
+from yt_dlp.networking import Request
+from yt_dlp.utils import DownloadError, determine_protocol
+
+from executor import real_lock, real_thread, off_hub
+
+
+MIN_PART_SIZE = 4 * 1024 * 1024  # bundan küçük parçalar için ek bağlantı açılmaz
+BLOCK_SIZE = 256 * 1024
+PART_RETRIES = 3
+STATE_SAVE_BYTES = 8 * 1024 * 1024  # yarım kalan parça durumunun diske yazılma sıklığı
+
+
+class RangeNotSupported(Exception):
+    """Sunucu Range isteğini desteklemiyor; tek bağlantılı indirmeye dönülür."""
+
+
+def split_ranges(total, connections):
+    """[start, end] (dahil) aralıklarına eşit bölme; küçük dosyada daha az parça."""
+    count = max(1, min(connections, total // MIN_PART_SIZE))
+    size = -(-total // count)
+    return [[start, min(start + size, total) - 1] for start in range(0, total, size)]
+
+
+def suitable(info, connections):
+    """Tek URL'li, boyutu bilinen http(s) akışları parçalı indirilebilir (DASH/HLS değil)."""
+    if connections < 2 or not off_hub():
+        return False
+    # Zaman aralığı indirmeleri yt-dlp'nin ffmpeg indiricisiyle yalnızca aralığı çeker
+    if info.get('section_start') is not None or info.get('section_end') is not None:
+        return False
+    if determine_protocol(info) not in ('http', 'https'):
+        return False
+    return (info.get('filesize') or 0) >= 2 * MIN_PART_SIZE
+
+
+class ParallelHttpFD(FileDownloader):
+    """
+    Progressive (tek dosya) akışı birden çok HTTP Range bağlantısıyla indirir.
+    .part dosyası baştan tam boyuta ayrılır, her bağlantı kendi aralığını yerine yazar.
+    İlerleme tek bir toplam olarak normal progress hook'larıyla bildirilir; böylece
+    DownloadHandler (yüzde/hız/ETA) ve hız sınırlayıcı tek bağlantılı indirmedeki gibi çalışır.
+    Parça durumları '.ranges' dosyasında tutulur; yarıda kalan indirme kaldığı yerden sürer.
+    """
+
+    FD_NAME = 'parallel_http'
+
+    def real_download(self, filename, info_dict):
+        connections = self.params.get('concurrent_fragment_downloads') or 1
+        url = info_dict['url']
+        headers = dict(info_dict.get('http_headers') or {})
+        tmpfilename = self.temp_name(filename)
+        state_file = tmpfilename + '.ranges'
+
+        # Tek baytlık aralıkla sunucunun Range desteğini ve gerçek boyutu doğrula
+        # (açık uçlu 'bytes=0-' kapatılana kadar dosyanın devamını akıtır)
+        probe = self._open(url, headers, 0, 0)
+        try:
+            total = self._content_total(probe)
+            probe.read()
+        finally:
+            probe.close()
+
+        self.total = total
+        parts = self._load_state(state_file, tmpfilename, total)
+        if parts is None:
+            # Durum dosyası yoksa .part, tek bağlantılı indirmenin (yt-dlp continuedl)
+            # baştan sıralı yazdığı baytlardır; bunlar indirilmiş sayılır
+            kept = self._resumable_bytes(state_file, tmpfilename, total)
+            parts = [{'start': start, 'end': end, 'done': max(0, min(end - start + 1, kept - start))}
+                     for start, end in split_ranges(total, connections)]
+            # Durum dosyası ayırmadan önce yazılır: tam boyutlu .part hiçbir zaman
+            # durumsuz kalmaz, yukarıdaki sıralı indirme sayımıyla karışmaz
+            self._save_state(state_file, parts)
+        if not os.path.exists(tmpfilename) or os.path.getsize(tmpfilename) != total:
+            self._preallocate(tmpfilename, total)
+
+        self.lock = real_lock()
+        self.downloaded = sum(p['done'] for p in parts)
+        self.unsaved = 0
+        self.started = time.monotonic()
+        self.start_bytes = self.downloaded
+        self.errors = []
+
+        threads = [real_thread(self._fetch_part, url, headers, tmpfilename, part, parts, state_file, info_dict)
+                   for part in parts if part['done'] < part['end'] - part['start'] + 1]
+        for thread in threads:
+            thread.join()
+
+        if self.errors:
+            self._save_state(state_file, parts)
+            raise DownloadError(f'Parçalı indirme başarısız: {self.errors[0]}')
+
+        if os.path.exists(state_file):
+            os.remove(state_file)
+        self.try_rename(tmpfilename, filename)
+        self._hook_progress({
+            'status': 'finished',
+            'downloaded_bytes': total,
+            'total_bytes': total,
+            'filename': filename,
+            'elapsed': time.monotonic() - self.started,
+        }, info_dict)
+        return True
+
+    def _open(self, url, headers, start, end):
+        byte_range = f'bytes={start}-{"" if end is None else end}'
+        response = self.ydl.urlopen(Request(url, headers=dict(headers, Range=byte_range)))
+        if response.status != 206:
+            response.close()
+            raise RangeNotSupported(f'HTTP {response.status}')
+        return response
+
+    @staticmethod
+    def _content_total(response):
+        content_range = response.headers.get('Content-Range') or ''
+        try:
+            return int(content_range.rsplit('/', 1)[1])
+        except (IndexError, ValueError):
+            raise RangeNotSupported(f'Content-Range yok: {content_range!r}')
+
+    def _resumable_bytes(self, state_file, tmpfilename, total):
+        """Durumsuz .part'ın baştan geçerli bayt sayısı (devam kapalıysa ya da dosya uymuyorsa 0)."""
+        if not self.params.get('continuedl', True) or os.path.exists(state_file):
+            return 0
+        try:
+            size = os.path.getsize(tmpfilename)
+        except OSError:
+            return 0
+        return size if size <= total else 0
+
+    @staticmethod
+    def _preallocate(path, total):
+        """Dosyayı tam boyuta ayırır; var olan .part'ın baytlarına dokunmaz."""
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+            if hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(f.fileno(), 0, total)
+                    return
+                except OSError:
+                    pass  # Dosya sistemi desteklemiyor; seyrek dosyaya düş
+            f.truncate(total)
+
+    @staticmethod
+    def _load_state(state_file, tmpfilename, total):
+        if not (os.path.exists(state_file) and os.path.exists(tmpfilename)):
+            return None
+        try:
+            with open(state_file, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state['parts'] if state.get('total') == total else None
+
+    def _save_state(self, state_file, parts):
+        with open(state_file, 'w', encoding='utf-8') as f:
+            json.dump({'total': self.total, 'parts': parts}, f)
+
+    def _fetch_part(self, url, headers, tmpfilename, part, parts, state_file, info_dict):
+        """Bir aralığı indirir; bağlantı koparsa kaldığı bayttan tekrar dener."""
+        length = part['end'] - part['start'] + 1
+        for attempt in range(PART_RETRIES + 1):
+            try:
+                response = self._open(url, headers, part['start'] + part['done'], part['end'])
+                try:
+                    with open(tmpfilename, 'r+b') as f:
+                        f.seek(part['start'] + part['done'])
+                        while part['done'] < length:
+                            block = response.read(min(BLOCK_SIZE, length - part['done']))
+                            if not block:
+                                raise DownloadError('Bağlantı erken kapandı')
+                            f.write(block)
+                            self._report(len(block), part, parts, state_file, tmpfilename, info_dict)
+                finally:
+                    response.close()
+                return
+            except Exception as e:
+                if attempt == PART_RETRIES or isinstance(e, RangeNotSupported):
+                    self.errors.append(e)
+                    return
+                time.sleep(1 + attempt)
+
+    def _report(self, nbytes, part, parts, state_file, tmpfilename, info_dict):
+        # Hook'lar tek tek çağrılır: toplam bayt sıralı artar, hız sınırlayıcının
+        # beklemesi tüm bağlantıları birlikte yavaşlatır.
+        with self.lock:
+            part['done'] += nbytes
+            self.downloaded += nbytes
+            self.unsaved += nbytes
+            if self.unsaved >= STATE_SAVE_BYTES:
+                self.unsaved = 0
+                self._save_state(state_file, parts)
+            elapsed = time.monotonic() - self.started
+            speed = (self.downloaded - self.start_bytes) / elapsed if elapsed > 0 else None
+            self._hook_progress({
+                'status': 'downloading',
+                'downloaded_bytes': self.downloaded,
+                'total_bytes': self.total,
+                'tmpfilename': tmpfilename,
+                'filename': self.undo_temp_name(tmpfilename),
+                'elapsed': elapsed,
+                'speed': speed,
+                'eta': (self.total - self.downloaded) / speed if speed else None,
+            }, info_dict)
+
+
+def install(ydl, progress_hook):
+    """
+    Havuzdaki örneğin dl() metodunu sarar: concurrent_fragment_downloads > 1 iken
+    uygun progressive akışlar ParallelHttpFD ile, diğerleri (DASH/HLS parçaları dahil)
+    yt-dlp'nin kendi indiricisiyle indirilir. DASH/HLS'de aynı ayar parçaları paralel çeker.
+    """
+    original_dl = ydl.dl
+
+    def dl(name, info, subtitle=False, test=False):
+        connections = ydl.params.get('concurrent_fragment_downloads') or 1
+        if subtitle or test or name == '-' or not suitable(info, connections):
+            return original_dl(name, info, subtitle=subtitle, test=test)
+        fd = ParallelHttpFD(ydl, ydl.params)
+        fd.add_progress_hook(progress_hook)
+        try:
+            return fd.download(name, dict(info), subtitle)
+        except RangeNotSupported:
+            return original_dl(name, info, subtitle=subtitle, test=test)
+
+    ydl.dl = dl
+    return ydl
@@ -0,0 +1,189 @@
+import os
+import time
+import uuid
+import threading
+import itertools
+
+from progress import merge_batch
+from metrics import metrics
+
+
+# Aynı anda çalışabilecek toplam iş sayısı (tüm kullanıcılar için)
+MAX_ACTIVE_JOBS = int(os.environ.get('YTD_MAX_JOBS', '2'))
+# Biten işler, yeniden bağlanan istemciler için bu süre boyunca saklanır
+JOB_RETENTION = 3600
+PRIORITY_RANGE = (-5, 5)
+
+
+class Job:
+    """Socket oturumundan bağımsız, kimliği olan bir indirme işi."""
+
+    def __init__(self, owner, params, priority=0, job_id=None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.params = params
+        self.priority = max(PRIORITY_RANGE[0], min(int(priority or 0), PRIORITY_RANGE[1]))
+        self.status = 'queued'  # queued -> running -> done / error
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.seq = 0
+        # Yeniden bağlanan istemciye tekrar gönderilecek son olaylar
+        self.last_events = {}
+        self.items = {}  # öğe anahtarı -> birleştirilmiş son ilerleme
+
+    @property
+    def room(self):
+        return f"job:{self.id}"
+
+    def snapshot(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'priority': self.priority,
+            'url': self.params.get('url'),
+            'events': dict(self.last_events)
+        }
+
+
+class JobChannel:
+    """
+    run_downloader'a socketio yerine verilen vekil nesne.
+    Olayları işin odasına yayınlar ve son durumu iş üzerinde saklar;
+    böylece iş, onu başlatan socket bağlantısından bağımsız yaşar.
+    """
+
+    def __init__(self, socketio, job):
+        self.socketio = socketio
+        self.job = job
+
+    def emit(self, event, data, to=None):
+        payload = dict(data, job_id=self.job.id)
+        if event == 'progress_batch':
+            # Delta'lar öğe bazında birleştirilir; yeniden bağlanan istemci tam durumu alır
+            last = merge_batch(self.job.items, data)
+            if last is not None:
+                self.job.last_events['progress'] = dict(last, job_id=self.job.id)
+        else:
+            self.job.last_events[event] = payload
+        self.socketio.emit(event, payload, to=self.job.room)
+
+    def sleep(self, seconds=0):
+        return self.socketio.sleep(seconds)
+
+    def start_background_task(self, target, *args, **kwargs):
+        return self.socketio.start_background_task(target, *args, **kwargs)
+
+
+class JobScheduler:
+    """
+    Global eşzamanlılık sınırı olan iş kuyruğu.
+    Sıradaki iş seçilirken önce kullanıcı adaleti (o an en az işi çalışan ve en uzun
+    süredir beklemiş kullanıcı) dikkate alınır; böylece büyük bir playlist, başka
+    kullanıcıların tekil video isteklerini aç bırakmaz. Öncelik istemciden geldiği için
+    yalnızca kullanıcının kendi işlerini sıralar, başka kullanıcıların önüne geçirmez.
+    """
+
+    def __init__(self, socketio, runner, max_active=MAX_ACTIVE_JOBS, journal=None):
+        self.socketio = socketio
+        self.runner = runner
+        self.journal = journal
+        self.max_active = max(1, max_active)
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.queue = []
+        self.running = {}      # owner -> çalışan iş sayısı
+        self.last_served = {}  # owner -> son başlatma sırası
+        self.counter = itertools.count(1)
+
+    def submit(self, job):
+        """İşi kuyruğa ekler ve kapasite varsa hemen başlatır."""
+        with self.lock:
+            self._prune()
+            job.seq = next(self.counter)
+            self.jobs[job.id] = job
+            self.queue.append(job)
+        if self.journal is not None:
+            self.journal.create_job(job)
+        self._dispatch()
+        return job
+
+    def resume(self):
+        """Sunucu kapanırken yarım kalan işleri günlükten yükleyip tekrar kuyruğa alır."""
+        if self.journal is None:
+            return []
+        return [self.submit(Job(row['owner'], row['params'], row['priority'], job_id=row['id']))
+                for row in self.journal.unfinished_jobs()]
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def position(self, job):
+        """Kuyruktaki sırası (1-based), çalışıyorsa veya bittiyse 0."""
+        with self.lock:
+            ordered = sorted(self.queue, key=self._order_key)
+            return ordered.index(job) + 1 if job in ordered else 0
+
+    def active_count(self):
+        with self.lock:
+            return sum(self.running.values())
+
+    def queued_count(self):
+        with self.lock:
+            return len(self.queue)
+
+    def _order_key(self, job):
+        return (self.running.get(job.owner, 0),
+                self.last_served.get(job.owner, 0),
+                -job.priority,
+                job.seq)
+
+    def _dispatch(self):
+        to_start = []
+        with self.lock:
+            while self.queue and sum(self.running.values()) < self.max_active:
+                job = min(self.queue, key=self._order_key)
+                self.queue.remove(job)
+                job.status = 'running'
+                self.running[job.owner] = self.running.get(job.owner, 0) + 1
+                self.last_served[job.owner] = next(self.counter)
+                to_start.append(job)
+
+        for job in to_start:
+            self._record_status(job)
+            self.socketio.emit('job_status', {'job_id': job.id, 'status': job.status}, to=job.room)
+            self.socketio.start_background_task(self._run, job)
+
+    def _run(self, job):
+        job.started = time.time()
+        metrics.observe('ytd_phase_seconds', job.started - job.created, phase='queue_wait')
+        try:
+            self.runner(JobChannel(self.socketio, job), job)
+            job.status = 'error' if 'error' in job.last_events and 'done' not in job.last_events else 'done'
+        except Exception as e:
+            job.status = 'error'
+            metrics.error(e)
+            JobChannel(self.socketio, job).emit('error', {'msg': f"İş Hatası: {e}"})
+        finally:
+            job.finished = time.time()
+            metrics.observe('ytd_job_seconds', job.finished - job.started)
+            metrics.inc('ytd_jobs_total', status=job.status)
+            metrics.trace('job', job.finished - job.started, job=job.id, status=job.status)
+            with self.lock:
+                self.running[job.owner] -= 1
+                if not self.running[job.owner]:
+                    del self.running[job.owner]
+            self._record_status(job)
+            self.socketio.emit('job_status', {'job_id': job.id, 'status': job.status}, to=job.room)
+            self._dispatch()
+
+    def _record_status(self, job):
+        if self.journal is not None:
+            self.journal.set_job_status(job.id, job.status)
+
+    def _prune(self):
+        """Kilit altında çağrılır. Saklama süresi dolan bitmiş işleri siler."""
+        limit = time.time() - JOB_RETENTION
+        for job_id in [j.id for j in self.jobs.values() if j.finished and j.finished < limit]:
+            del self.jobs[job_id]
@@ -0,0 +1,120 @@
+import os
+import shutil
+import threading
+
+from executor import real_lock
+
+
+# Linux FICLONE ioctl: btrfs/XFS gibi dosya sistemlerinde veriyi kopyalamadan paylaşır
+FICLONE = 0x40049409
+
+
+class Flight:
+    """
+    Uçuştaki tek bir indirme. İlk gelen (lider) indirir; aynı video + format için
+    gelen diğer istekler hook'larını buraya bağlar ve aynı ilerlemeyi görür.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        # İlerleme hook'ları yt-dlp'nin OS thread'inden çağrılır
+        self.lock = real_lock()
+        self.hooks = []
+        self.done = threading.Event()
+        self.ok = False
+        self.info = None
+        self.path = None
+        self.error = None
+
+    def attach(self, hook):
+        with self.lock:
+            self.hooks.append(hook)
+
+    def detach(self, hook):
+        with self.lock:
+            if hook in self.hooks:
+                self.hooks.remove(hook)
+
+    def on_progress(self, d):
+        with self.lock:
+            hooks = list(self.hooks)
+        for hook in hooks:
+            hook(d)
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class FlightRegistry:
+    """Süreç genelinde (tüm oturumlar arasında) uçuştaki indirmeler: anahtar -> Flight."""
+
+    def __init__(self):
+        self.lock = real_lock()
+        self.flights = {}
+
+    def begin(self, key):
+        """(flight, lider mi) döner. Anahtarsız istekler paylaşılmaz, her zaman lider olur."""
+        if key is None:
+            return Flight(None), True
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self.flights[key] = Flight(key)
+            return flight, True
+
+    def finish(self, flight, ok, info=None, path=None, error=None):
+        flight.ok, flight.info, flight.path, flight.error = ok, info, path, error
+        with self.lock:
+            if self.flights.get(flight.key) is flight:
+                del self.flights[flight.key]
+        flight.done.set()
+
+    def active(self):
+        with self.lock:
+            return list(self.flights)
+
+
+def _reflink(src, dst):
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError('reflink desteklenmiyor')
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.remove(dst)
+            raise
+
+
+def materialize(src, dst):
+    """
+    dst'yi src'nin içeriğiyle oluşturur: önce hardlink, olmazsa reflink, en son kopya.
+    Yarım dosya görünmesin diye geçici ada yazılıp yerine taşınır. Kullanılan yöntemi döner.
+    """
+    if os.path.abspath(src) == os.path.abspath(dst):
+        return 'same'
+    if os.path.exists(dst) and os.path.getsize(dst) == os.path.getsize(src):
+        return 'exists'
+    os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+    tmp = dst + '.link'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(src, tmp)
+        method = 'hardlink'
+    except OSError:
+        try:
+            _reflink(src, tmp)
+            method = 'reflink'
+        except OSError:
+            shutil.copyfile(src, tmp)
+            method = 'copy'
+    os.replace(tmp, dst)
+    return method
+
+
+# Süreç genelinde paylaşılan kayıt
+flights = FlightRegistry()
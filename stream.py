@@ -0,0 +1,99 @@
+import threading
+
+from cache import normalize_url
+from thumbnails import thumbnail_cache
+
+
+PAGE_SIZE = 50  # istemciye tek seferde gönderilen playlist öğesi sayısı
+
+
+class PlaylistStream:
+    """
+    Taranmakta olan bir playlist. Öğeler yt-dlp'nin tembel generator'ından
+    sayfa sayfa geldikçe eklenir; indirme tarafı tarama bitmeden ilk öğelere başlayabilir.
+    Üretici ve tüketiciler hub üzerinde çalışır (ağ işi offload ile yapılır).
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.title = None
+        self.entries = []  # ham sıra korunur; erişilemeyen öğeler None
+        self.done = False
+        self.error = None
+        self.cond = threading.Condition()
+
+    def add(self, entries):
+        with self.cond:
+            self.entries.extend(entries)
+            self.cond.notify_all()
+
+    def finish(self, error=None):
+        with self.cond:
+            self.done = True
+            self.error = error
+            self.cond.notify_all()
+
+    def count(self):
+        """Şimdiye kadar bulunan erişilebilir öğe sayısı."""
+        return sum(1 for e in self.entries if e)
+
+    def iter_entries(self):
+        """(1-based ham index, öğe) çiftlerini bulundukça verir; tarama bitince durur."""
+        i = 0
+        while True:
+            with self.cond:
+                while i >= len(self.entries) and not self.done:
+                    self.cond.wait()
+                if i >= len(self.entries):
+                    if self.error is not None:
+                        raise self.error
+                    return
+                entry = self.entries[i]
+            i += 1
+            yield i, entry
+
+
+_lock = threading.Lock()
+_live = {}  # normalize edilmiş URL -> PlaylistStream
+
+
+def open_stream(url):
+    """Yeni bir tarama kaydeder; aynı URL zaten taranıyorsa None döner."""
+    key = normalize_url(url)
+    with _lock:
+        if key in _live:
+            return None
+        stream = _live[key] = PlaylistStream(url)
+        return stream
+
+
+def close_stream(stream):
+    with _lock:
+        if _live.get(normalize_url(stream.url)) is stream:
+            del _live[normalize_url(stream.url)]
+
+
+def live_stream(url):
+    """Bu URL için hâlâ devam eden tarama varsa döner."""
+    with _lock:
+        return _live.get(normalize_url(url))
+
+
+def page_payload(stream, entries, offset):
+    """İstemciye gönderilen 'metadata_page' verisi (fetch_metadata çıktısıyla aynı öğe biçimi)."""
+    return {
+        'type': 'playlist',
+        'title': stream.title or 'Playlist',
+        'offset': offset,
+        'entries': [
+            {
+                'index': offset + i + 1,
+                'title': entry.get('title', f"Video {offset + i + 1}"),
+                'id': entry.get('id', ''),
+                'url': entry.get('url') or entry.get('webpage_url'),
+                'thumb_id': thumbnail_cache.register(entry)
+            }
+            for i, entry in enumerate(entries) if entry
+        ],
+        'done': False
+    }
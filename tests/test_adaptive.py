@@ -0,0 +1,154 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yt_dlp.utils import DownloadError
+
+import adaptive
+from adaptive import (ConcurrencyController, classify, backoff, RATE_LIMITED, FORBIDDEN, PERMANENT,
+                      TRANSIENT, DECREASE_COOLDOWN, THROTTLE_MIN_BYTES)
+import downloader
+import ydl_pool
+
+MB = 1024 * 1024
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestClassify(unittest.TestCase):
+
+    def test_http_status_from_message(self):
+        self.assertEqual(classify(DownloadError('ERROR: unable to download: HTTP Error 429: Too Many Requests')),
+                         RATE_LIMITED)
+        self.assertEqual(classify(DownloadError('HTTP Error 403: Forbidden')), FORBIDDEN)
+
+    def test_cause_chain_is_followed(self):
+        cause = MagicMock(spec=['status'])
+        cause.status = 429
+        error = DownloadError('indirme başarısız', exc_info=(None, cause, None))
+        self.assertEqual(classify(error), RATE_LIMITED)
+
+    def test_permanent_and_transient(self):
+        self.assertEqual(classify(DownloadError('ERROR: [youtube] x: Private video')), PERMANENT)
+        self.assertEqual(classify(ConnectionResetError('reset')), TRANSIENT)
+
+
+class TestBackoff(unittest.TestCase):
+
+    def test_full_jitter_upper_bound_doubles_and_is_capped(self):
+        upper = lambda attempt, kind=TRANSIENT: backoff(attempt, kind, rand=lambda lo, hi: hi)
+        self.assertEqual([upper(a) for a in range(3)], [2.0, 4.0, 8.0])
+        self.assertEqual(upper(10), adaptive.BACKOFF_CAP)
+        self.assertGreater(upper(0, RATE_LIMITED), upper(0))
+        self.assertEqual(backoff(3, rand=lambda lo, hi: lo), 0)
+
+
+class TestConcurrencyController(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.controller = ConcurrencyController(8, 4, initial_items=2, clock=self.clock)
+
+    def test_additive_increase_up_to_ceiling(self):
+        for _ in range(100):
+            self.controller.on_success(MB, 0.1)
+        self.assertEqual(self.controller.limit, 8)
+        self.assertEqual(self.controller.connections(), 4)
+
+    def test_multiplicative_decrease_on_429_with_cooldown(self):
+        controller = ConcurrencyController(8, 4, clock=self.clock)
+        controller.on_error(RATE_LIMITED)
+        self.assertEqual((controller.limit, controller.connections()), (4, 2))
+        # Aynı patlamadan gelen diğer 429'lar pencereyi tekrar yarılamaz
+        controller.on_error(RATE_LIMITED)
+        self.assertEqual(controller.limit, 4)
+        self.clock.now += DECREASE_COOLDOWN
+        controller.on_error(FORBIDDEN)
+        self.assertEqual(controller.limit, 2)
+        controller.on_error(TRANSIENT)
+        self.assertEqual(controller.limit, 2)
+
+    def test_throttled_speed_decreases_unless_rate_limited_by_us(self):
+        controller = ConcurrencyController(4, clock=self.clock)
+        controller.on_success(THROTTLE_MIN_BYTES, 60, rate_limited=True)
+        self.assertEqual(controller.limit, 4)
+        controller.on_success(THROTTLE_MIN_BYTES, 60)
+        self.assertEqual(controller.limit, 2)
+
+
+class TestRetries(unittest.TestCase):
+
+    def setUp(self):
+        ydl_pool.ydl_pool.clear()
+        self.handler = MagicMock()
+        self.handler.limiter.limited.return_value = False
+
+    def download(self, side_effect, controller=None):
+        entry = {'id': 'a', 'url': 'http://a', 'formats': [{'format_id': '18', 'url': 'http://s'}]}
+        with patch('ydl_pool.yt_dlp.YoutubeDL') as mock_ydl, \
+                patch('downloader.journal', None), patch('downloader.disk_cache', None), \
+                patch('adaptive.random.uniform', return_value=0.5):
+            mock_instance = mock_ydl.return_value
+            mock_instance.extract_info.return_value = {'id': 'a', 'formats': []}
+            mock_instance.process_ie_result.side_effect = side_effect
+            ok = downloader.download_entry(entry, 1, '/tmp', '720', 1, self.handler, controller=controller)
+        return ok, mock_instance
+
+    def test_transient_failure_is_retried_with_backoff(self):
+        controller = ConcurrencyController(4, clock=FakeClock())
+        controller.acquire()
+        ok, mock_instance = self.download(
+            [DownloadError('HTTP Error 429: Too Many Requests'), {'requested_downloads': [{'filepath': '/x'}]}],
+            controller)
+
+        self.assertTrue(ok)
+        self.handler.socketio.sleep.assert_called_once_with(0.5)
+        self.assertEqual(controller.limit, 2)
+        # Bekleme sonrası yuva tekrar alındı
+        self.assertEqual(controller.active, 1)
+
+    def test_forbidden_refetches_stream_urls(self):
+        ok, mock_instance = self.download(
+            [DownloadError('HTTP Error 403: Forbidden'), {'requested_downloads': [{'filepath': '/x'}]}])
+
+        self.assertTrue(ok)
+        mock_instance.extract_info.assert_called_once()
+
+    def test_extraction_error_is_counted_once(self):
+        entry = {'id': 'b', 'url': 'http://b'}
+        before = downloader.metrics.counters.get('ytd_errors_total', {}).copy()
+        with patch('ydl_pool.yt_dlp.YoutubeDL') as mock_ydl, \
+                patch('downloader.journal', None), patch('downloader.disk_cache', None):
+            mock_ydl.return_value.extract_info.side_effect = DownloadError('Private video')
+            ok = downloader.download_entry(entry, 1, '/tmp', '720', 1, self.handler)
+
+        self.assertFalse(ok)
+        after = downloader.metrics.counters['ytd_errors_total']
+        added = sum(after.values()) - sum(before.values())
+        self.assertEqual(added, 1)
+
+    def test_permanent_failure_is_not_retried(self):
+        ok, mock_instance = self.download(DownloadError('Private video'))
+
+        self.assertFalse(ok)
+        self.assertEqual(mock_instance.process_ie_result.call_count, 1)
+        self.handler.socketio.sleep.assert_not_called()
+
+    def test_gives_up_after_max_retries(self):
+        ok, mock_instance = self.download(DownloadError('HTTP Error 503'))
+
+        self.assertFalse(ok)
+        self.assertEqual(mock_instance.process_ie_result.call_count, adaptive.MAX_RETRIES + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
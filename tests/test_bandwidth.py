@@ -0,0 +1,137 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bandwidth import BandwidthLimiter, TokenBucket, fair_shares, parse_rate, ACTIVE_WINDOW
+from downloader import DownloadHandler
+from progress import ProgressBroadcaster
+
+MB = 1024 * 1024
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestRateParsing(unittest.TestCase):
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate(''), 0)
+        self.assertEqual(parse_rate(None), 0)
+        self.assertEqual(parse_rate('5M'), 5 * MB)
+        self.assertEqual(parse_rate('800k'), 800 * 1024)
+        self.assertEqual(parse_rate('2MB/s'), 2 * MB)
+        self.assertEqual(parse_rate(1500), 1500)
+        with self.assertRaises(ValueError):
+            parse_rate('fast')
+
+
+class TestFairShares(unittest.TestCase):
+
+    def test_equal_split(self):
+        self.assertEqual(fair_shares(10, {'a': 0, 'b': 0}), {'a': 5, 'b': 5})
+
+    def test_capped_job_leaves_rest_to_others(self):
+        self.assertEqual(fair_shares(10, {'a': 2, 'b': 0, 'c': 0}), {'a': 2, 'b': 4, 'c': 4})
+
+    def test_unlimited_global_uses_own_caps(self):
+        self.assertEqual(fair_shares(0, {'a': 3, 'b': 0}), {'a': 3, 'b': 0})
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_debt_is_paid_by_waiting(self):
+        clock = FakeClock()
+        bucket = TokenBucket(100, clock)
+        self.assertEqual(bucket.reserve(50), 0.5)
+        clock.now += 0.5
+        self.assertEqual(bucket.reserve(100), 1.0)
+
+    def test_zero_rate_is_unlimited(self):
+        self.assertEqual(TokenBucket(0).reserve(10 ** 9), 0.0)
+
+
+class TestBandwidthLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = BandwidthLimiter(rate=MB, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_single_job_is_held_to_global_rate(self):
+        self.limiter.register('a')
+        for _ in range(10):
+            self.limiter.throttle('a', MB // 2)
+        # 5 MB, 1 MB/s: ilk kova boş başladığı için tam 5 saniye
+        self.assertAlmostEqual(self.clock.now, 5.0)
+
+    def test_two_active_jobs_share_fairly(self):
+        self.limiter.register('a')
+        self.limiter.register('b')
+        self.limiter.throttle('a', 1)
+        self.limiter.throttle('b', 1)
+        shares = self.limiter.limits()['shares']
+        self.assertEqual(shares['a'], MB / 2)
+        self.assertEqual(shares['b'], MB / 2)
+
+    def test_idle_job_releases_its_share(self):
+        self.limiter.register('a')
+        self.limiter.register('b')
+        self.limiter.throttle('a', 1)
+        self.limiter.throttle('b', 1)
+        self.clock.now += ACTIVE_WINDOW + 1
+        self.limiter.throttle('a', 1)
+        self.assertEqual(self.limiter.limits()['shares']['a'], MB)
+
+    def test_per_job_cap_and_live_changes(self):
+        self.limiter.register('a', cap=MB // 4)
+        self.limiter.register('b')
+        self.limiter.throttle('a', 1)
+        self.limiter.throttle('b', 1)
+        shares = self.limiter.limits()['shares']
+        self.assertEqual((shares['a'], shares['b']), (MB // 4, MB - MB // 4))
+
+        # Çalışırken genel ve işe özel sınır değişir
+        self.assertTrue(self.limiter.set_job_rate('a', 0))
+        self.assertEqual(self.limiter.limits()['shares']['a'], MB / 2)
+        self.limiter.set_rate(4 * MB)
+        self.assertEqual(self.limiter.limits()['shares']['b'], 2 * MB)
+        self.assertFalse(self.limiter.set_job_rate('missing', MB))
+
+    def test_unregistered_job_is_not_throttled(self):
+        self.assertEqual(self.limiter.throttle('ghost', 10 * MB), 0.0)
+        self.assertEqual(self.clock.now, 0.0)
+
+
+class TestHandlerThrottling(unittest.TestCase):
+
+    def test_hook_reports_downloaded_deltas(self):
+        limiter = MagicMock()
+        handler = DownloadHandler(MagicMock(), 'room', playlist_total=1,
+                                  broadcaster=ProgressBroadcaster(), rate_limit=MB, limiter=limiter)
+        limiter.register.assert_called_once_with('room', MB)
+
+        info = {'format_id': '137'}
+        hook = handler.make_hook(1)
+        # Devam eden .part dosyası: ilk bildirimdeki baytlar bu oturumda indirilmedi
+        hook({'status': 'downloading', 'downloaded_bytes': 4000, 'total_bytes': 10000, 'info_dict': info})
+        hook({'status': 'downloading', 'downloaded_bytes': 6000, 'total_bytes': 10000, 'info_dict': info})
+        hook({'status': 'downloading', 'downloaded_bytes': 9000, 'total_bytes': 10000, 'info_dict': info})
+
+        self.assertEqual([c.args for c in limiter.throttle.call_args_list],
+                         [('room', 0), ('room', 2000), ('room', 3000)])
+        handler.close()
+        limiter.unregister.assert_called_once_with('room')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import parse_urls, expand, run_batch
+
+LISTINGS = {
+    'http://pl1': {'title': 'PL1', 'entries': [
+        {'id': 'a', 'url': 'http://a', 'title': 'A', 'playlist_index': 1},
+        {'id': 'b', 'url': 'http://b', 'title': 'B', 'playlist_index': 2}]},
+    'http://pl2': {'title': 'PL2', 'entries': [
+        {'id': 'b', 'url': 'http://b', 'title': 'B', 'playlist_index': 1},
+        None,
+        {'id': 'c', 'url': 'http://c', 'title': 'C', 'playlist_index': 3}]},
+    'https://www.youtube.com/watch?v=d': {'id': 'd', 'title': 'D', 'webpage_url': 'https://www.youtube.com/watch?v=d'},
+}
+
+
+def fake_extract(url):
+    if url not in LISTINGS:
+        raise RuntimeError('Unsupported URL')
+    return LISTINGS[url]
+
+
+class TestParseUrls(unittest.TestCase):
+
+    def test_lines_commas_comments_and_duplicates(self):
+        text = ("# favoriler\n"
+                "https://youtu.be/d  http://pl1\n"
+                "http://pl2,https://www.youtube.com/watch?v=d&si=abc\n\n")
+        self.assertEqual(parse_urls(text), ['https://youtu.be/d', 'http://pl1', 'http://pl2'])
+        self.assertEqual(parse_urls(['http://pl1', '', 'http://pl1']), ['http://pl1'])
+
+    def test_too_many_urls(self):
+        with patch('batch.BATCH_MAX_URLS', 2):
+            with self.assertRaises(ValueError):
+                parse_urls('http://1 http://2 http://3')
+
+
+@patch('batch.extract_flat', side_effect=fake_extract)
+class TestExpand(unittest.TestCase):
+
+    def test_overlapping_entries_are_downloaded_once(self, _):
+        entries, report = expand(['http://pl1', 'http://pl2', 'https://www.youtube.com/watch?v=d', 'http://bad'])
+
+        self.assertEqual([e['id'] for e in entries], ['a', 'b', 'c', 'd'])
+        self.assertEqual(entries[2]['batch_source'], 'http://pl2')
+        self.assertNotIn('playlist_index', entries[0])
+        rows = {row['url']: row for row in report}
+        self.assertEqual((rows['http://pl2']['entries'], rows['http://pl2']['duplicates']), (1, 1))
+        self.assertEqual(rows['http://bad']['status'], 'error')
+        self.assertIn('Unsupported URL', rows['http://bad']['error'])
+
+    @patch('batch.journal', None)
+    @patch('batch.download_entries')
+    def test_run_batch_reports_per_url(self, mock_download, _):
+        mock_download.return_value = ([True, True, False], 3, 0)
+        socket = MagicMock()
+
+        run_batch(socket, ['http://pl1', 'http://pl2', 'http://bad'], '/tmp', '720', 'room')
+
+        args = mock_download.call_args[0]
+        self.assertEqual([e['id'] for e in args[2]], ['a', 'b', 'c'])
+        events = {c[0][0]: c[0][1] for c in socket.emit.call_args_list}
+        self.assertEqual(events['metadata']['playlist_total'], 3)
+        rows = {row['url']: row for row in events['batch_report']['urls']}
+        self.assertEqual((rows['http://pl1']['downloaded'], rows['http://pl1']['failed']), (2, 0))
+        self.assertEqual((rows['http://pl2']['downloaded'], rows['http://pl2']['failed']), (0, 1))
+        self.assertEqual(rows['http://bad']['status'], 'error')
+        self.assertIn('2/3', events['done']['msg'])
+
+
+if __name__ == '__main__':
+    unittest.main()
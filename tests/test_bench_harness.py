@@ -0,0 +1,38 @@
+import unittest
+import sys
+import os
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
+
+import yt_dlp
+import fake_extractor
+from media_server import MediaServer, payload
+
+
+class TestBenchHarness(unittest.TestCase):
+
+    def test_payload_is_position_based(self):
+        self.assertEqual(payload(254, 257), bytes([254, 255, 0, 1]))
+
+    def test_fake_extractor_downloads_from_local_server(self):
+        with MediaServer() as server, tempfile.TemporaryDirectory() as folder:
+            ydl = fake_extractor.install(yt_dlp.YoutubeDL({
+                'quiet': True, 'noprogress': True, 'format': '18',
+                'outtmpl': os.path.join(folder, '%(id)s.%(ext)s')}))
+            listing = ydl.extract_info(f'{server.base_url}/playlist?list=t&count=3&size=1000',
+                                       download=False, process=False)
+            entries = list(listing['entries'])
+            self.assertEqual([e['id'] for e in entries], ['t-0', 't-1', 't-2'])
+
+            ydl.extract_info(entries[0]['url'])
+            ydl.close()
+            with open(os.path.join(folder, 't-0.mp4'), 'rb') as f:
+                self.assertEqual(f.read(), payload(0, 999))
+            self.assertEqual(server.bytes_sent, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import MetadataCache, normalize_url
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestNormalizeUrl(unittest.TestCase):
+    def test_short_and_long_links_match(self):
+        self.assertEqual(normalize_url('https://youtu.be/abc?si=xyz'),
+                         normalize_url('https://www.youtube.com/watch?v=abc'))
+
+    def test_mobile_host_and_param_order(self):
+        self.assertEqual(normalize_url(' https://m.youtube.com/watch?list=PL1&v=abc#t=10 '),
+                         normalize_url('https://www.youtube.com/watch?v=abc&list=PL1'))
+
+    def test_different_videos_differ(self):
+        self.assertNotEqual(normalize_url('https://youtu.be/abc'), normalize_url('https://youtu.be/abd'))
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = MetadataCache(ttl=10, max_entries=2, clock=self.clock)
+
+    def test_hit_and_miss_counters(self):
+        self.assertEqual(self.cache.get_or_load('http://a', lambda: {'title': 'A'}), {'title': 'A'})
+        self.assertEqual(self.cache.get_or_load('http://a', lambda: {'title': 'B'}), {'title': 'A'})
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_ttl_expiry(self):
+        self.cache.put('http://a', 1)
+        self.clock.now = 11
+        self.assertIsNone(self.cache.get('http://a'))
+
+    def test_lru_eviction(self):
+        self.cache.put('http://a', 1)
+        self.cache.put('http://b', 2)
+        self.cache.get('http://a')  # a en son kullanılan olur
+        self.cache.put('http://c', 3)
+        self.assertIsNone(self.cache.get('http://b'))
+        self.assertEqual(self.cache.get('http://a'), 1)
+
+    def test_errors_and_none_are_not_cached(self):
+        def fail():
+            raise RuntimeError('boom')
+        with self.assertRaises(RuntimeError):
+            self.cache.get_or_load('http://a', fail)
+        self.assertIsNone(self.cache.get_or_load('http://a', lambda: None))
+        self.assertEqual(self.cache.get_or_load('http://a', lambda: 5), 5)
+
+    def test_single_flight(self):
+        calls = []
+        started = threading.Event()
+
+        def slow_loader():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return {'title': 'A'}
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(self.cache.get_or_load('http://a', slow_loader)))
+        first.start()
+        started.wait()
+        others = [threading.Thread(target=lambda: results.append(self.cache.get_or_load('http://a', slow_loader)))
+                  for _ in range(3)]
+        for t in others:
+            t.start()
+        for t in [first] + others:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'title': 'A'}] * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
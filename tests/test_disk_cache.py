@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import downloader
+from ydl_pool import ydl_pool
+from disk_cache import DiskCache, stream_expiry, LISTING_TTL, EXPIRY_MARGIN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000
+
+    def __call__(self):
+        return self.now
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        self.cache = DiskCache(os.path.join(self.tmp.name, 'cache.db'), clock=self.clock)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_listing_roundtrip_and_staleness(self):
+        info = {'title': 'PL', 'entries': [{'id': 'a', 'title': 'A'}, {'id': 'b', 'title': 'B'}]}
+        self.assertTrue(self.cache.put_listing('https://youtu.be/x?si=1', info))
+
+        cached, fresh = self.cache.get_listing('https://www.youtube.com/watch?v=x')
+        self.assertTrue(fresh)
+        self.assertEqual(cached, info)
+
+        self.clock.now += LISTING_TTL + 1
+        self.assertEqual(self.cache.get_listing('https://youtu.be/x'), (None, False))
+        cached, fresh = self.cache.get_listing('https://youtu.be/x', allow_stale=True)
+        self.assertFalse(fresh)
+        self.assertEqual(len(cached['entries']), 2)
+
+    def test_survives_reopen(self):
+        self.cache.put_listing('http://pl', {'title': 'PL', 'entries': [{'id': 'a'}]})
+        self.cache.close()
+        self.cache = DiskCache(self.cache.path, clock=self.clock)
+        self.assertEqual(self.cache.get_listing('http://pl')[0]['entries'], [{'id': 'a'}])
+
+    def test_video_expires_with_stream_urls(self):
+        expire = self.clock.now + 1000
+        info = {'id': 'a', 'formats': [
+            {'format_id': '22', 'url': f'https://r1.googlevideo.com/videoplayback?expire={expire}&id=1'},
+            {'format_id': '137', 'url': f'https://manifest.googlevideo.com/api/expire/{expire + 50}/id/1'},
+        ]}
+        self.assertEqual(stream_expiry(info), expire)
+        self.cache.put_video('a', info)
+
+        self.clock.now = expire - EXPIRY_MARGIN - 1
+        self.assertEqual(self.cache.get_video('a')['id'], 'a')
+        self.clock.now = expire - EXPIRY_MARGIN
+        self.assertIsNone(self.cache.get_video('a'))
+
+    def test_unserializable_info_is_skipped(self):
+        self.assertFalse(self.cache.put_video('a', {'id': 'a', 'formats': [{'fragments': iter([])}]}))
+        # Üst seviye fonksiyonlar atılır, geri kalanı saklanır
+        self.assertTrue(self.cache.put_video('b', {'id': 'b', '__post_extractor': lambda: None}))
+        self.assertEqual(self.cache.get_video('b'), {'id': 'b'})
+
+
+class TestIncrementalRefresh(unittest.TestCase):
+    def setUp(self):
+        ydl_pool.clear()
+
+    @patch('ydl_pool.yt_dlp.YoutubeDL')
+    def test_channel_refresh_stops_at_first_known_entry(self, mock_ydl):
+        mock_instance = mock_ydl.return_value
+        mock_instance.__enter__.return_value = mock_instance
+        pulled = []
+
+        def lazy_entries():
+            for vid in ['new2', 'new1', 'a', 'b', 'c']:
+                pulled.append(vid)
+                yield {'id': vid, 'title': vid.upper(), 'url': f'http://{vid}'}
+
+        mock_instance.extract_info.return_value = {'title': 'Channel', 'entries': lazy_entries()}
+        stale = {'title': 'Channel', 'entries': [
+            {'id': 'a', 'title': 'A (cached)'}, {'id': 'b', 'title': 'B'}, {'id': 'c', 'title': 'C'}]}
+
+        info = downloader.refresh_listing('https://www.youtube.com/@chan/videos', stale)
+
+        self.assertEqual(pulled, ['new2', 'new1', 'a'])
+        self.assertEqual([e['id'] for e in info['entries']], ['new2', 'new1', 'a', 'b', 'c'])
+        self.assertEqual(info['entries'][2]['title'], 'A (cached)')
+        self.assertEqual([e['playlist_index'] for e in info['entries']], [1, 2, 3, 4, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
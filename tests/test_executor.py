@@ -0,0 +1,52 @@
+import unittest
+import subprocess
+import textwrap
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import executor
+
+
+class TestExecutor(unittest.TestCase):
+    def test_runs_inline_without_monkey_patching(self):
+        self.assertFalse(executor.offloading())
+        self.assertEqual(executor.offload(lambda a, b=0: a + b, 1, b=2), 3)
+
+    def test_blocking_work_does_not_stall_the_hub(self):
+        # Monkey patch süreç geneli olduğu için ayrı bir yorumlayıcıda denenir
+        script = textwrap.dedent("""
+            import eventlet
+            eventlet.monkey_patch()
+            import time, threading
+            import executor
+
+            def cpu_bound():
+                end = time.time() + 0.5
+                while time.time() < end:
+                    sum(i * i for i in range(1000))
+                return threading.current_thread().name
+
+            ticks = []
+            def ticker():
+                for _ in range(8):
+                    ticks.append(time.time())
+                    eventlet.sleep(0.05)
+
+            t = eventlet.spawn(ticker)
+            name = executor.offload(cpu_bound)
+            t.wait()
+            gap = max(b - a for a, b in zip(ticks, ticks[1:]))
+            print(name, round(gap, 3))
+        """)
+        out = subprocess.run([sys.executable, '-W', 'ignore', '-c', script], cwd=ROOT,
+                             capture_output=True, text=True, timeout=60, env=dict(os.environ, YTD_EXEC_MODE='thread'))
+        name, gap = out.stdout.split()
+        self.assertNotEqual(name, 'MainThread')
+        self.assertLess(float(gap), 0.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from formats import FormatSelector, selector, score_bitrate, NO_POSTPROCESS, MERGE, REMUX
+
+
+# YouTube'un tipik format listesinden kısaltılmış örnek
+FORMATS = [
+    {'format_id': '139', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.5', 'abr': 48},
+    {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 129},
+    {'format_id': '251', 'ext': 'webm', 'vcodec': 'none', 'acodec': 'opus', 'abr': 135},
+    {'format_id': '18', 'ext': 'mp4', 'vcodec': 'avc1.42001E', 'acodec': 'mp4a.40.2', 'height': 360, 'fps': 30, 'tbr': 500},
+    {'format_id': '134', 'ext': 'mp4', 'vcodec': 'avc1.4d401e', 'acodec': 'none', 'height': 360, 'fps': 30, 'tbr': 600},
+    {'format_id': '136', 'ext': 'mp4', 'vcodec': 'avc1.4d401f', 'acodec': 'none', 'height': 720, 'fps': 30, 'tbr': 1500},
+    {'format_id': '247', 'ext': 'webm', 'vcodec': 'vp9', 'acodec': 'none', 'height': 720, 'fps': 30, 'tbr': 1400},
+    {'format_id': '298', 'ext': 'mp4', 'vcodec': 'avc1.4d4020', 'acodec': 'none', 'height': 720, 'fps': 60, 'tbr': 2500},
+    {'format_id': '248', 'ext': 'webm', 'vcodec': 'vp9', 'acodec': 'none', 'height': 1080, 'fps': 30, 'tbr': 2600},
+]
+
+
+class TestFormatSelector(unittest.TestCase):
+
+    def test_prefers_codecs_native_to_output(self):
+        plan = selector.plan(FORMATS, 720)
+        # 60 fps avc1, aynı yükseklikteki VP9'a tercih edilir; ses m4a
+        self.assertEqual(plan['video'], '298')
+        self.assertEqual(plan['audio'], '140')
+        self.assertEqual(plan['postprocess'], MERGE)
+        self.assertEqual(plan['format'], '298+140/298+bestaudio/best')
+
+    def test_progressive_format_needs_no_postprocessing(self):
+        plan = selector.plan(FORMATS, 360)
+        self.assertEqual(plan['video'], '18')
+        self.assertIsNone(plan['audio'])
+        self.assertEqual(plan['postprocess'], NO_POSTPROCESS)
+
+    def test_resolution_still_dominates(self):
+        # 1080p yalnızca VP9: çözünürlük korunur, birleştirme remux olarak işaretlenir
+        plan = selector.plan(FORMATS, 1080)
+        self.assertEqual(plan['video'], '248')
+        self.assertEqual(plan['postprocess'], REMUX)
+
+    def test_single_pass_over_generator(self):
+        plan = selector.plan((f for f in FORMATS), 720)
+        self.assertEqual(plan['video'], '298')
+
+    def test_criteria_are_pluggable(self):
+        bitrate_only = FormatSelector(criteria=((score_bitrate, 1),))
+        plan = bitrate_only.plan([f for f in FORMATS if f['format_id'] != '298'], 720)
+        self.assertEqual(plan['video'], '136')
+        plan = bitrate_only.plan([dict(f, tbr=9000) if f['format_id'] == '247' else f for f in FORMATS], 720)
+        self.assertEqual(plan['video'], '247')
+
+    def test_no_video_formats(self):
+        self.assertIsNone(selector.plan([f for f in FORMATS if f['vcodec'] == 'none'], 720))
+
+
+if __name__ == '__main__':
+    unittest.main()
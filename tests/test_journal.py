@@ -0,0 +1,130 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import tempfile
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import downloader
+from cache import metadata_cache
+from ydl_pool import ydl_pool
+from journal import Journal, DONE, FAILED
+from scheduler import Job, JobScheduler
+from stream import open_stream, close_stream
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        metadata_cache.clear()
+        ydl_pool.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = Journal(os.path.join(self.tmp.name, 'journal.db'))
+        patcher = patch('downloader.journal', self.journal)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmp.cleanup()
+
+    def mock_ydl(self, mock_ydl, entries):
+        mock_instance = mock_ydl.return_value
+        mock_instance.__enter__.return_value = mock_instance
+        mock_instance.extract_info.return_value = {'title': 'PL', 'entries': entries}
+        return mock_instance
+
+    def test_entry_states_are_recorded(self):
+        with patch('ydl_pool.yt_dlp.YoutubeDL') as mock_ydl:
+            mock_instance = self.mock_ydl(mock_ydl, [
+                {'id': 'a', 'url': 'http://a', 'title': 'A'},
+                {'id': 'b', 'url': 'http://b', 'title': 'B'}])
+            mock_instance.process_ie_result.side_effect = [
+                {'requested_downloads': [{'filepath': '/tmp/01 - A.mp4'}]}, RuntimeError('403')]
+            self.journal.create_job(Job('u', {'url': 'http://pl'}, job_id='job1'))
+
+            downloader.run_downloader(MagicMock(), 'http://pl', '/tmp', '720', 'room', job_id='job1')
+
+        title, entries, states = self.journal.load_entries('job1')
+        self.assertEqual(title, 'PL')
+        self.assertEqual(entries[1], {'id': 'b', 'url': 'http://b', 'title': 'B'})
+        self.assertEqual(states, {1: DONE, 2: FAILED})
+
+    def test_resume_skips_finished_entries_without_extraction(self):
+        self.journal.create_job(Job('u', {'url': 'http://pl'}, job_id='job1'))
+        self.journal.register_entries('job1', 'PL', [
+            {'id': 'a', 'url': 'http://a'}, {'id': 'b', 'url': 'http://b'}, {'id': 'c', 'url': 'http://c'}])
+        self.journal.set_entry_state('job1', 1, DONE)
+
+        with patch('ydl_pool.yt_dlp.YoutubeDL') as mock_ydl:
+            mock_instance = self.mock_ydl(mock_ydl, [])
+            socket = MagicMock()
+            downloader.run_downloader(socket, 'http://pl', '/tmp', '720', 'room', job_id='job1')
+
+        extracted = [c[0][0] for c in mock_instance.extract_info.call_args_list]
+        # Playlist tekrar taranmaz, biten öğe için ağa çıkılmaz
+        self.assertEqual(extracted, ['http://b', 'http://c'])
+        done = [c for c in socket.emit.call_args_list if c[0][0] == 'done']
+        self.assertIn('3/3', done[0][0][1]['msg'])
+
+    @patch('downloader.download_entry', return_value=True)
+    def test_interrupted_scan_is_completed_on_resume(self, mock_download):
+        self.journal.create_job(Job('u', {'url': 'http://pl'}, job_id='job1'))
+        # Önizleme taraması iki öğe bulduktan sonra kesildi
+        stream = open_stream('http://pl')
+        stream.title = 'PL'
+        stream.add([{'id': 'a', 'url': 'http://a'}, {'id': 'b', 'url': 'http://b'}])
+        stream.finish(RuntimeError('bağlantı koptu'))
+        try:
+            downloader.run_downloader(MagicMock(), 'http://pl', '/tmp', '720', 'room', job_id='job1')
+        finally:
+            close_stream(stream)
+        self.assertFalse(self.journal.scan_complete('job1'))
+        self.journal.set_entry_state('job1', 1, DONE)
+        mock_download.reset_mock()
+
+        with patch('ydl_pool.yt_dlp.YoutubeDL') as mock_ydl:
+            self.mock_ydl(mock_ydl, [{'id': k, 'url': f'http://{k}'} for k in 'abcd'])
+            socket = MagicMock()
+            downloader.run_downloader(socket, 'http://pl', '/tmp', '720', 'room', job_id='job1')
+
+        # Kayıtlı öğeler tekrar eklenmez, listenin geri kalanı kuyruğa girer
+        downloaded = [c.args[0]['id'] for c in mock_download.call_args_list]
+        self.assertEqual(downloaded, ['b', 'c', 'd'])
+        title, entries, states = self.journal.load_entries('job1')
+        self.assertEqual([e['id'] for e in entries], ['a', 'b', 'c', 'd'])
+        self.assertTrue(self.journal.scan_complete('job1'))
+        done = [c for c in socket.emit.call_args_list if c[0][0] == 'done']
+        self.assertIn('4/4', done[0][0][1]['msg'])
+
+    def test_archive_skips_existing_file_in_same_folder(self):
+        target = os.path.join(self.tmp.name, 'A.mp4')
+        open(target, 'w').close()
+        self.journal.add_to_archive('a', downloader.archive_format('720'), target)
+
+        with patch('ydl_pool.yt_dlp.YoutubeDL') as mock_ydl:
+            mock_instance = self.mock_ydl(mock_ydl, [])
+            ok = downloader.download_entry({'id': 'a', 'url': 'http://a'}, 1, self.tmp.name, '720', 1, MagicMock())
+
+        self.assertTrue(ok)
+        mock_instance.extract_info.assert_not_called()
+
+        # Dosya silinmişse arşiv kaydı yok sayılır
+        os.remove(target)
+        self.assertIsNone(self.journal.archived_path('a', downloader.archive_format('720')))
+
+    def test_scheduler_resumes_unfinished_jobs(self):
+        socketio = MagicMock()
+        scheduler = JobScheduler(socketio, MagicMock(), max_active=1, journal=self.journal)
+        scheduler.submit(Job('u', {'url': 'http://1'}, job_id='running'))
+        scheduler.submit(Job('u', {'url': 'http://2'}, job_id='queued'))
+
+        # Sunucu yeniden başladı
+        restarted = JobScheduler(socketio, MagicMock(), max_active=1, journal=self.journal)
+        resumed = restarted.resume()
+        self.assertEqual([j.id for j in resumed], ['running', 'queued'])
+        self.assertEqual(resumed[0].params, {'url': 'http://1'})
+
+
+if __name__ == '__main__':
+    unittest.main()
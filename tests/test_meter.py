@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meter import ThroughputMeter, TransferStats, expected_size
+
+MB = 1024 * 1024
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestThroughputMeter(unittest.TestCase):
+    def test_first_update_uses_reported_speed(self):
+        meter = ThroughputMeter(clock=FakeClock())
+        self.assertEqual(meter.update(0, reported_speed=2 * MB), 2 * MB)
+
+    def test_tracks_throttling_instead_of_lifetime_average(self):
+        clock = FakeClock()
+        meter = ThroughputMeter(clock=clock)
+        downloaded = 0
+        for _ in range(30):  # 30 sn boyunca 10 MB/s
+            clock.now += 1
+            downloaded += 10 * MB
+            meter.update(downloaded)
+        for _ in range(15):  # sonra 1 MB/s'ye kısıldı
+            clock.now += 1
+            downloaded += 1 * MB
+            meter.update(downloaded)
+
+        lifetime_average = downloaded / clock.now
+        self.assertLess(meter.rate, 2 * MB)
+        self.assertGreater(lifetime_average, 6 * MB)
+        self.assertAlmostEqual(meter.eta(10 * MB), 10 * MB / meter.rate)
+
+    def test_unknown_speed_has_no_eta(self):
+        self.assertIsNone(ThroughputMeter().eta(100))
+
+
+class TestTransferStats(unittest.TestCase):
+    def test_video_and_audio_streams_share_one_item_percent(self):
+        stats = TransferStats(item_total=1, clock=FakeClock())
+        expected = expected_size({'requested_formats': [{'filesize': 80}, {'filesize_approx': 20}]})
+        self.assertEqual(expected, 100)
+
+        percent, _, _ = stats.update(1, 'video', 80, 80, expected)
+        self.assertEqual(percent, 80)
+        stats.finish_stream(1, 'video')
+        # Ses akışı başlayınca yüzde sıfırlanmaz
+        percent, _, _ = stats.update(1, 'audio', 10, 20, expected)
+        self.assertEqual(percent, 90)
+
+    def test_playlist_eta_estimates_unseen_items(self):
+        clock = FakeClock()
+        stats = TransferStats(item_total=4, clock=clock)
+        stats.update(1, 'main', 0, 100 * MB, reported_speed=10 * MB)
+        clock.now += 1
+        stats.update(1, 'main', 10 * MB, 100 * MB, reported_speed=10 * MB)
+
+        # 90 MB bu öğeden + 3 görülmemiş öğe x 100 MB (ortalama)
+        self.assertEqual(stats.remaining_bytes(), 390 * MB)
+        self.assertAlmostEqual(stats.job_eta(), 39, delta=1)
+
+        stats.complete(1)
+        self.assertEqual(stats.remaining_bytes(), 300 * MB)
+
+    def test_running_totals_match_full_recount(self):
+        stats = TransferStats(item_total=5, clock=FakeClock())
+        stats.update(1, 'video', 50, 80, 100)
+        stats.update(1, 'audio', 5, 20, 100)
+        stats.update(2, 'main', 30, 0)
+        stats.update(1, 'video', 70, 80, 100)
+        stats.finish_stream(1, 'video')
+        stats.update(3, 'main', 10, 40)
+        stats.complete(3)
+
+        items = stats.items
+        self.assertEqual(stats.job_bytes, sum(stats.item_bytes(i) for i in items))
+        sizes = [stats.item_size(i) for i in items if stats.item_size(i)]
+        remaining = sum(max(stats.item_size(i) - stats.item_bytes(i), 0) for i in items if not items[i]['done'])
+        # Boyutu bilinmeyen öğe (2) ortalamaya girmez; 2 görülmemiş öğe ortalama boyutla tahmin edilir
+        self.assertEqual(stats.remaining_bytes(), remaining + 2 * sum(sizes) / len(sizes))
+        self.assertEqual(stats.remaining_bytes(), 15 + 2 * 70)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import json
+import tempfile
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Metrics, TransferTimer
+
+
+class TestMetrics(unittest.TestCase):
+    def test_render_prometheus_text(self):
+        m = Metrics(trace_log='')
+        m.inc('ytd_items_total', result='ok')
+        m.inc('ytd_items_total', result='ok')
+        m.set_gauge('ytd_jobs_active', lambda: 3)
+        m.observe('ytd_phase_seconds', 0.3, phase='select_format')
+
+        text = m.render()
+        self.assertIn('# TYPE ytd_items_total counter', text)
+        self.assertIn('ytd_items_total{result="ok"} 2', text)
+        self.assertIn('ytd_jobs_active 3', text)
+        self.assertIn('ytd_phase_seconds_bucket{phase="select_format",le="0.25"} 0', text)
+        self.assertIn('ytd_phase_seconds_bucket{phase="select_format",le="0.5"} 1', text)
+        self.assertIn('ytd_phase_seconds_bucket{phase="select_format",le="+Inf"} 1', text)
+        self.assertIn('ytd_phase_seconds_count{phase="select_format"} 1', text)
+
+    def test_timed_counts_errors_by_class_and_traces(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = os.path.join(tmp, 'trace.jsonl')
+            m = Metrics(trace_log=log)
+            with self.assertRaises(ValueError):
+                with m.timed('video_extract', trace={'video': 'abc'}):
+                    raise ValueError('bad')
+
+            self.assertIn('ytd_errors_total{type="ValueError"} 1', m.render())
+            with open(log) as f:
+                line = json.loads(f.readline())
+        self.assertEqual((line['phase'], line['video'], line['error']), ('video_extract', 'abc', 'ValueError'))
+
+    def test_error_rethrown_through_timed_is_counted_once(self):
+        m = Metrics(trace_log='')
+        try:
+            with m.timed('video_extract'):
+                raise ValueError('bad')
+        except ValueError as e:
+            # _download_once gibi üst katmanlar aynı hatayı tekrar bildirir
+            m.error(e)
+        m.error(ValueError('other'))
+        self.assertIn('ytd_errors_total{type="ValueError"} 2', m.render())
+
+    def test_transfer_timer_splits_merge_phase(self):
+        m = Metrics(trace_log='')
+        timer = TransferTimer(m)
+        timer.postprocessor_hook({'status': 'started', 'postprocessor': 'Merger'})
+        timer.postprocessor_hook({'status': 'finished', 'postprocessor': 'Merger'})
+        timer.postprocessor_hook({'status': 'started', 'postprocessor': 'MoveFiles'})
+        timer.finish(nbytes=1024)
+
+        text = m.render()
+        self.assertIn('ytd_phase_seconds_count{phase="transfer"} 1', text)
+        self.assertIn('ytd_phase_seconds_count{phase="merge"} 1', text)
+        self.assertIn('ytd_downloaded_bytes_total 1024', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
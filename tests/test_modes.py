@@ -0,0 +1,153 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
+
+import fake_extractor
+from media_server import MediaServer, payload
+import downloader
+import ydl_pool
+from formats import selector
+from modes import AUDIO, VIDEO, parse_mode, parse_time, parse_section, section_label, full_size
+
+FORMATS = [
+    {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 129, 'filesize': 1000},
+    {'format_id': '251', 'ext': 'webm', 'vcodec': 'none', 'acodec': 'opus', 'abr': 135, 'filesize': 1100},
+    {'format_id': '18', 'ext': 'mp4', 'vcodec': 'avc1.42001E', 'acodec': 'mp4a.40.2', 'height': 360,
+     'tbr': 500, 'filesize': 5000},
+    {'format_id': '136', 'ext': 'mp4', 'vcodec': 'avc1.4d401f', 'acodec': 'none', 'height': 720,
+     'tbr': 1500, 'filesize': 9000},
+]
+
+
+class TestParsing(unittest.TestCase):
+
+    def test_parse_time(self):
+        self.assertEqual(parse_time('90'), 90)
+        self.assertEqual(parse_time('1:30'), 90)
+        self.assertEqual(parse_time('01:02:03.5'), 3723.5)
+        for bad in ('abc', '1:', '1:2:3:4', '-5'):
+            with self.assertRaises(ValueError):
+                parse_time(bad)
+
+    def test_parse_section(self):
+        self.assertEqual(parse_section({'start': '1:30', 'end': '2:45'}), (90, 165))
+        self.assertEqual(parse_section(' 10- '), (10, None))
+        self.assertIsNone(parse_section(''))
+        self.assertIsNone(parse_section({'start': '', 'end': ''}))
+        with self.assertRaises(ValueError):
+            parse_section('2:00-1:00')
+
+    def test_labels_and_archive_keys(self):
+        self.assertEqual(parse_mode('podcast'), VIDEO)
+        self.assertEqual(section_label((90, 165)), '90-165s')
+        self.assertEqual(section_label((90, None)), '90-end')
+        self.assertEqual(downloader.archive_format('720'), '720p/mp4')
+        self.assertEqual(downloader.archive_format('720', AUDIO), 'audio')
+        self.assertEqual(downloader.archive_format('720', VIDEO, (90, 165)), '720p/mp4@90-165s')
+
+
+class TestAudioPlan(unittest.TestCase):
+
+    def test_picks_audio_native_to_output_and_never_video(self):
+        plan = selector.plan_audio(FORMATS)
+        self.assertEqual((plan['video'], plan['audio'], plan['format']), (None, '140', '140/bestaudio'))
+        self.assertEqual(selector.plan_audio(FORMATS[2:])['format'], 'bestaudio')
+
+    def test_full_size_counts_video_and_audio(self):
+        self.assertEqual(full_size(FORMATS, selector.plan(FORMATS, '720')), 10000)
+        self.assertEqual(full_size(FORMATS, None), 0)
+
+
+@patch('downloader.journal', None)
+@patch('downloader.disk_cache', None)
+class TestModeDownload(unittest.TestCase):
+
+    def setUp(self):
+        ydl_pool.ydl_pool.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.entry = {'id': 'v', 'url': 'http://v', 'title': 'Video', 'formats': FORMATS}
+        self.handler = MagicMock()
+        self.handler.limiter.limited.return_value = False
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        ydl_pool.ydl_pool.clear()
+
+    def download(self, mode, section=None):
+        path = os.path.join(self.tmp.name, 'Video.m4a')
+        with open(path, 'wb') as f:
+            f.write(b'x' * 1000)
+        leased = {}
+        with patch('ydl_pool.yt_dlp.YoutubeDL') as mock_ydl:
+            mock_instance = mock_ydl.return_value
+            mock_instance.params = {'outtmpl': {}}
+
+            def process(info, download=True):
+                # Kiralama ayarları indirme anındaki haliyle yakalanır
+                leased.update(mock_instance.params, outtmpl=dict(mock_instance.params['outtmpl']))
+                return {'requested_downloads': [{'filepath': path}]}
+
+            mock_instance.process_ie_result.side_effect = process
+            ok = downloader.download_entry(self.entry, 1, self.tmp.name, '720', 1, self.handler,
+                                           mode=mode, section=section)
+        return ok, leased
+
+    def test_audio_mode_downloads_only_audio_and_reports_savings(self):
+        ok, opts = self.download(AUDIO)
+
+        self.assertTrue(ok)
+        self.assertEqual(opts['format'], '140/bestaudio')
+        self.assertNotIn('download_ranges', opts)
+        self.handler.add_saved.assert_called_once_with(9000)
+
+    def test_section_sets_download_ranges_and_filename(self):
+        ok, opts = self.download(VIDEO, (90, 165))
+
+        self.assertTrue(ok)
+        self.assertTrue(callable(opts['download_ranges']))
+        self.assertTrue(opts['outtmpl']['default'].endswith('%(title)s [90-165s].%(ext)s'))
+
+    def test_download_ranges_do_not_leak_between_leases(self):
+        with patch('ydl_pool.yt_dlp.YoutubeDL') as mock_ydl:
+            mock_ydl.return_value.params = {}
+            with ydl_pool.ydl_pool.lease({'quiet': True, 'download_ranges': 'r'}) as ydl:
+                self.assertEqual(ydl.params['download_ranges'], 'r')
+            with ydl_pool.ydl_pool.lease({'quiet': True}) as ydl:
+                self.assertNotIn('download_ranges', ydl.params)
+            self.assertEqual(mock_ydl.call_count, 1)
+
+    def test_real_download_after_a_section_lease(self):
+        create = ydl_pool.YDLPool._create
+
+        def _create(pool, static):
+            ydl, hooks = create(pool, static)
+            fake_extractor.install(ydl)
+            return ydl, hooks
+
+        with MediaServer() as server, patch.object(ydl_pool.YDLPool, '_create', _create):
+            url = f'{server.base_url}/watch?v=m&size=8000'
+            opts = {'quiet': True, 'noprogress': True}
+            with ydl_pool.ydl_pool.lease(dict(opts, download_ranges=lambda *_: [{}])):
+                pass
+            # Gerçek YoutubeDL: önceki kiracının aralığı kalmaz, varsayılan kullanılır
+            with ydl_pool.ydl_pool.lease(opts) as ydl:
+                self.assertNotIn('download_ranges', ydl.params)
+
+            ok = downloader.download_entry({'id': 'm', 'url': url, 'title': 'Bench m'}, 1, self.tmp.name,
+                                           '720', 1, self.handler, mode=AUDIO)
+
+        self.assertTrue(ok)
+        with open(os.path.join(self.tmp.name, 'Bench m.m4a'), 'rb') as f:
+            self.assertEqual(f.read(), payload(0, 999))
+        # Tam indirme 720p video (16000) + ses (1000) olurdu
+        self.handler.add_saved.assert_called_once_with(16000)
+
+
+if __name__ == '__main__':
+    unittest.main()
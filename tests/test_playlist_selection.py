@@ -5,11 +5,19 @@ import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from downloader import fetch_metadata, run_downloader
+from downloader import fetch_metadata, run_downloader, DownloadHandler
+from cache import metadata_cache
+from ydl_pool import ydl_pool
+from progress import ProgressBroadcaster
 
 class TestPlaylistSelection(unittest.TestCase):
+
+    def setUp(self):
+        # Testler aynı URL'leri farklı içerikle kullanıyor
+        metadata_cache.clear()
+        ydl_pool.clear()
     
-    @patch('downloader.yt_dlp.YoutubeDL')
+    @patch('ydl_pool.yt_dlp.YoutubeDL')
     def test_fetch_metadata_playlist(self, mock_ydl):
         # Mock yt_dlp instance
         mock_instance = mock_ydl.return_value
@@ -34,7 +42,7 @@ class TestPlaylistSelection(unittest.TestCase):
         self.assertEqual(result['entries'][2]['index'], 3)
         self.assertEqual(result['entries'][2]['id'], 'v3')
 
-    @patch('downloader.yt_dlp.YoutubeDL')
+    @patch('ydl_pool.yt_dlp.YoutubeDL')
     def test_run_downloader_filtering(self, mock_ydl):
         # We need to spy on what gets downloaded.
         # run_downloader creates a new ydl instance for download.
@@ -62,23 +70,15 @@ class TestPlaylistSelection(unittest.TestCase):
         
         run_downloader(mock_socket, 'http://playlist', '/tmp', '720', 'sid', selected_indices=[1, 3])
         
-        # Verify download was called only for v1 and v3
-        # The code iterates entries.
-        # It creates a new YDL for each download.
-        # ydl.download(['http://v1'])
-        
-        # Check calls to download
-        # Logic: 
-        # 1. extract_flat (happens once)
-        # 2. explicit video info extraction for format selection (happens inside loop) -> extract_info(url)
-        # 3. download([url])
-        
-        # Let's check download calls
-        download_calls = [c[0][0] for c in mock_instance.download.call_args_list]
-        # download args is a list of urls: [['http://v1']]
-        
-        downloaded_urls = [args[0] for args in download_calls]
-        
+        # Verify only v1 and v3 were extracted and downloaded.
+        # Each video page is extracted exactly once (process=False) and the
+        # resulting info dict is handed to process_ie_result for the download.
+        video_extracts = [c for c in mock_instance.extract_info.call_args_list
+                          if c.kwargs.get('process') is False]
+        downloaded_urls = [c[0][0] for c in video_extracts]
+        self.assertEqual(len(mock_instance.process_ie_result.call_args_list), 2)
+        mock_instance.download.assert_not_called()
+
         self.assertIn('http://v1', downloaded_urls)
         self.assertIn('http://v3', downloaded_urls)
         self.assertNotIn('http://v2', downloaded_urls)
@@ -88,5 +88,78 @@ class TestPlaylistSelection(unittest.TestCase):
         self.assertTrue(done_call)
         self.assertIn('2/2', done_call[0][0][1]['msg'])
 
+    @patch('ydl_pool.yt_dlp.YoutubeDL')
+    def test_single_video_is_extracted_once(self, mock_ydl):
+        mock_instance = mock_ydl.return_value
+        mock_instance.__enter__.return_value = mock_instance
+        video_info = {
+            'id': 'v1', 'title': 'V1', 'webpage_url': 'http://v1',
+            'formats': [{'format_id': '22', 'height': 720, 'vcodec': 'avc1'}]
+        }
+        mock_instance.extract_info.return_value = video_info
+
+        run_downloader(MagicMock(), 'http://v1', '/tmp', '720', 'sid')
+
+        # Sadece ilk analiz; format seçimi ve indirme aynı bilgiyi kullanır
+        self.assertEqual(mock_instance.extract_info.call_count, 1)
+        mock_instance.process_ie_result.assert_called_once_with(video_info, download=True)
+
+    @patch('ydl_pool.yt_dlp.YoutubeDL')
+    def test_run_downloader_concurrent(self, mock_ydl):
+        mock_instance = mock_ydl.return_value
+        mock_instance.__enter__.return_value = mock_instance
+        mock_instance.extract_info.return_value = {
+            'entries': [{'url': f'http://v{i}', 'title': f'V{i}'} for i in range(1, 6)],
+            'title': 'Test Playlist'
+        }
+        mock_socket = MagicMock()
+
+        with patch.object(ydl_pool, 'lease', wraps=ydl_pool.lease) as lease:
+            run_downloader(mock_socket, 'http://playlist', '/tmp', '720', 'sid', workers=3)
+
+        downloaded_urls = sorted(c[0][0] for c in mock_instance.extract_info.call_args_list
+                                 if c.kwargs.get('process') is False)
+        self.assertEqual(downloaded_urls, [f'http://v{i}' for i in range(1, 6)])
+
+        # Dosya isimlendirmesi (NN - title) işçi sayısından bağımsız olmalı
+        outtmpls = sorted(c[0][0]['outtmpl'] for c in lease.call_args_list if 'outtmpl' in c[0][0])
+        self.assertTrue(outtmpls[0].endswith('01 - %(title)s.%(ext)s'))
+        self.assertTrue(outtmpls[-1].endswith('05 - %(title)s.%(ext)s'))
+
+        done_call = [c for c in mock_socket.emit.call_args_list if c[0][0] == 'done']
+        self.assertIn('5/5', done_call[0][0][1]['msg'])
+
+    def test_handler_aggregates_inflight_items(self):
+        mock_socket = MagicMock()
+        handler = DownloadHandler(mock_socket, 'sid', playlist_total=4, broadcaster=ProgressBroadcaster())
+
+        handler.make_hook(1)({'status': 'downloading', 'downloaded_bytes': 50, 'total_bytes': 100})
+        handler.make_hook(2)({'status': 'downloading', 'downloaded_bytes': 25, 'total_bytes': 100})
+        handler.complete(3)
+
+        # (50 + 25 + 100 + 0) / 4
+        self.assertEqual(handler.playlist_percent(), 43.8)
+        handler.flush()
+        event, batch = mock_socket.emit.call_args_list[-1][0]
+        self.assertEqual(event, 'progress_batch')
+        self.assertEqual([item['playlist_index'] for item in batch['items']], [1, 2])
+
+
+    @patch('ydl_pool.yt_dlp.YoutubeDL')
+    def test_preview_then_download_reuses_flat_extraction(self, mock_ydl):
+        mock_instance = mock_ydl.return_value
+        mock_instance.__enter__.return_value = mock_instance
+        mock_instance.extract_info.return_value = {
+            'entries': [{'url': 'http://v1', 'title': 'V1'}, {'url': 'http://v2', 'title': 'V2'}],
+            'title': 'Test Playlist'
+        }
+
+        fetch_metadata('http://playlist')
+        run_downloader(MagicMock(), 'http://playlist', '/tmp', '720', 'sid')
+
+        flat_calls = [c for c in mock_instance.extract_info.call_args_list if 'process' not in c.kwargs]
+        self.assertEqual(len(flat_calls), 1)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from progress import ProgressBroadcaster, merge_batch, BASE_INTERVAL, MAX_INTERVAL, JOBS_PER_STEP
+from scheduler import Job, JobChannel
+
+
+def item(percent, speed='1.0 MB/s'):
+    return {'status': 'downloading', 'title': 'V1', 'thumbnail': 'http://t', 'is_playlist': True,
+            'playlist_total': 3, 'playlist_index': 1, 'percent': percent, 'speed': speed}
+
+
+class TestProgressBroadcaster(unittest.TestCase):
+    def setUp(self):
+        self.socket = MagicMock()
+        self.broadcaster = ProgressBroadcaster()
+        self.broadcaster.register(self.socket, 'room')
+
+    def batches(self):
+        return [c[0][1]['items'] for c in self.socket.emit.call_args_list if c[0][0] == 'progress_batch']
+
+    def test_updates_are_coalesced_per_tick(self):
+        for p in (10, 20, 30):
+            self.broadcaster.publish(self.socket, 'room', 1, item(p))
+        self.broadcaster.publish(self.socket, 'room', 2, dict(item(5), playlist_index=2))
+        self.broadcaster.flush()
+
+        batches = self.batches()
+        self.assertEqual(len(batches), 1)
+        self.assertEqual([(i['key'], i['percent']) for i in batches[0]], [(1, 30), (2, 5)])
+        # Arka plan döngüsü yalnızca bir kez başlatılır
+        self.assertEqual(self.socket.start_background_task.call_count, 1)
+
+    def test_static_fields_sent_once(self):
+        self.broadcaster.publish(self.socket, 'room', 1, item(10))
+        self.broadcaster.flush()
+        self.broadcaster.publish(self.socket, 'room', 1, item(20))
+        self.broadcaster.flush()
+        self.broadcaster.publish(self.socket, 'room', 1, item(20))
+        self.broadcaster.flush()
+
+        first, second = self.batches()
+        self.assertEqual(first[0]['title'], 'V1')
+        self.assertEqual(second, [{'key': 1, 'percent': 20}])
+
+        state = {}
+        merge_batch(state, {'items': first})
+        merged = merge_batch(state, {'items': second})
+        self.assertEqual(merged, dict(item(20), key=1))
+
+    def test_interval_adapts_to_active_jobs(self):
+        self.assertEqual(self.broadcaster.interval(), BASE_INTERVAL)
+        for i in range(JOBS_PER_STEP):
+            self.broadcaster.register(self.socket, f'room{i}')
+        self.assertGreater(self.broadcaster.interval(), BASE_INTERVAL)
+        for i in range(100):
+            self.broadcaster.register(self.socket, f'more{i}')
+        self.assertEqual(self.broadcaster.interval(), MAX_INTERVAL)
+
+    def test_job_channel_keeps_full_state_for_reattach(self):
+        job = Job('u', {'url': 'http://v'})
+        channel = JobChannel(self.socket, job)
+        self.broadcaster.register(channel, job.room)
+        self.broadcaster.publish(channel, job.room, 1, item(10))
+        self.broadcaster.flush()
+        self.broadcaster.publish(channel, job.room, 1, item(50))
+        self.broadcaster.unregister(job.room)
+
+        self.assertEqual(job.last_events['progress']['percent'], 50)
+        self.assertEqual(job.last_events['progress']['title'], 'V1')
+
+
+if __name__ == '__main__':
+    unittest.main()
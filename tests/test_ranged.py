@@ -0,0 +1,143 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import re
+import json
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp
+import ranged
+from ranged import split_ranges
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 MB
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    ranges = []
+    support_ranges = True
+
+    def do_GET(self):
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range') or '')
+        if not (match and self.support_ranges):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(PAYLOAD)))
+            self.end_headers()
+            self.wfile.write(PAYLOAD)
+            return
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else len(PAYLOAD) - 1
+        type(self).ranges.append((start, end))
+        self.send_response(206)
+        self.send_header('Content-Range', f'bytes {start}-{end}/{len(PAYLOAD)}')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(PAYLOAD[start:end + 1])
+
+    def log_message(self, *args):
+        pass
+
+
+@patch('ranged.MIN_PART_SIZE', 64 * 1024)
+class TestParallelDownload(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_address[1]}/video.mp4'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        RangeHandler.ranges = []
+        RangeHandler.support_ranges = True
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'video.mp4')
+        self.events = []
+        self.ydl = yt_dlp.YoutubeDL({'quiet': True, 'concurrent_fragment_downloads': 4,
+                                     'progress_hooks': [self.events.append]})
+        ranged.install(self.ydl, self.events.append)
+
+    def tearDown(self):
+        self.ydl.close()
+        self.tmp.cleanup()
+
+    def info(self):
+        return {'url': self.url, 'filesize': len(PAYLOAD), 'ext': 'mp4', 'format_id': '18', 'http_headers': {}}
+
+    def test_split_ranges(self):
+        self.assertEqual(split_ranges(1000, 1), [[0, 999]])
+        parts = split_ranges(1024 * 1024, 4)
+        self.assertEqual(len(parts), 4)
+        self.assertEqual(parts[0][0], 0)
+        self.assertEqual(parts[-1][1], 1024 * 1024 - 1)
+
+    def test_ranges_are_fetched_in_parallel_and_reassembled(self):
+        success, real_download = self.ydl.dl(self.path, self.info())
+
+        self.assertTrue(success and real_download)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), PAYLOAD)
+        # Tek baytlık sınama isteği + 4 parça
+        self.assertEqual(RangeHandler.ranges[0], (0, 0))
+        self.assertEqual(len(RangeHandler.ranges), 5)
+        self.assertFalse(os.path.exists(self.path + '.part.ranges'))
+
+        downloading = [e['downloaded_bytes'] for e in self.events if e['status'] == 'downloading']
+        self.assertEqual(downloading, sorted(downloading))
+        self.assertEqual(downloading[-1], len(PAYLOAD))
+        self.assertTrue(all(e['total_bytes'] == len(PAYLOAD) for e in self.events))
+        self.assertEqual(self.events[-1]['status'], 'finished')
+
+    def test_interrupted_parts_resume_from_state(self):
+        parts = [{'start': s, 'end': e, 'done': 0} for s, e in split_ranges(len(PAYLOAD), 2)]
+        parts[0]['done'] = parts[0]['end'] + 1  # ilk yarı önceki çalıştırmada bitti
+        tmpfile = self.path + '.part'
+        with open(tmpfile, 'wb') as f:
+            f.write(PAYLOAD[:parts[0]['done']] + b'\0' * (len(PAYLOAD) - parts[0]['done']))
+        with open(tmpfile + '.ranges', 'w') as f:
+            json.dump({'total': len(PAYLOAD), 'parts': parts}, f)
+
+        self.ydl.dl(self.path, self.info())
+
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), PAYLOAD)
+        # Yalnızca sınama isteği ve eksik ikinci yarı
+        self.assertEqual(RangeHandler.ranges[1:], [(parts[1]['start'], parts[1]['end'])])
+
+    def test_single_connection_part_is_kept(self):
+        # Tek bağlantılı indirmeden kalan .part (durum dosyası yok): baştaki baytlar korunur
+        kept = 300 * 1024
+        with open(self.path + '.part', 'wb') as f:
+            f.write(PAYLOAD[:kept])
+
+        self.ydl.dl(self.path, self.info())
+
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), PAYLOAD)
+        fetched = sum(end - start + 1 for start, end in RangeHandler.ranges[1:])
+        self.assertEqual(fetched, len(PAYLOAD) - kept)
+
+    def test_falls_back_when_ranges_are_not_supported(self):
+        RangeHandler.support_ranges = False
+        success, _ = self.ydl.dl(self.path, self.info())
+
+        self.assertTrue(success)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), PAYLOAD)
+
+    def test_single_connection_uses_default_downloader(self):
+        self.ydl.params['concurrent_fragment_downloads'] = 1
+        self.ydl.dl(self.path, self.info())
+        self.assertLessEqual(len(RangeHandler.ranges), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
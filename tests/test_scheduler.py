@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from scheduler import Job, JobScheduler
+
+
+class FakeSocketIO:
+    """Arka plan görevlerini elle çalıştırmak için kaydeden sahte socketio."""
+
+    def __init__(self):
+        self.tasks = []
+        self.emit = MagicMock()
+
+    def start_background_task(self, target, *args):
+        self.tasks.append((target, args))
+
+    def sleep(self, seconds=0):
+        pass
+
+    def run_next(self):
+        target, args = self.tasks.pop(0)
+        target(*args)
+
+
+class TestJobScheduler(unittest.TestCase):
+    def setUp(self):
+        self.socketio = FakeSocketIO()
+        self.started = []
+
+        def runner(channel, job):
+            self.started.append(job.params['url'])
+            channel.emit('done', {'msg': 'ok'})
+
+        self.scheduler = JobScheduler(self.socketio, runner, max_active=1)
+
+    def submit(self, owner, url, priority=0):
+        return self.scheduler.submit(Job(owner, {'url': url}, priority))
+
+    def test_global_cap(self):
+        first = self.submit('a', 'u1')
+        second = self.submit('b', 'u2')
+        self.assertEqual(len(self.socketio.tasks), 1)
+        self.assertEqual(first.status, 'running')
+        self.assertEqual(self.scheduler.position(second), 1)
+
+        self.socketio.run_next()
+        self.assertEqual(first.status, 'done')
+        self.assertEqual(second.status, 'running')
+
+    def test_fairness_between_owners(self):
+        self.submit('big', 'p1')
+        self.submit('big', 'p2')
+        self.submit('big', 'p3')
+        self.submit('small', 'v1')
+
+        while self.socketio.tasks:
+            self.socketio.run_next()
+        # 'small' kullanıcısı, 'big' kullanıcısının tüm kuyruğunu beklemez
+        self.assertEqual(self.started, ['p1', 'v1', 'p2', 'p3'])
+
+    def test_priority_orders_only_own_jobs(self):
+        self.submit('a', 'running')
+        self.submit('a', 'low')
+        self.submit('a', 'high', priority=3)
+        while self.socketio.tasks:
+            self.socketio.run_next()
+        self.assertEqual(self.started, ['running', 'high', 'low'])
+
+    def test_priority_does_not_starve_other_owners(self):
+        self.submit('greedy', 'g1', priority=5)
+        self.submit('greedy', 'g2', priority=5)
+        self.submit('greedy', 'g3', priority=5)
+        self.submit('polite', 'p1')
+        while self.socketio.tasks:
+            self.socketio.run_next()
+        self.assertEqual(self.started, ['g1', 'p1', 'g2', 'g3'])
+
+    def test_events_are_kept_for_reattach(self):
+        job = self.submit('a', 'u1')
+        self.socketio.run_next()
+
+        snapshot = self.scheduler.get(job.id).snapshot()
+        self.assertEqual(snapshot['status'], 'done')
+        self.assertEqual(snapshot['events']['done'], {'msg': 'ok', 'job_id': job.id})
+        self.socketio.emit.assert_any_call('done', {'msg': 'ok', 'job_id': job.id}, to=job.room)
+
+    def test_runner_crash_marks_error_and_frees_slot(self):
+        self.scheduler.runner = MagicMock(side_effect=RuntimeError('boom'))
+        first = self.submit('a', 'u1')
+        second = self.submit('a', 'u2')
+        self.socketio.run_next()
+        self.assertEqual(first.status, 'error')
+        self.assertEqual(second.status, 'running')
+
+
+class TestResumeProcess(unittest.TestCase):
+
+    def test_only_the_reloader_child_resumes_jobs(self):
+        # app eventlet monkey patch yaptığı için ayrı yorumlayıcıda denenir
+        script = "import app; print(app.serving_process(True), app.serving_process(False))"
+        results = {}
+        for run_main in ('', 'true'):
+            env = dict(os.environ, WERKZEUG_RUN_MAIN=run_main)
+            out = subprocess.run([sys.executable, '-W', 'ignore', '-c', script], cwd=ROOT,
+                                 capture_output=True, text=True, timeout=60, env=env)
+            results[run_main] = out.stdout.split()
+        self.assertEqual(results, {'': ['False', 'True'], 'true': ['True', 'True']})
+
+
+if __name__ == '__main__':
+    unittest.main()
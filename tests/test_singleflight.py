@@ -0,0 +1,178 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+import time
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import downloader
+import ydl_pool
+from singleflight import FlightRegistry, flights, materialize
+from journal import MemoryArchive
+
+
+class TestMaterialize(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, 'a', 'video.mp4')
+        os.makedirs(os.path.dirname(self.src))
+        with open(self.src, 'wb') as f:
+            f.write(b'video' * 100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_hardlink_into_new_folder(self):
+        dst = os.path.join(self.tmp.name, 'b', 'video.mp4')
+        self.assertEqual(materialize(self.src, dst), 'hardlink')
+        self.assertTrue(os.path.samefile(self.src, dst))
+
+    def test_copy_when_links_are_not_possible(self):
+        dst = os.path.join(self.tmp.name, 'copy.mp4')
+        with patch('singleflight.os.link', side_effect=OSError('EXDEV')), \
+                patch('singleflight._reflink', side_effect=OSError('EOPNOTSUPP')):
+            self.assertEqual(materialize(self.src, dst), 'copy')
+        self.assertEqual(self.read(dst), self.read(self.src))
+        self.assertFalse(os.path.exists(dst + '.link'))
+
+    def test_same_or_existing_target_is_left_alone(self):
+        self.assertEqual(materialize(self.src, self.src), 'same')
+        dst = os.path.join(self.tmp.name, 'done.mp4')
+        materialize(self.src, dst)
+        self.assertEqual(materialize(self.src, dst), 'exists')
+
+
+class TestFlightRegistry(unittest.TestCase):
+
+    def test_second_request_joins_and_sees_result(self):
+        registry = FlightRegistry()
+        leader, is_leader = registry.begin(('v', '720p/mp4'))
+        follower, is_follower_leader = registry.begin(('v', '720p/mp4'))
+        self.assertTrue(is_leader)
+        self.assertFalse(is_follower_leader)
+        self.assertIs(leader, follower)
+
+        registry.finish(leader, True, {'id': 'v'}, '/x.mp4')
+        self.assertTrue(follower.wait(0))
+        self.assertEqual(registry.active(), [])
+        # Bitmiş uçuşa katılınmaz, yeni istek yeniden lider olur
+        self.assertTrue(registry.begin(('v', '720p/mp4'))[1])
+
+    def test_requests_without_key_are_not_shared(self):
+        registry = FlightRegistry()
+        self.assertTrue(registry.begin(None)[1])
+        self.assertTrue(registry.begin(None)[1])
+
+
+@patch('downloader.journal', None)
+@patch('downloader.disk_cache', None)
+class TestSharedDownload(unittest.TestCase):
+
+    def setUp(self):
+        ydl_pool.ydl_pool.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.entry = {'id': 'v', 'url': 'http://v', 'title': 'Video',
+                      'formats': [{'format_id': '18', 'url': 'http://s', 'height': 720}]}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def handler(self):
+        handler = MagicMock()
+        handler.limiter.limited.return_value = False
+        return handler
+
+    def test_concurrent_requests_share_one_transfer(self):
+        key = ('v', downloader.archive_format('720'))
+        folder_a = os.path.join(self.tmp.name, 'a')
+        folder_b = os.path.join(self.tmp.name, 'b')
+        os.makedirs(folder_a)
+
+        with patch('ydl_pool.yt_dlp.YoutubeDL') as mock_ydl:
+            mock_instance = mock_ydl.return_value
+            mock_instance.prepare_filename.side_effect = lambda info, outtmpl=None: (
+                outtmpl.replace('%(title)s', info['title']).replace('%(ext)s', info['ext']))
+
+            def process(info, download=True):
+                # Diğer istek katılana kadar bekle, sonra ortak ilerlemeyi yayınla
+                while len(flights.flights[key].hooks) < 2:
+                    time.sleep(0.01)
+                progress = mock_ydl.call_args[0][0]['progress_hooks'][0]
+                progress({'status': 'downloading', 'downloaded_bytes': 10})
+                path = os.path.join(folder_a, 'Video.mp4')
+                with open(path, 'wb') as f:
+                    f.write(b'data')
+                return dict(info, requested_downloads=[{'filepath': path}])
+
+            mock_instance.process_ie_result.side_effect = process
+            leader, follower = self.handler(), self.handler()
+            results = {}
+            thread = threading.Thread(target=lambda: results.update(
+                a=downloader.download_entry(self.entry, 1, folder_a, '720', 1, leader)))
+            thread.start()
+            while key not in flights.flights:
+                time.sleep(0.01)
+            results['b'] = downloader.download_entry(self.entry, 1, folder_b, '720', 1, follower)
+            thread.join()
+
+        self.assertEqual(results, {'a': True, 'b': True})
+        self.assertEqual(mock_instance.process_ie_result.call_count, 1)
+        follower.make_hook.assert_called_once_with(1, throttle=False)
+        follower.make_hook.return_value.assert_called_once_with({'status': 'downloading', 'downloaded_bytes': 10})
+        self.assertTrue(os.path.samefile(os.path.join(folder_a, 'Video.mp4'), os.path.join(folder_b, 'Video.mp4')))
+
+    def test_archived_file_in_other_folder_is_linked(self):
+        source = os.path.join(self.tmp.name, 'old', 'Video.mp4')
+        os.makedirs(os.path.dirname(source))
+        with open(source, 'wb') as f:
+            f.write(b'data')
+        journal = MagicMock()
+        journal.archived_path.return_value = source
+
+        with patch('downloader.journal', journal), patch('ydl_pool.yt_dlp.YoutubeDL') as mock_ydl:
+            mock_instance = mock_ydl.return_value
+            mock_instance.prepare_filename.side_effect = lambda info, outtmpl=None: (
+                outtmpl.replace('%(title)s', info['title']).replace('%(ext)s', info['ext']))
+            ok = downloader.download_entry(self.entry, 1, os.path.join(self.tmp.name, 'new'), '720', 1,
+                                           self.handler())
+
+        self.assertTrue(ok)
+        mock_instance.process_ie_result.assert_not_called()
+        self.assertTrue(os.path.samefile(source, os.path.join(self.tmp.name, 'new', 'Video.mp4')))
+
+    @patch('downloader.memory_archive', MemoryArchive())
+    def test_finished_file_is_linked_without_journal(self):
+        # Günlük kapalıyken de bu süreçte indirilen dosya tekrar indirilmez
+        folder_a = os.path.join(self.tmp.name, 'a')
+        folder_b = os.path.join(self.tmp.name, 'b')
+        os.makedirs(folder_a)
+
+        with patch('ydl_pool.yt_dlp.YoutubeDL') as mock_ydl:
+            mock_instance = mock_ydl.return_value
+            mock_instance.prepare_filename.side_effect = lambda info, outtmpl=None: (
+                outtmpl.replace('%(title)s', info['title']).replace('%(ext)s', info['ext']))
+
+            def process(info, download=True):
+                path = os.path.join(folder_a, 'Video.mp4')
+                with open(path, 'wb') as f:
+                    f.write(b'data')
+                return dict(info, requested_downloads=[{'filepath': path}])
+
+            mock_instance.process_ie_result.side_effect = process
+            for folder in (folder_a, folder_b, folder_a):
+                self.assertTrue(downloader.download_entry(self.entry, 1, folder, '720', 1, self.handler()))
+
+        self.assertEqual(mock_instance.process_ie_result.call_count, 1)
+        self.assertTrue(os.path.samefile(os.path.join(folder_a, 'Video.mp4'), os.path.join(folder_b, 'Video.mp4')))
+
+
+if __name__ == '__main__':
+    unittest.main()
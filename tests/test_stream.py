@@ -0,0 +1,164 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stream import PlaylistStream, open_stream, close_stream, live_stream
+from downloader import stream_metadata, run_downloader
+from cache import metadata_cache
+from ydl_pool import ydl_pool
+
+
+def entries(start, stop):
+    return [{'url': f'http://v{i}', 'id': f'v{i}', 'title': f'V{i}'} for i in range(start, stop)]
+
+
+class TestPlaylistStream(unittest.TestCase):
+
+    def test_consumer_waits_for_pages(self):
+        stream = PlaylistStream('http://playlist')
+        stream.add(entries(1, 3))
+        seen = []
+
+        consumer = threading.Thread(target=lambda: seen.extend(i for i, _ in stream.iter_entries()))
+        consumer.start()
+        stream.add([None] + entries(4, 5))
+        stream.finish()
+        consumer.join(timeout=2)
+
+        self.assertFalse(consumer.is_alive())
+        # Ham sıra korunur; erişilemeyen öğe de bir index tüketir
+        self.assertEqual(seen, [1, 2, 3, 4])
+        self.assertEqual(stream.count(), 3)
+
+    def test_registry_is_single_per_url(self):
+        stream = open_stream('https://www.youtube.com/playlist?list=PL1')
+        try:
+            self.assertIsNone(open_stream('https://youtube.com/playlist?list=PL1'))
+            self.assertIs(live_stream('https://www.youtube.com/playlist?list=PL1&utm_source=x'), stream)
+        finally:
+            close_stream(stream)
+        self.assertIsNone(live_stream('https://www.youtube.com/playlist?list=PL1'))
+
+
+class TestStreamMetadata(unittest.TestCase):
+
+    def setUp(self):
+        metadata_cache.clear()
+        ydl_pool.clear()
+
+    @patch('ydl_pool.yt_dlp.YoutubeDL')
+    def test_pages_are_pushed_as_discovered(self, mock_ydl):
+        pulled = []
+
+        def lazy():
+            for entry in entries(1, 6):
+                pulled.append(entry['id'])
+                yield entry
+
+        mock_instance = mock_ydl.return_value
+        mock_instance.extract_info.return_value = {'title': 'Big', 'entries': lazy()}
+
+        pages = []
+
+        def on_page(page):
+            # Sayfa gönderildiğinde generator yalnızca o sayfa kadar ilerlemiş olmalı
+            pages.append((page, len(pulled)))
+
+        result = stream_metadata('http://big', on_page, page_size=2)
+
+        self.assertEqual([len(p['entries']) for p, _ in pages], [2, 2, 1])
+        self.assertEqual([pulled_at for _, pulled_at in pages], [2, 4, 5])
+        self.assertEqual([p['offset'] for p, _ in pages], [0, 2, 4])
+        self.assertEqual(pages[2][0]['entries'][0]['index'], 5)
+        self.assertTrue(result['done'])
+        self.assertEqual(result['total'], 5)
+        mock_ydl.assert_called_once()
+
+        # Tam liste önbellekte; sonraki çağrı tek parça döner ve ağa çıkmaz
+        mock_instance.extract_info.reset_mock()
+        again = stream_metadata('http://big', on_page)
+        self.assertEqual(len(again['entries']), 5)
+        mock_instance.extract_info.assert_not_called()
+        self.assertIsNone(live_stream('http://big'))
+
+    @patch('ydl_pool.yt_dlp.YoutubeDL')
+    def test_url_redirect_is_not_cached_as_video(self, mock_ydl):
+        stub = {'_type': 'url', 'url': 'https://www.youtube.com/watch?v=abc', 'ie_key': 'Youtube'}
+        video = {'id': 'abc', 'title': 'Real', 'webpage_url': 'https://www.youtube.com/watch?v=abc'}
+        mock_ydl.return_value.extract_info.side_effect = (
+            lambda url, download=False, process=True: video if process else stub)
+
+        result = stream_metadata('https://youtu.be/abc', MagicMock())
+
+        self.assertEqual(result['type'], 'video')
+        self.assertEqual((result['entry']['id'], result['title']), ('abc', 'Real'))
+        self.assertEqual(metadata_cache.get('https://youtu.be/abc')['id'], 'abc')
+
+    @patch('ydl_pool.yt_dlp.YoutubeDL')
+    def test_single_video_falls_back_to_full_result(self, mock_ydl):
+        mock_instance = mock_ydl.return_value
+        mock_instance.extract_info.return_value = {'id': 'abc', 'title': 'Solo', 'webpage_url': 'http://solo'}
+
+        on_page = MagicMock()
+        result = stream_metadata('http://solo', on_page)
+
+        self.assertEqual(result['type'], 'video')
+        on_page.assert_not_called()
+
+
+class TestDownloadWhileStreaming(unittest.TestCase):
+
+    def setUp(self):
+        metadata_cache.clear()
+
+    @patch('downloader.download_entry')
+    def test_downloads_start_before_enumeration_finishes(self, mock_download):
+        stream = open_stream('http://live')
+        stream.title = 'Live'
+        stream.add(entries(1, 3))
+        started = threading.Event()
+
+        def download(entry, *args, **kwargs):
+            started.set()
+            return True
+        mock_download.side_effect = download
+
+        mock_socket = MagicMock()
+        worker = threading.Thread(target=run_downloader,
+                                  args=(mock_socket, 'http://live', '/tmp', '720', 'sid'),
+                                  kwargs={'workers': 2})
+        try:
+            worker.start()
+            self.assertTrue(started.wait(timeout=2))
+            stream.add(entries(3, 5))
+            stream.finish()
+            worker.join(timeout=5)
+        finally:
+            close_stream(stream)
+
+        self.assertFalse(worker.is_alive())
+        downloaded = sorted(c.args[0]['id'] for c in mock_download.call_args_list)
+        self.assertEqual(downloaded, ['v1', 'v2', 'v3', 'v4'])
+        done = [c for c in mock_socket.emit.call_args_list if c.args[0] == 'done']
+        self.assertIn('4/4', done[0].args[1]['msg'])
+
+    @patch('downloader.download_entry', return_value=True)
+    def test_selection_applies_to_streamed_entries(self, mock_download):
+        stream = open_stream('http://live-sel')
+        stream.add(entries(1, 4))
+        stream.finish()
+        try:
+            run_downloader(MagicMock(), 'http://live-sel', '/tmp', '720', 'sid', selected_indices=[2, 3])
+        finally:
+            close_stream(stream)
+
+        downloaded = [c.args[0]['id'] for c in mock_download.call_args_list]
+        self.assertEqual(downloaded, ['v2', 'v3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+import tempfile
+import threading
+import time
+import subprocess
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import thumbnails
+from thumbnails import ThumbnailCache, pick_thumbnail, thumb_id
+
+
+class TestPickThumbnail(unittest.TestCase):
+
+    def test_smallest_variant_covering_display_width(self):
+        info = {'thumbnail': 'http://t/max.jpg', 'thumbnails': [
+            {'url': 'http://t/120.jpg', 'width': 120},
+            {'url': 'http://t/336.jpg', 'width': 336},
+            {'url': 'http://t/1280.jpg', 'width': 1280}]}
+        self.assertEqual(pick_thumbnail(info), 'http://t/336.jpg')
+
+    @patch('thumbnails.Image', None)
+    def test_youtube_variant_is_shrunk_without_pillow(self):
+        info = {'thumbnail': 'https://i.ytimg.com/vi/abc/maxresdefault.jpg'}
+        self.assertEqual(pick_thumbnail(info), 'https://i.ytimg.com/vi/abc/mqdefault.jpg')
+        self.assertIsNone(pick_thumbnail({}))
+
+
+class TestThumbnailCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.fetch = MagicMock(side_effect=lambda url: (b'x' * 100, 'image/jpeg'))
+        self.cache = ThumbnailCache(self.tmp.name, 250, fetch=self.fetch)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def register(self, name):
+        return self.cache.register({'thumbnail': f'http://t/{name}.jpg'})
+
+    def test_fetched_once_then_served_from_disk(self):
+        key = self.register('a')
+        self.assertEqual(key, thumb_id('http://t/a.jpg'))
+
+        path = self.cache.get(key)
+        self.assertEqual(self.cache.get(key), path)
+        self.fetch.assert_called_once_with('http://t/a.jpg')
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'x' * 100)
+
+    def test_unknown_or_malformed_ids(self):
+        self.assertIsNone(self.cache.get('0' * 16))
+        self.assertIsNone(self.cache.get('../../etc/passwd'))
+        self.fetch.assert_not_called()
+
+    def test_least_recently_used_is_evicted(self):
+        a, b, c = self.register('a'), self.register('b'), self.register('c')
+        self.cache.get(a)
+        self.cache.get(b)
+        self.cache.get(a)  # a tekrar istendi; en eski kullanılan b
+        self.cache.get(c)
+
+        self.assertEqual(self.cache.stats(), {'files': 2, 'bytes': 200})
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), sorted([f'{a}.jpg', f'{c}.jpg']))
+
+        # Yeniden başlatmada diskteki kapaklar korunur
+        reloaded = ThumbnailCache(self.tmp.name, 250, fetch=self.fetch)
+        self.assertEqual(reloaded.stats(), {'files': 2, 'bytes': 200})
+        self.assertTrue(reloaded.get(a).endswith(f'{a}.jpg'))
+
+    def test_concurrent_requests_share_one_fetch(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_fetch(url):
+            started.set()
+            release.wait(5)
+            return b'x' * 100, 'image/jpeg'
+
+        self.fetch.side_effect = slow_fetch
+        key = self.register('a')
+        results = []
+        leader = threading.Thread(target=lambda: results.append(self.cache.get(key)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(self.cache.get(key)))
+        follower.start()
+        time.sleep(0.05)
+        self.assertEqual(self.cache.flights.active(), [key])
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(len(set(results)), 1)
+        self.fetch.assert_called_once()
+
+    def test_concurrent_requests_under_tpool_do_not_hang(self):
+        # Monkey patch süreç geneli olduğu için ayrı bir yorumlayıcıda denenir;
+        # indirme gerçek tpool thread'inde, bekleyen istekler hub'da
+        script = textwrap.dedent("""
+            import time, threading
+            import eventlet
+            import app
+
+            calls = []
+            def fetch(url):
+                calls.append(threading.current_thread().name)
+                time.sleep(0.2)
+                return b'x' * 100, 'image/jpeg'
+
+            app.thumbnail_cache.fetch = fetch
+            key = app.thumbnail_cache.register({'thumbnail': 'http://t/a.jpg'})
+            client = app.app.test_client()
+            threads = [eventlet.spawn(lambda: client.get(f'/thumb/{key}').status_code) for _ in range(3)]
+            with eventlet.Timeout(10):
+                codes = [t.wait() for t in threads]
+            print(len(calls), codes.count(200), calls[0] != 'MainThread')
+        """)
+        with tempfile.TemporaryDirectory() as folder:
+            out = subprocess.run([sys.executable, '-W', 'ignore', '-c', script], cwd=ROOT, capture_output=True,
+                                 text=True, timeout=60,
+                                 env=dict(os.environ, YTD_EXEC_MODE='thread', YTD_THUMB_CACHE=folder))
+        self.assertEqual(out.stdout.split(), ['1', '3', 'True'], out.stderr[-2000:])
+
+    def test_non_image_is_rejected(self):
+        self.fetch.side_effect = lambda url: (b'<html>', 'text/html')
+        with self.assertRaises(ValueError):
+            self.cache.get(self.register('a'))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+class TestThumbnailPayloads(unittest.TestCase):
+
+    def test_progress_refers_to_thumbnail_by_id(self):
+        import downloader
+        broadcaster = MagicMock()
+        handler = downloader.DownloadHandler(MagicMock(), 'sid', 1, broadcaster=broadcaster,
+                                             limiter=MagicMock())
+        info = {'title': 'V', 'thumbnail': 'http://t/v.jpg', 'format_id': '18'}
+        with patch.object(thumbnails.thumbnail_cache, 'register', return_value='abc') as register:
+            for n in (1, 2):
+                handler.hook({'status': 'downloading', 'downloaded_bytes': n, 'total_bytes': 10,
+                              'info_dict': info})
+
+        data = broadcaster.publish.call_args[0][3]
+        self.assertEqual(data['thumb_id'], 'abc')
+        self.assertNotIn('thumbnail', data)
+        register.assert_called_once_with(info)
+
+
+if __name__ == '__main__':
+    unittest.main()
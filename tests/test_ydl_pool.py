@@ -0,0 +1,86 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ydl_pool import YDLPool
+
+
+class FakeYDL:
+    created = 0
+
+    def __init__(self, params):
+        FakeYDL.created += 1
+        self.params = dict(params, outtmpl={'default': '%(title)s.%(ext)s'})
+        self.format_selector = None
+        self.closed = False
+
+    def dl(self, name, info, subtitle=False, test=False):
+        return True, True
+
+    def build_format_selector(self, spec):
+        return ('selector', spec)
+
+    def emit_progress(self, d):
+        for hook in self.params['progress_hooks']:
+            hook(d)
+
+    def close(self):
+        self.closed = True
+
+
+@patch('ydl_pool.yt_dlp.YoutubeDL', FakeYDL)
+class TestYDLPool(unittest.TestCase):
+
+    def setUp(self):
+        FakeYDL.created = 0
+        self.pool = YDLPool(size=2)
+
+    def test_instance_is_reused_for_same_static_options(self):
+        with self.pool.lease({'quiet': True, 'outtmpl': '/a/01 - %(title)s', 'format': '137+bestaudio/best'}) as first:
+            self.assertEqual(first.params['outtmpl']['default'], '/a/01 - %(title)s')
+            self.assertEqual(first.format_selector, ('selector', '137+bestaudio/best'))
+        with self.pool.lease({'quiet': True, 'outtmpl': '/a/02 - %(title)s', 'format': '22+bestaudio/best'}) as second:
+            self.assertIs(second, first)
+            self.assertEqual(second.params['outtmpl']['default'], '/a/02 - %(title)s')
+            self.assertEqual(second.format_selector, ('selector', '22+bestaudio/best'))
+        self.assertEqual(FakeYDL.created, 1)
+
+    def test_different_static_options_get_separate_instances(self):
+        with self.pool.lease({'quiet': True}) as a:
+            pass
+        with self.pool.lease({'quiet': True, 'extract_flat': True}) as b:
+            pass
+        self.assertIsNot(a, b)
+
+    def test_concurrent_leases_never_share_an_instance(self):
+        with self.pool.lease({'quiet': True}) as a, self.pool.lease({'quiet': True}) as b:
+            self.assertIsNot(a, b)
+        with self.pool.lease({'quiet': True}) as c, self.pool.lease({'quiet': True}) as d, \
+                self.pool.lease({'quiet': True}) as e:
+            self.assertEqual({id(c), id(d)}, {id(a), id(b)})
+        # Havuz boyutu 2: en son bırakılan örnek geri konmaz
+        self.assertEqual([x.closed for x in (c, d, e)].count(True), 1)
+
+    def test_hooks_follow_the_current_lease(self):
+        first, second = [], []
+        with self.pool.lease({'quiet': True, 'progress_hooks': [first.append]}) as ydl:
+            ydl.emit_progress({'n': 1})
+        with self.pool.lease({'quiet': True, 'progress_hooks': [second.append]}) as ydl:
+            ydl.emit_progress({'n': 2})
+        self.assertEqual(first, [{'n': 1}])
+        self.assertEqual(second, [{'n': 2}])
+
+    def test_failed_lease_is_discarded(self):
+        with self.assertRaises(RuntimeError):
+            with self.pool.lease({'quiet': True}) as broken:
+                raise RuntimeError('boom')
+        self.assertTrue(broken.closed)
+        with self.pool.lease({'quiet': True}) as fresh:
+            self.assertIsNot(fresh, broken)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+import io
+import os
+import re
+import time
+import hashlib
+import tempfile
+import urllib.request
+from collections import OrderedDict
+
+from executor import offload, real_lock
+from metrics import metrics
+from singleflight import FlightRegistry
+
+# Pillow isteğe bağlıdır: yoksa küçültme yapılmaz, küçük kapak varyantı seçilir
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+# Küçültülmüş kapakların tutulduğu klasör ve toplam boyut sınırı (aşılınca en eski kullanılan silinir)
+THUMB_CACHE_DIR = os.environ.get('YTD_THUMB_CACHE', os.path.join(tempfile.gettempdir(), 'ytd-thumbs'))
+THUMB_CACHE_MB = int(os.environ.get('YTD_THUMB_CACHE_MB', '64'))
+
+THUMB_WIDTH = 320               # arayüzdeki kapak alanının genişliği (piksel)
+THUMB_MAX_AGE = 7 * 24 * 3600   # tarayıcı önbellek süresi; kimlik URL'den türediği için içerik değişmez
+THUMB_MAX_FETCH = 5 * 1024 * 1024
+THUMB_INDEX_SIZE = 20000        # bellekte tutulan kimlik -> URL eşlemesi (büyük playlist önizlemeleri)
+FETCH_TIMEOUT = 10
+
+_ID_RE = re.compile(r'[0-9a-f]{16}')
+_FILE_RE = re.compile(r'([0-9a-f]{16})\.(jpg|webp|png|gif)')
+# i.ytimg.com büyük varyantları -> 320x180 'mqdefault'
+_YTIMG_RE = re.compile(r'/(?:maxresdefault|sddefault|hqdefault|hq720)(\.\w+)')
+_EXTENSIONS = {'image/jpeg': 'jpg', 'image/webp': 'webp', 'image/png': 'png', 'image/gif': 'gif'}
+
+
+def pick_thumbnail(info, width=THUMB_WIDTH):
+    """Gösterilecek genişliği karşılayan en küçük kapak URL'si; boyut bilinmiyorsa küçük varyant."""
+    thumbs = [t for t in info.get('thumbnails') or [] if t.get('url')]
+    fitting = [t for t in thumbs if (t.get('width') or 0) >= width]
+    if fitting:
+        return min(fitting, key=lambda t: t['width'])['url']
+    url = info.get('thumbnail') or (thumbs[-1]['url'] if thumbs else None)
+    if url and Image is None:
+        url = _YTIMG_RE.sub(r'/mqdefault\1', url)
+    return url
+
+
+def thumb_id(url):
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+
+
+def fetch_url(url):
+    """Kapağı indirir: (bayt, içerik türü)."""
+    request = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+    with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+        data = response.read(THUMB_MAX_FETCH + 1)
+        content_type = response.headers.get_content_type()
+    if len(data) > THUMB_MAX_FETCH:
+        raise ValueError("Kapak çok büyük.")
+    return data, content_type
+
+
+def downscale(data, content_type, width=THUMB_WIDTH):
+    """Pillow varsa kapağı genişliğe indirip JPEG yapar; yoksa olduğu gibi döner."""
+    if Image is None:
+        return data, content_type
+    with Image.open(io.BytesIO(data)) as image:
+        if image.width <= width and content_type == 'image/jpeg':
+            return data, content_type
+        image.thumbnail((width, width * 4))
+        out = io.BytesIO()
+        image.convert('RGB').save(out, 'JPEG', quality=85, optimize=True)
+    return out.getvalue(), 'image/jpeg'
+
+
+class ThumbnailCache:
+    """
+    Kapak önbelleği ve vekili: her kapak bir kez çekilip küçültülür ve diskte saklanır,
+    istemciler uzak CDN yerine /thumb/<kimlik> adresinden alır. Kimlik kapak URL'sinden
+    türer; ilerleme mesajlarında uzun URL yerine kısa kimlik gider.
+    Toplam boyut sınırı aşılınca en uzun süredir istenmeyen kapaklar silinir (LRU).
+    """
+
+    def __init__(self, folder, max_bytes, fetch=fetch_url):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.fetch = fetch
+        # register ilerleme hook'larından (OS thread) çağrılır
+        self.lock = real_lock()
+        self.urls = OrderedDict()   # kimlik -> uzak URL
+        self.files = OrderedDict()  # kimlik -> (dosya adı, boyut), en eski kullanılan başta
+        self.total = 0
+        # Aynı kapağa gelen eşzamanlı istekler tek indirmeyi bekler
+        self.flights = FlightRegistry()
+        self._load()
+
+    def _load(self):
+        """Önceki çalışmadan kalan kapaklar, son erişim sırasına göre."""
+        try:
+            names = os.listdir(self.folder)
+        except OSError:
+            return
+        found = []
+        for name in names:
+            match = _FILE_RE.fullmatch(name)
+            if match:
+                stat = os.stat(os.path.join(self.folder, name))
+                found.append((stat.st_atime, match.group(1), name, stat.st_size))
+        for _, key, name, size in sorted(found):
+            if key in self.files:
+                # Aynı kapağın eski biçimi (ör. Pillow sonradan kuruldu)
+                self._remove(key)
+            self.files[key] = (name, size)
+            self.total += size
+        with self.lock:
+            self._evict()
+
+    def register(self, info):
+        """Öğenin kapağını kaydeder ve kimliğini döner; kapak yoksa None."""
+        url = pick_thumbnail(info)
+        if not url:
+            return None
+        key = thumb_id(url)
+        with self.lock:
+            self.urls[key] = url
+            self.urls.move_to_end(key)
+            if len(self.urls) > THUMB_INDEX_SIZE:
+                self.urls.popitem(last=False)
+        return key
+
+    def get(self, key):
+        """
+        Kapağın yerel yolunu döner (gerekirse çekip saklar); bilinmeyen kimlikte None.
+        Hub üzerinden çağrılır: bekleme ve ortak indirme koordinasyonu hub'da kalır,
+        yalnızca çekme/küçültme/yazma offload ile OS thread'ine taşınır. (Takipçi
+        tpool thread'inde yeşil Event'i beklerse lider onu başka bir OS thread'inden
+        uyandıramaz ve istek sonsuza dek asılı kalır.)
+        """
+        if not _ID_RE.fullmatch(key or ''):
+            return None
+        with self.lock:
+            cached = self.files.get(key)
+            if cached:
+                self.files.move_to_end(key)
+            url = self.urls.get(key)
+        if cached:
+            path = os.path.join(self.folder, cached[0])
+            try:
+                # Son erişim zamanı (atime) yeniden başlatmada LRU sırasını korur;
+                # mtime değişmez, Last-Modified sabit kalır
+                os.utime(path, (time.time(), os.stat(path).st_mtime))
+                metrics.inc('ytd_thumbnail_requests_total', result='hit')
+                return path
+            except OSError:
+                with self.lock:
+                    self._drop(key)
+        if url is None:
+            return None
+
+        flight, leader = self.flights.begin(key)
+        if not leader:
+            flight.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.path
+        path, error = None, None
+        try:
+            path = offload(self._store, key, url)
+            metrics.inc('ytd_thumbnail_requests_total', result='miss')
+            return path
+        except Exception as e:
+            error = e
+            metrics.inc('ytd_thumbnail_requests_total', result='error')
+            raise
+        finally:
+            self.flights.finish(flight, error is None, path=path, error=error)
+
+    def _store(self, key, url):
+        data, content_type = self.fetch(url)
+        if content_type not in _EXTENSIONS:
+            raise ValueError(f"Kapak resim değil: {content_type}")
+        data, content_type = downscale(data, content_type)
+        name = f"{key}.{_EXTENSIONS[content_type]}"
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, name)
+        # Yarım yazılmış dosya sunulmasın
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self.lock:
+            self._drop(key)
+            self.files[key] = (name, len(data))
+            self.total += len(data)
+            self._evict()
+        return path
+
+    def _drop(self, key):
+        entry = self.files.pop(key, None)
+        if entry:
+            self.total -= entry[1]
+
+    def _evict(self):
+        # Yeni eklenen kapak tek başına sınırı aşsa bile tutulur
+        while self.total > self.max_bytes and len(self.files) > 1:
+            self._remove(next(iter(self.files)))
+
+    def _remove(self, key):
+        name = self.files[key][0]
+        self._drop(key)
+        try:
+            os.remove(os.path.join(self.folder, name))
+        except OSError:
+            pass
+
+    def stats(self):
+        with self.lock:
+            return {'files': len(self.files), 'bytes': self.total}
+
+
+# Süreç genelinde paylaşılan kapak önbelleği
+thumbnail_cache = ThumbnailCache(THUMB_CACHE_DIR, THUMB_CACHE_MB * 1024 * 1024)
@@ -2,13 +2,6 @@ import os
 import sys
 import subprocess
 
-# Tkinter import işlemi (Windows dosya seçimi için)
-try:
-    import tkinter as tk
-    from tkinter import filedialog
-except ImportError:
-    tk = None
-
 
 def get_default_path():
     """Kullanıcının varsayılan 'Downloads' klasörünü bulur."""
@@ -48,6 +41,13 @@ def open_folder_dialog():
             pass  # Zenity yoksa Tkinter'a düş
 
     # Windows veya Zenity olmayan sistemler için Tkinter
+    # (yalnızca gerektiğinde yüklenir; açılışı yavaşlatmasın)
+    try:
+        import tkinter as tk
+        from tkinter import filedialog
+    except ImportError:
+        tk = None
+
     if tk:
         try:
             root = tk.Tk()
@@ -0,0 +1,114 @@
+import os
+import json
+import atexit
+from contextlib import contextmanager
+
+import yt_dlp
+
+from metrics import metrics
+from executor import real_lock
+import ranged
+
+
+# Ayar seti başına bekletilen en fazla hazır YoutubeDL örneği (0 = havuz kapalı)
+POOL_SIZE = int(os.environ.get('YTD_YDL_POOL', '8'))
+
+# Öğeden öğeye değişen ayarlar; havuz anahtarına girmez, her kiralamada örneğe uygulanır
+LEASE_KEYS = ('outtmpl', 'format', 'progress_hooks', 'postprocessor_hooks', 'download_ranges')
+
+
+def _opts_key(opts):
+    return json.dumps(opts, sort_keys=True, default=repr)
+
+
+class _Hooks:
+    """Havuzdaki örneğe bir kez bağlanan hook'lar; her kiralamada hedefleri değişir."""
+
+    def __init__(self):
+        self.progress = []
+        self.postprocess = []
+
+    def on_progress(self, d):
+        for hook in self.progress:
+            hook(d)
+
+    def on_postprocess(self, d):
+        for hook in self.postprocess:
+            hook(d)
+
+
+class YDLPool:
+    """
+    Ayar setine göre anahtarlanan, yeniden kullanılabilir YoutubeDL örnekleri.
+    Her yeni örnek extractor'ları, çerez kavanozunu ve HTTP işleyicilerini baştan kurar;
+    havuzdan gelen örnek ise bunları ve açık (keep-alive) bağlantılarını korur.
+    Bir örnek aynı anda yalnızca tek bir işe kiralanır.
+    """
+
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self.lock = real_lock()
+        self.idle = {}  # anahtar -> [(örnek, hooks)]
+
+    def _create(self, static):
+        hooks = _Hooks()
+        opts = dict(static, progress_hooks=[hooks.on_progress], postprocessor_hooks=[hooks.on_postprocess])
+        with metrics.timed('ydl_setup'):
+            ydl = yt_dlp.YoutubeDL(opts)
+        # Büyük progressive akışlar için çok bağlantılı indirme (concurrent_fragment_downloads > 1)
+        ranged.install(ydl, hooks.on_progress)
+        return ydl, hooks
+
+    @contextmanager
+    def lease(self, opts):
+        """Verilen ayarlarla bir örnek kiralar; iş bitince havuza geri koyar."""
+        static = {k: v for k, v in opts.items() if k not in LEASE_KEYS}
+        key = _opts_key(static)
+        with self.lock:
+            idle = self.idle.get(key)
+            pooled = idle.pop() if idle else None
+        metrics.inc('ytd_ydl_pool_total', result='hit' if pooled else 'miss')
+        ydl, hooks = pooled or self._create(static)
+
+        hooks.progress = list(opts.get('progress_hooks') or [])
+        hooks.postprocess = list(opts.get('postprocessor_hooks') or [])
+        if 'outtmpl' in opts:
+            ydl.params['outtmpl']['default'] = opts['outtmpl']
+        # Zaman aralığı fonksiyonu her işte farklı; önceki kiracının aralığı kalmasın.
+        # Anahtar hiç olmamalı: yt-dlp yoksa varsayılanı kullanır, None çağrılamaz
+        if opts.get('download_ranges'):
+            ydl.params['download_ranges'] = opts['download_ranges']
+        else:
+            ydl.params.pop('download_ranges', None)
+        if opts.get('format') != ydl.params.get('format'):
+            ydl.params['format'] = opts.get('format')
+            ydl.format_selector = ydl.build_format_selector(opts['format']) if opts.get('format') else None
+
+        try:
+            yield ydl
+        except BaseException:
+            # Yarıda kalan örneğin durumu belirsiz; havuza dönmez
+            ydl.close()
+            raise
+        finally:
+            hooks.progress, hooks.postprocess = [], []
+
+        with self.lock:
+            idle = self.idle.setdefault(key, [])
+            if len(idle) < self.size:
+                idle.append((ydl, hooks))
+                return
+        ydl.close()
+
+    def clear(self):
+        """Bekleyen örnekleri kapatır (testler ve kapanış için)."""
+        with self.lock:
+            idle, self.idle = self.idle, {}
+        for instances in idle.values():
+            for ydl, _ in instances:
+                ydl.close()
+
+
+# Süreç genelinde paylaşılan havuz
+ydl_pool = YDLPool()
+atexit.register(ydl_pool.clear)